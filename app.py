@@ -1,32 +1,37 @@
 import os
-import nltk
-from nltk.data import find
 import streamlit as st
-from youtube_transcript_api import YouTubeTranscriptApi
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from dotenv import load_dotenv
-from fpdf import FPDF
-import yt_dlp
-from docx import Document
-from io import BytesIO
 import re
 import time
-import math
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
-from pytube import YouTube
-from pytube.exceptions import PytubeError
-from moviepy.video.io.ffmpeg_tools import ffmpeg_extract_subclip
-import cv2
-import subprocess
-from urllib.error import HTTPError
-from openai import OpenAI
-from concurrent.futures import ThreadPoolExecutor
-
-# Ensure that the vader_lexicon is downloaded
-try:
-    find('sentiment/vader_lexicon.zip')
-except LookupError:
-    nltk.download('vader_lexicon')
+import asyncio
+import contextvars
+import queue
+import threading
+from functools import lru_cache
+from openai import OpenAI, AsyncOpenAI
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from transcript_cache import get_transcript_cache
+from llm_cache import get_llm_cache, cache_disabled
+from jobs import (
+    FINISHED_STATUSES, JOB_POLL_INTERVAL, JOB_WORKERS, JobCancelled, WorkerPool, get_job_queue, start_job_api
+)
+from metrics import (
+    job, span, current_job, use_job, record_cache_lookup, record_llm_call, record_rate_limit, record_transcript_tokens,
+    start_metrics_server
+)
+from cookie_manager import get_cookie_manager, is_auth_error
+from tokens import estimate_tokens, get_chunk_token_budget, plan_chunk_size
+from rate_limiter import (
+    get_rate_limit_scheduler, MAX_CONCURRENT_REQUESTS, EXPECTED_COMPLETION_TOKENS,
+    PRIORITY_FINAL, PRIORITY_REDUCE, PRIORITY_MAP
+)
+from sentiment import analyze_sentiment, analyze_sentiment_timeline
+from transcript_segments import TranscriptSegments
+from transcript_cleanup import TRANSCRIPT_TOKEN_BUDGET, preprocess_transcript
+
+# Heavy dependencies (youtube_transcript_api, langchain, yt_dlp, nltk, fpdf,
+# python-docx) are imported where they are first used to keep cold
+# starts fast; most requests never create a reel or an export.
 
 def load_environment():
     """Load environment variables from a .env file."""
@@ -40,13 +45,14 @@ def load_environment():
 
     return api_key
 
-# Initialize Groq client
-try:
-    api_key = load_environment()
-    groq_client = OpenAI(api_key=api_key, base_url="https://api.groq.com/openai/v1")
-except Exception as e:
-    st.error(f"Error initializing API client: {str(e)}")
-    st.stop()
+# Any OpenAI-compatible server can stand in for Groq, e.g. the offline benchmark server
+GROQ_BASE_URL = os.getenv('GROQ_BASE_URL', 'https://api.groq.com/openai/v1')
+
+# Created on first use so batch.py and worker.py can import this module without a Streamlit page
+@lru_cache(maxsize=None)
+def get_groq_client():
+    """Return the Groq client; raises ValueError if GROQ_API_KEY is not set."""
+    return OpenAI(api_key=load_environment(), base_url=GROQ_BASE_URL)
 
 def extract_video_id(youtube_url):
     """Extract video ID from different YouTube URL formats."""
@@ -65,45 +71,101 @@ def extract_video_id(youtube_url):
             return match.group(1)
     raise ValueError("Could not extract video ID from URL")
 
-def get_transcript(youtube_url):
-    """Get transcript using YouTube Transcript API with cookies."""
+class TranscriptError(Exception):
+    """No transcript could be fetched or transcribed; the message is meant for the user."""
+
+def get_transcript(youtube_url, use_cache=True):
+    """Get transcript text using YouTube Transcript API with cookies."""
     try:
-        video_id = extract_video_id(youtube_url)
-        cookies_file = os.getenv('COOKIE_PATH', os.path.join(os.path.dirname(__file__), 'cookies.txt'))
+        segments, language_code = get_timed_transcript(youtube_url, use_cache)
+    except TranscriptError as e:
+        print(f"No transcript for {youtube_url}: {str(e)}")
+        return None, None
+    return segments.text, language_code
 
-        if not os.path.exists(cookies_file):
-            st.error("Cookie file not found. Please follow the setup instructions in the README.")
-            return None, None
+def transcribe_video_audio(youtube_url, video_id, cookies_file=None, on_status=None):
+    """Fallback for videos without captions: transcribe the audio track."""
+    from transcription import transcribe_video
+    if on_status:
+        on_status("No captions found for this video. Transcribing its audio instead, this may take a few minutes...")
+    try:
+        transcript_parts, language_code = transcribe_video(youtube_url, video_id, cookies_file)
+    except Exception as e:
+        # ffmpeg and Whisper failures are not a cookie problem
+        print(f"Error transcribing the audio of {video_id}: {str(e)}")
+        raise TranscriptError(f"Audio transcription failed ({str(e)}). Please try again later.")
+    if not transcript_parts:
+        raise TranscriptError("Audio transcription failed. Please try again later.")
+    segments = TranscriptSegments.from_parts(transcript_parts)
+    get_transcript_cache().set(video_id, language_code, segments.text, transcript_parts)
+    return segments, language_code
+
+def get_timed_transcript(youtube_url, use_cache=True, on_status=None):
+    """Get the transcript with per-segment timing as TranscriptSegments.
+
+    Raises TranscriptError with a message for the user when there is none.
+    on_status, if given, receives progress messages such as the switch to
+    audio transcription. Nothing here talks to Streamlit, since jobs run
+    this on worker threads.
+    """
+    try:
+        video_id = extract_video_id(youtube_url)
+    except ValueError:
+        raise TranscriptError("Invalid YouTube URL. Please check the link and try again.")
+    transcript_cache = get_transcript_cache()
+    if use_cache:
+        cached = transcript_cache.get(video_id)
+        record_cache_lookup('transcript', bool(cached))
+        if cached:
+            # Entries cached before 'generated' was stored are treated as manual captions
+            segments = TranscriptSegments.from_parts(cached['segments'], generated=cached.get('generated', False))
+            return segments, cached['language_code']
+
+    # Parsed once and re-read only when the file changes; refreshed ahead of expiry
+    cookie_manager = get_cookie_manager()
+    cookies_file = cookie_manager.get_cookie_file()
+
+    if cookies_file is None:
+        if not cookie_manager.exists():
+            raise TranscriptError("Cookie file not found. Please follow the setup instructions in the README.")
+        raise TranscriptError("Cookie file is empty. Please re-export your YouTube cookies.")
 
+    try:
+        from youtube_transcript_api import YouTubeTranscriptApi, NoTranscriptFound, TranscriptsDisabled
+        # The cookies come from the manager's parsed jar, not from re-reading cookies.txt per request
+        transcript_api = YouTubeTranscriptApi(http_client=cookie_manager.get_session())
         try:
-            with open(cookies_file, 'r') as f:
-                cookies_content = f.read()
-                if not cookies_content.strip():
-                    st.error("Cookie file is empty. Please re-export your YouTube cookies.")
-                    return None, None
-
-            transcript_list = YouTubeTranscriptApi.list_transcripts(video_id, cookies=cookies_file)
+            transcript_list = transcript_api.list(video_id)
+        except (TranscriptsDisabled, NoTranscriptFound):
+            return transcribe_video_audio(youtube_url, video_id, cookies_file, on_status)
+        try:
+            transcript = transcript_list.find_manually_created_transcript()
+        except:
             try:
-                transcript = transcript_list.find_manually_created_transcript()
-            except:
-                try:
-                    transcript = next(iter(transcript_list))
-                except Exception as e:
-                    st.error("Your YouTube cookies might have expired. Please re-export your cookies and try again.")
-                    return None, None
-
-            full_transcript = " ".join([part['text'] for part in transcript.fetch()])
-            language_code = transcript.language_code
-            return full_transcript, language_code
-
-        except Exception as e:
-            st.error("Authentication failed. Please update your cookies.txt file with fresh YouTube cookies.")
-            st.info("Tip: Sign in to YouTube again and re-export your cookies using the browser extension.")
-            return None, None
-
+                transcript = next(iter(transcript_list))
+            except StopIteration:
+                return transcribe_video_audio(youtube_url, video_id, cookies_file, on_status)
+            except Exception as e:
+                if not is_auth_error(e):
+                    raise
+                cookie_manager.report_auth_failure()
+                raise TranscriptError("Your YouTube cookies might have expired. Please re-export your cookies and try again.")
+
+        transcript_parts = transcript.fetch().to_raw_data()
+        segments = TranscriptSegments.from_parts(transcript_parts, generated=transcript.is_generated)
+        language_code = transcript.language_code
+        transcript_cache.set(video_id, language_code, segments.text, transcript_parts, generated=transcript.is_generated)
+        return segments, language_code
+
+    except TranscriptError:
+        raise
     except Exception as e:
-        st.error("Invalid YouTube URL. Please check the link and try again.")
-        return None, None
+        print(f"Error fetching the transcript of {video_id}: {str(e)}")
+        if not is_auth_error(e):
+            raise TranscriptError("Could not fetch the transcript of this video. Please try again later.")
+        cookie_manager.report_auth_failure()
+        raise TranscriptError("Authentication failed. Please update your cookies.txt file with fresh YouTube cookies. "
+                              "Tip: Sign in to YouTube again and re-export your cookies using the browser extension.")
 
 def get_available_languages():
     """Return a dictionary of available languages."""
@@ -200,35 +262,36 @@ def create_summary_prompt(text, target_language, mode='video'):
 
     return system_prompt, user_prompt
 
+# Per-language instructions for the chunk summaries
+LANGUAGE_INSTRUCTIONS = {
+    'en': 'Create a detailed summary of the following section in English. Maintain all important information, arguments, and connections.',
+    'hi': 'कृपया निम्नलिखित खंड का हिंदी में संक्षिप्त वर्णन करें। सभी महत्वपूर्ण जानकारी, तर्क और कनेक्शन बनाए रखें।',
+    'de': 'Erstellen Sie eine detaillierte Zusammenfassung des folgenden Abschnitts auf Deutsch. Behalten Sie alle wichtigen Informationen, Argumente und Verbindungen bei.',
+    'it': 'Crea un riassunto dettagliato della seguente sezione in italiano. Mantieni tutte le informazioni importanti, gli argomenti e le connessioni.',
+    'es': 'Cree un resumen detallado de la siguiente sección en español. Mantenga toda la información importante, los argumentos y las conexiones.',
+    'fr': 'Créez un résumé détaillé de la section suivante en français. Conservez toutes les informations importantes, arguments et connexions.',
+    'nl': 'Maak een gedetailleerde samenvatting van het volgende gedeelte in het Nederlands. Behoud alle belangrijke informatie, argumenten en verbindingen.',
+    'pl': 'Utwórz szczegółowe podsumowanie następującej sekcji po polsku. Zachowaj wszystkie ważne informacje, argumenty i połączenia.',
+    'ja': '以下のセクションの詳細な要約を日本語で作成してください。すべての重要な情報、議論、および接続を維持します。',
+    'zh': '用中文创建以下部分的详细摘要。保留所有重要信息、论点和连接。',
+    'ru': 'Создайте подробное резюме следующего раздела на русском языке. Сохраните всю важную информацию, аргументы и связи.',
+    'ko': '다음 섹션에 대한 자세한 요약을 한국어로 작성하세요. 모든 중요한 정보, 논쟁 및 연결을 유지합니다.',
+    'pt': 'Crie um resumo detalhado da seção a seguir em português. Mantenha todas as informações importantes, argumentos e conexões.',
+    'ar': 'قم بإنشاء ملخص مفصل للقسم التالي باللغة العربية. حافظ على جميع المعلومات المهمة والحجج والاتصالات.',
+    'tr': 'Aşağıdaki bölümün Türkçe ayrıntılı bir özetini oluşturun. Tüm önemli bilgileri, argümanları ve bağlantıları koruyun.',
+    'bn': 'নিম্নলিখিত অংশের বাংলায় একটি বিশদ সংক্ষিপ্তসার তৈরি করুন। সমস্ত গুরুত্বপূর্ণ তথ্য, যুক্তি এবং সংযোগগুলি বজায় রাখুন।',
+    'mr': 'खालील विभागाचा मराठीत सविस्तर आढावा घ्या. सर्व महत्त्वाची माहिती, तर्क आणि कनेक्शन कायम ठेवा.',
+    'ta': 'கீழ்க்கண்ட பகுதியின் தமிழில் விரிவான சுருக்கத்தை உருவாக்குங்கள். அனைத்து முக்கியமான தகவல்களையும் வாதங்களையும் இணைப்புகளையும் பராமரிக்கவும்.',
+    'te': 'క్రింది విభాగం యొక్క తెలుగు లో వివరమైన సారాంశాన్ని సృష్టించండి. అన్ని ముఖ్యమైన సమాచారాన్ని, వాదనలను మరియు సంబంధాలను నిర్వహించండి.',
+    'kn': 'ಕೆಳಗಿನ ವಿಭಾಗದ ಕನ್ನಡದಲ್ಲಿ ವಿವರವಾದ ಸಂಕ್ಷಿಪ್ತ ವಿವರವನ್ನು ರಚಿಸಿ. ಎಲ್ಲಾ ಮುಖ್ಯ ಮಾಹಿತಿಯನ್ನು, ವಾದಗಳನ್ನು ಮತ್ತು ಸಂಪರ್ಕಗಳನ್ನು ಉಳಿಸಿ.',
+    'ml': 'താഴെ പറയുന്ന വിഭാഗത്തിന്റെ മലയാളത്തിൽ വിശദമായ സാരാംശം സൃഷ്ടിക്കുക. എല്ലാ പ്രധാന വിവരങ്ങളും വാദങ്ങളും ബന്ധങ്ങളും നിലനിർത്തുക.',
+    'bh': 'निम्नलिखित खंड का भोजपुरी में एक विस्तृत सारांश बनाईं। सभे महत्वपूर्ण जानकारी, तर्क अउर संबंधन के बनावे के काम करीं।'
+}
+
 # Function to create prompts
 def create_prompts(language_code, section_number, text_chunk, mode):
     """Create prompts for detailed summarization based on language and mode."""
-    language_instructions = {
-        'en': 'Create a detailed summary of the following section in English. Maintain all important information, arguments, and connections.',
-        'hi': 'कृपया निम्नलिखित खंड का हिंदी में संक्षिप्त वर्णन करें। सभी महत्वपूर्ण जानकारी, तर्क और कनेक्शन बनाए रखें।',
-        'de': 'Erstellen Sie eine detaillierte Zusammenfassung des folgenden Abschnitts auf Deutsch. Behalten Sie alle wichtigen Informationen, Argumente und Verbindungen bei.',
-        'it': 'Crea un riassunto dettagliato della seguente sezione in italiano. Mantieni tutte le informazioni importanti, gli argomenti e le connessioni.',
-        'es': 'Cree un resumen detallado de la siguiente sección en español. Mantenga toda la información importante, los argumentos y las conexiones.',
-        'fr': 'Créez un résumé détaillé de la section suivante en français. Conservez toutes les informations importantes, arguments et connexions.',
-        'nl': 'Maak een gedetailleerde samenvatting van het volgende gedeelte in het Nederlands. Behoud alle belangrijke informatie, argumenten en verbindingen.',
-        'pl': 'Utwórz szczegółowe podsumowanie następującej sekcji po polsku. Zachowaj wszystkie ważne informacje, argumenty i połączenia.',
-        'ja': '以下のセクションの詳細な要約を日本語で作成してください。すべての重要な情報、議論、および接続を維持します。',
-        'zh': '用中文创建以下部分的详细摘要。保留所有重要信息、论点和连接。',
-        'ru': 'Создайте подробное резюме следующего раздела на русском языке. Сохраните всю важную информацию, аргументы и связи.',
-        'ko': '다음 섹션에 대한 자세한 요약을 한국어로 작성하세요. 모든 중요한 정보, 논쟁 및 연결을 유지합니다.',
-        'pt': 'Crie um resumo detalhado da seção a seguir em português. Mantenha todas as informações importantes, argumentos e conexões.',
-        'ar': 'قم بإنشاء ملخص مفصل للقسم التالي باللغة العربية. حافظ على جميع المعلومات المهمة والحجج والاتصالات.',
-        'tr': 'Aşağıdaki bölümün Türkçe ayrıntılı bir özetini oluşturun. Tüm önemli bilgileri, argümanları ve bağlantıları koruyun.',
-        'bn': 'নিম্নলিখিত অংশের বাংলায় একটি বিশদ সংক্ষিপ্তসার তৈরি করুন। সমস্ত গুরুত্বপূর্ণ তথ্য, যুক্তি এবং সংযোগগুলি বজায় রাখুন।',
-        'mr': 'खालील विभागाचा मराठीत सविस्तर आढावा घ्या. सर्व महत्त्वाची माहिती, तर्क आणि कनेक्शन कायम ठेवा.',
-        'ta': 'கீழ்க்கண்ட பகுதியின் தமிழில் விரிவான சுருக்கத்தை உருவாக்குங்கள். அனைத்து முக்கியமான தகவல்களையும் வாதங்களையும் இணைப்புகளையும் பராமரிக்கவும்.',
-        'te': 'క్రింది విభాగం యొక్క తెలుగు లో వివరమైన సారాంశాన్ని సృష్టించండి. అన్ని ముఖ్యమైన సమాచారాన్ని, వాదనలను మరియు సంబంధాలను నిర్వహించండి.',
-        'kn': 'ಕೆಳಗಿನ ವಿಭಾಗದ ಕನ್ನಡದಲ್ಲಿ ವಿವರವಾದ ಸಂಕ್ಷಿಪ್ತ ವಿವರವನ್ನು ರಚಿಸಿ. ಎಲ್ಲಾ ಮುಖ್ಯ ಮಾಹಿತಿಯನ್ನು, ವಾದಗಳನ್ನು ಮತ್ತು ಸಂಪರ್ಕಗಳನ್ನು ಉಳಿಸಿ.',
-        'ml': 'താഴെ പറയുന്ന വിഭാഗത്തിന്റെ മലയാളത്തിൽ വിശദമായ സാരാംശം സൃഷ്ടിക്കുക. എല്ലാ പ്രധാന വിവരങ്ങളും വാദങ്ങളും ബന്ധങ്ങളും നിലനിർത്തുക.',
-        'bh': 'निम्नलिखित खंड का भोजपुरी में एक विस्तृत सारांश बनाईं। सभे महत्वपूर्ण जानकारी, तर्क अउर संबंधन के बनावे के काम करीं।'
-    }
-
-    instruction = language_instructions.get(language_code, language_instructions['en'])
+    instruction = LANGUAGE_INSTRUCTIONS.get(language_code, LANGUAGE_INSTRUCTIONS['en'])
 
     if mode == 'podcast':
         instruction += ' Present this summary in a narrative, engaging style suitable for a podcast. Ensure a natural flow with storytelling elements.'
@@ -251,76 +314,179 @@ def create_prompts(language_code, section_number, text_chunk, mode):
 
     return system_prompt, user_prompt
 
+class TokenUsage:
+    """Thread-safe running total of the tokens reported by Groq responses."""
+
+    def __init__(self):
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._lock = threading.Lock()
+
+    def add(self, usage):
+        if usage is None:
+            return
+        with self._lock:
+            self.prompt_tokens += usage.prompt_tokens or 0
+            self.completion_tokens += usage.completion_tokens or 0
+
+    @property
+    def total_tokens(self):
+        return self.prompt_tokens + self.completion_tokens
+
+class LLMRequest:
+    """Steps shared by every Groq chat completion, sync or async, streamed or not.
+
+    Holds the response cache key, the scheduler's token reservation and
+    the metrics of one request; the api_call wrappers only send it and
+    read the response.
+    """
+
+    def __init__(self, system_prompt, user_prompt, model_name, temperature, max_tokens, use_cache, token_usage=None, stream=False):
+        self.model_name = model_name
+        self.token_usage = token_usage
+        self.stream = stream
+        self.use_cache = use_cache and not cache_disabled()
+        self.cache_key = None
+        if self.use_cache:
+            self.cache_key = get_llm_cache().make_key(model_name, system_prompt, user_prompt, temperature, max_tokens)
+        self.reserved_tokens = estimate_tokens(system_prompt + user_prompt) + EXPECTED_COMPLETION_TOKENS
+        self.create_args = {
+            'model': model_name,
+            'messages': [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            'temperature': temperature,
+            'max_tokens': max_tokens,
+        }
+        if stream:
+            # Groq reports usage of a streamed completion in a last chunk without choices
+            self.create_args['stream'] = True
+            self.create_args['stream_options'] = {'include_usage': True}
+        self.scheduler = get_rate_limit_scheduler()
+        self.waited = 0.0
+        self.started = None
+
+    def cached(self):
+        """Return the cached response, or None."""
+        if not self.use_cache:
+            return None
+        content = get_llm_cache().get(self.cache_key)
+        record_cache_lookup('llm', content is not None)
+        return content
+
+    def start(self, waited):
+        """Mark the request as sent after waiting waited seconds in the scheduler."""
+        self.waited = waited
+        self.started = time.monotonic()
+
+    def received_headers(self, headers):
+        self.scheduler.update_from_headers(self.model_name, headers)
+
+    def succeeded(self, content, usage=None):
+        """Record a finished response, cache it and return its content."""
+        if usage is not None:
+            self.scheduler.record_usage(self.model_name, self.reserved_tokens, usage.total_tokens)
+            if self.token_usage is not None:
+                self.token_usage.add(usage)
+        record_llm_call(self.model_name, 'ok', time.monotonic() - self.started, self.waited, usage, stream=self.stream)
+        if self.use_cache and content:
+            get_llm_cache().set(self.cache_key, content)
+        return content
+
+    def failed(self, error, attempt):
+        """Record a failed attempt; return True if it was rate limited and may be retried."""
+        seconds = time.monotonic() - self.started
+        wait_time = self.scheduler.handle_error(self.model_name, error, attempt)
+        if wait_time is not None:
+            record_llm_call(self.model_name, 'rate_limited', seconds, self.waited)
+            record_rate_limit(self.model_name, wait_time)
+            return True
+        record_llm_call(self.model_name, 'error', seconds, self.waited, error=error)
+        print(f"Error with Groq API: {str(error)}")
+        self.report_failure(f"Error with Groq API: {str(error)}")
+        return False
+
+    def exhausted(self):
+        """Note that every attempt was rate limited; the call gives up."""
+        self.report_failure(f"Rate limit retries exhausted for {self.model_name}")
+        return None
+
+    @staticmethod
+    def report_failure(message):
+        # Kept on the traced job so headless callers (batch.py) can say why a summary is missing
+        traced_job = current_job()
+        if traced_job is not None:
+            traced_job['llm_error'] = message
+
 # Function to handle retry logic for API calls
-def api_call_with_retry(system_prompt, user_prompt, model_name, retries=3):
-    wait_time_pattern = re.compile(r"try again in (\d+)m(\d+.\d+)s")
+def api_call_with_retry(system_prompt, user_prompt, model_name, retries=3, temperature=0.7, max_tokens=8000, use_cache=True, priority=PRIORITY_MAP, token_usage=None):
+    request = LLMRequest(system_prompt, user_prompt, model_name, temperature, max_tokens, use_cache, token_usage)
+    cached = request.cached()
+    if cached is not None:
+        return cached
+
+    # Every call goes through the shared scheduler so concurrent sessions stay under the Groq limits
     for attempt in range(retries):
+        request.start(request.scheduler.acquire(model_name, request.reserved_tokens, priority))
         try:
-            response = groq_client.chat.completions.create(
-                model=model_name,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.7,
-                max_tokens=8000
-            )
-            return response.choices[0].message.content
+            raw_response = get_groq_client().chat.completions.with_raw_response.create(**request.create_args)
+            request.received_headers(raw_response.headers)
+            response = raw_response.parse()
+            return request.succeeded(response.choices[0].message.content, response.usage)
         except Exception as e:
-            if "rate_limit_exceeded" in str(e):
-                match = wait_time_pattern.search(str(e))
-                if match:
-                    minutes, seconds = match.groups()
-                    wait_time = int(minutes) * 60 + float(seconds) + 5  # Add a buffer to the wait time
-                    print(f"Rate limit reached. Retrying in {wait_time} seconds...")
-                    time.sleep(wait_time)
-                else:
-                    st.error(f"Error parsing rate limit wait time: {str(e)}")
-                    return None
-            else:
-                st.error(f"Error with Groq API: {str(e)}")
+            if not request.failed(e, attempt):
                 return None
-    return None
+    return request.exhausted()
 
-# Function to summarize with retry logic
-# Function to summarize with retry logic
-def summarize_with_langchain_and_openai(transcript, mode, language_code='en', model_name='llama-3.1-8b-instant'):
-    def calculate_chunk_size(transcript_length, model_token_limit=8000):
-        # Estimate tokens (1 token ≈ 4 characters for English)
-        estimated_tokens = transcript_length // 4
-        max_chunk_tokens = model_token_limit - 1000  # Reserve 1000 tokens for prompts
-        chunk_tokens = min(max_chunk_tokens, max(1000, estimated_tokens // 10))  # At least 1/10th of total
-        
-        # Convert tokens to characters
-        chunk_size = chunk_tokens * 4
-        overlap = chunk_size // 5  # 20% overlap for context
-        return chunk_size, overlap
-
-    # Calculate dynamic chunk size and overlap based on transcript length
-    transcript_length = len(transcript)
-    chunk_size, chunk_overlap = calculate_chunk_size(transcript_length)
+# Streamed text is handed to on_partial at most this often; joining it per token is quadratic
+PARTIAL_INTERVAL = 0.1
 
-    # Use the calculated chunk size and overlap
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-        length_function=len
-    )
-    texts = text_splitter.split_text(transcript)
+# Function to stream a completion, reporting the text generated so far
+def stream_api_call_with_retry(system_prompt, user_prompt, model_name, on_partial, retries=3, temperature=0.7, max_tokens=8000, use_cache=True, priority=PRIORITY_FINAL, token_usage=None):
+    request = LLMRequest(system_prompt, user_prompt, model_name, temperature, max_tokens, use_cache, token_usage, stream=True)
+    cached = request.cached()
+    if cached is not None:
+        on_partial(cached)
+        return cached
 
-    def get_summary(text_chunk):
-        system_prompt, user_prompt = create_summary_prompt(text_chunk, language_code, mode)
-        return api_call_with_retry(system_prompt, user_prompt, model_name)
+    for attempt in range(retries):
+        request.start(request.scheduler.acquire(model_name, request.reserved_tokens, priority))
+        try:
+            raw_response = get_groq_client().chat.completions.with_raw_response.create(**request.create_args)
+            request.received_headers(raw_response.headers)
+            parts = []
+            usage = None
+            reported_at = 0.0
+            for chunk in raw_response.parse():
+                usage = getattr(chunk, 'usage', None) or usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                    if time.monotonic() - reported_at >= PARTIAL_INTERVAL:
+                        on_partial("".join(parts))
+                        reported_at = time.monotonic()
+            content = "".join(parts)
+            on_partial(content)
+            return request.succeeded(content, usage)
+        except JobCancelled:
+            raise  # Raised by on_partial, not by the API
+        except Exception as e:
+            if not request.failed(e, attempt):
+                return None
+    return request.exhausted()
 
-    # Summarize each chunk in parallel
-    with ThreadPoolExecutor() as executor:
-        intermediate_summaries = list(executor.map(get_summary, texts))
+SECTION_SEPARATOR = "\n\n=== Next Section ===\n\n"
+MAX_REDUCE_FAN_IN = 8
 
-    # Combine intermediate summaries
-    combined_summary = "\n\n=== Next Section ===\n\n".join(filter(None, intermediate_summaries))
+def get_final_instruction(mode):
+    """Return the style instruction used when combining summaries."""
+    if mode == 'podcast':
+        return 'Maintain a narrative and engaging style, making sure to connect the points naturally and conversationally. Use transitions and storytelling elements to keep it engaging.'
+    return 'Keep the summary concise and well-structured, focusing on key points and details. Use bullet points and headings to organize the content clearly.'
 
-    # Create final summary instructions
-    final_instruction = 'Maintain a narrative and engaging style, making sure to connect the points naturally and conversationally. Use transitions and storytelling elements to keep it engaging.' if mode == 'podcast' else 'Keep the summary concise and well-structured, focusing on key points and details. Use bullet points and headings to organize the content clearly.'
+def create_final_prompts(combined_summary, language_code, mode):
+    """Create prompts for the final summary built from intermediate summaries."""
+    final_instruction = get_final_instruction(mode)
 
     final_system_prompt = f"""You are an expert in creating comprehensive summaries. 
     Create a coherent, well-structured complete summary in {language_code} from the 
@@ -339,101 +505,487 @@ def summarize_with_langchain_and_openai(transcript, mode, language_code='en', mo
     Intermediate summaries:
     {combined_summary}"""
 
-    # Generate final summary
-    final_summary = api_call_with_retry(final_system_prompt, final_user_prompt, model_name)
-    return final_summary
-
-class PDF(FPDF):
-    def header(self):
-        self.set_font('FreeSerif', 'B', 12)
-        self.cell(0, 10, 'Summary Report', 0, 1, 'C')
-        self.ln(10)
-
-    def chapter_title(self, title):
-        self.set_font('FreeSerif', 'B', 12)
-        self.cell(0, 10, title, 0, 1, 'L')
-        self.ln(5)
-
-    def chapter_body(self, body):
-        self.set_font('FreeSerif', '', 12)
-        for line in body.split('\n'):
-            if line.strip().endswith(':'):
-                self.set_font('FreeSerif', 'B', 12)
-                self.multi_cell(0, 10, line.strip())
-                self.set_font('FreeSerif', '', 12)
-            elif line.startswith('* '):
-                self.set_font('FreeSerif', '', 12)
-                self.multi_cell(0, 10, u'\u2022 ' + line[2:])
-            else:
-                self.multi_cell(0, 10, line)
-            self.ln(5)
-
-# Function to generate PDF
-def generate_pdf(summary, title="Summary"):
-    pdf = PDF()
-
-    # Load Unicode fonts from the specified path
-    font_path = 'C:\\coding\\youtube summarizer\\youtube_summarizer\\textFormat\\freeserif\\'
-    pdf.add_font('FreeSerif', '', font_path + 'FreeSerif.ttf', uni=True)
-    pdf.add_font('FreeSerif', 'B', font_path + 'FreeSerifBold.ttf', uni=True)
-    pdf.add_font('FreeSerif', 'I', font_path + 'FreeSerifItalic.ttf', uni=True)
-    pdf.add_font('FreeSerif', 'BI', font_path + 'FreeSerifBoldItalic.ttf', uni=True)
-
-    pdf.add_page()
-    pdf.chapter_title(title)
-    pdf.chapter_body(summary)
-
-    # Output PDF to a string
-    pdf_output = pdf.output(dest='S').encode('latin1')
-    return pdf_output
-
-# Function to generate DOCX
-def generate_doc(summary, title="Summary"):
-    doc = Document()
-    doc.add_heading(title, 0)
-
-    for line in summary.split('\n'):
-        if line.startswith('**') and line.endswith('**'):
-            paragraph = doc.add_paragraph()
-            run = paragraph.add_run(line.strip('**'))
-            run.bold = True
-        elif line.strip().endswith(':'):
-            doc.add_heading(line.strip(), level=2)
-        elif line.startswith('* '):
-            doc.add_paragraph(line[2:], style='List Bullet')
-        else:
-            doc.add_paragraph(line)
-
-    with BytesIO() as doc_output:
-        doc.save(doc_output)
-        doc_output.seek(0)
-        return doc_output.read()
-
-# Function to analyze sentiment
-def analyze_sentiment(text):
-    analyzer = SentimentIntensityAnalyzer()
-    sentiment = analyzer.polarity_scores(text)
-    return sentiment
-
-def map_key_points_to_intervals(key_points, total_duration):
-    """Map key points to evenly distributed time intervals across the video duration."""
-    num_points = len(key_points)
-    interval_duration = total_duration / num_points  # Divide video into equal segments
-    
-    intervals = []
-    for i in range(num_points):
-        start_time = i * interval_duration
-        end_time = min((i + 1) * interval_duration, total_duration)
-        intervals.append((start_time, end_time))
-    
-    return intervals
+    return final_system_prompt, final_user_prompt
+
+def create_merge_prompts(combined_summary, language_code, mode):
+    """Create prompts that merge consecutive section summaries into one."""
+    system_prompt = f"""You are an expert in creating comprehensive summaries. 
+    Merge the provided consecutive section summaries into a single summary in {language_code}. 
+    Keep every important topic, argument, example and key statement, and preserve the order 
+    in which they appear. Ensure the summary is fully in {language_code}, without any words from other languages.
+    {get_final_instruction(mode)}"""
+
+    user_prompt = f"""Merge the following consecutive section summaries into one detailed summary 
+    of the whole part. Do not drop topics; shorten only repetitions.
+
+    Section summaries:
+    {combined_summary}"""
+
+    return system_prompt, user_prompt
 
-def find_subtitle_index(current_time, intervals):
-    """Find the index of the subtitle that corresponds to the given time."""
-    for idx, (start_time, end_time) in enumerate(intervals):
-        if start_time <= current_time < end_time:
-            return idx
-    return None
+def needs_reduce(summaries, token_budget):
+    """Return True if the summaries do not fit into one final call."""
+    if len(summaries) > MAX_REDUCE_FAN_IN:
+        return True
+    return len(summaries) > 1 and estimate_tokens(SECTION_SEPARATOR.join(summaries)) > token_budget
+
+def group_summaries(summaries, token_budget, max_fan_in=MAX_REDUCE_FAN_IN):
+    """Pack consecutive summaries into groups bounded by fan-in and token budget."""
+    groups = []
+    current = []
+    current_tokens = 0
+    for summary in summaries:
+        summary_tokens = estimate_tokens(summary)
+        if current and (len(current) >= max_fan_in or current_tokens + summary_tokens > token_budget):
+            groups.append(current)
+            current = []
+            current_tokens = 0
+        current.append(summary)
+        current_tokens += summary_tokens
+    if current:
+        groups.append(current)
+    return groups
+
+def get_request_token_budget(model_name, prompt_tokens):
+    """Return how many tokens of text one call may carry within the model's context and TPM budget."""
+    return get_chunk_token_budget(model_name, prompt_tokens,
+                                  tokens_per_minute=get_rate_limit_scheduler().token_limit(model_name),
+                                  completion_tokens=EXPECTED_COMPLETION_TOKENS)
+
+def split_transcript(transcript, mode, language_code, model_name, transcript_language=None):
+    """Split the transcript into chunks sized to the model's token budget."""
+    def token_length(text):
+        return estimate_tokens(text, transcript_language)
+
+    def calculate_chunk_size(transcript_tokens):
+        # Reserve room for the prompt template and the completion within the model context and rate limit
+        template_system_prompt, template_user_prompt = create_summary_prompt('', language_code, mode)
+        prompt_tokens = estimate_tokens(template_system_prompt + template_user_prompt)
+        max_chunk_tokens = get_request_token_budget(model_name, prompt_tokens)
+        return plan_chunk_size(transcript_tokens, max_chunk_tokens)
+
+    # Use as few chunks as the model budget allows, evenly sized, with a small fixed overlap
+    chunk_size, chunk_overlap = calculate_chunk_size(token_length(transcript))
+
+    # Use the calculated chunk size and overlap
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=token_length
+    )
+    return text_splitter.split_text(transcript)
+
+def get_reduce_budget(language_code, mode, model_name):
+    """Return how many tokens of intermediate summaries fit into one final call."""
+    final_system_prompt, final_user_prompt = create_final_prompts('', language_code, mode)
+    return get_request_token_budget(model_name, estimate_tokens(final_system_prompt + final_user_prompt))
+
+# Write section summaries once per video and only the final summary per target language
+SHARED_MAP_PHASE = os.getenv('SHARED_MAP_PHASE', '1') == '1'
+
+def get_map_language(language_code, transcript_language=None):
+    """Return the language the section summaries for a target language are written in.
+
+    With SHARED_MAP_PHASE, sections stay in the transcript's own language
+    (English if it is not a supported summary language), so every target
+    language reuses them and the final call does the translation.
+    """
+    if not SHARED_MAP_PHASE:
+        return language_code
+    source_language = (transcript_language or '').split('-')[0].lower()
+    return source_language if source_language in LANGUAGE_INSTRUCTIONS else 'en'
+
+def get_sections_key(transcript, mode, map_language, model_name):
+    """Return the LLM cache key of a transcript's section summaries."""
+    templates = [create_summary_prompt('', map_language, mode), create_merge_prompts('', map_language, mode)]
+    return get_llm_cache().make_sections_key(model_name, templates, transcript)
+
+def make_progress_event(stage, completed, total, started, token_usage, **fields):
+    """Build a progress event with elapsed time and a naive ETA for the stage."""
+    elapsed = time.monotonic() - started
+    event = {
+        'stage': stage,
+        'completed': completed,
+        'total': total,
+        'tokens': token_usage.total_tokens,
+        'elapsed': elapsed,
+        'eta': elapsed / completed * (total - completed) if completed else None,
+    }
+    event.update(fields)
+    return event
+
+# Function to summarize transcript sections with map/reduce
+def summarize_sections(transcript, mode, map_language, model_name='llama-3.1-8b-instant', use_cache=True, transcript_language=None, on_progress=None, segments=None, token_usage=None, check=None):
+    """Summarize a transcript into section summaries that fit one final call.
+
+    Chunks are summarized in parallel and merged in a tree reduce, all in
+    map_language. A complete result is cached per transcript, so further
+    target languages only pay for their final call. check, if given, is
+    called before every API call and may raise to stop the work; calls
+    still queued are then dropped.
+    """
+    use_cache = use_cache and not cache_disabled()
+    if use_cache:
+        sections_key = get_sections_key(transcript, mode, map_language, model_name)
+        cached = get_llm_cache().get_sections(sections_key)
+        record_cache_lookup('sections', cached is not None)
+        if cached is not None:
+            return cached
+    if token_usage is None:
+        token_usage = TokenUsage()
+
+    with span('chunking'):
+        texts = split_transcript(transcript, mode, map_language, model_name, transcript_language)
+    chunk_times = segments.chunk_times(texts) if segments is not None else None
+
+    def get_summary(text_chunk):
+        if check:
+            check()
+        system_prompt, user_prompt = create_summary_prompt(text_chunk, map_language, mode)
+        return api_call_with_retry(system_prompt, user_prompt, model_name, use_cache=use_cache, token_usage=token_usage)
+
+    def merge_summaries(group):
+        if len(group) == 1:
+            return group[0]
+        if check:
+            check()
+        system_prompt, user_prompt = create_merge_prompts(SECTION_SEPARATOR.join(group), map_language, mode)
+        return api_call_with_retry(system_prompt, user_prompt, model_name, use_cache=use_cache, priority=PRIORITY_REDUCE, token_usage=token_usage)
+
+    def run_stage(executor, function, items, stage, times=None, **fields):
+        # Collect results in input order but report them as soon as each one lands
+        started = time.monotonic()
+        # Workers run in a copy of this context so their API calls are tagged with the job ID
+        futures = {executor.submit(contextvars.copy_context().run, function, item): index for index, item in enumerate(items)}
+        results = [None] * len(items)
+        try:
+            for completed, future in enumerate(as_completed(futures), 1):
+                index = futures[future]
+                results[index] = future.result()
+                if on_progress:
+                    if times:
+                        fields['start'], fields['end'] = times[index]
+                    on_progress(make_progress_event(stage, completed, len(items), started, token_usage,
+                                                    index=index, summary=results[index], **fields))
+        except BaseException:
+            # A cancelled job must not wait for (and pay for) the calls still queued
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        return [result for result in results if result]
+
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+        # Summarize each chunk in parallel
+        with span('map', chunks=len(texts)):
+            intermediate_summaries = run_stage(executor, get_summary, texts, 'map', times=chunk_times)
+        complete = len(intermediate_summaries) == len(texts)
+
+        # Merge summaries level by level until they fit into a single final call
+        reduce_budget = get_reduce_budget(map_language, mode, model_name)
+        level = 0
+        while needs_reduce(intermediate_summaries, reduce_budget):
+            groups = group_summaries(intermediate_summaries, reduce_budget)
+            if len(groups) == len(intermediate_summaries):
+                break  # Every summary already fills the budget on its own
+            level += 1
+            with span('reduce', level=level, groups=len(groups)):
+                intermediate_summaries = run_stage(executor, merge_summaries, groups, 'reduce', level=level)
+            complete = complete and len(intermediate_summaries) == len(groups)
+
+    # Sections with failed calls are used once but not cached
+    if use_cache and complete and intermediate_summaries:
+        get_llm_cache().set_sections(sections_key, intermediate_summaries)
+    return intermediate_summaries
+
+# Function to write the final summary from section summaries
+def write_final_summary(section_summaries, language_code, mode, model_name='llama-3.1-8b-instant', use_cache=True, on_partial=None, token_usage=None):
+    """Combine section summaries into the final summary in language_code."""
+    if not section_summaries:
+        return None
+    final_system_prompt, final_user_prompt = create_final_prompts(SECTION_SEPARATOR.join(section_summaries), language_code, mode)
+    with span('final', language=language_code, stream=bool(on_partial)):
+        if on_partial:
+            return stream_api_call_with_retry(final_system_prompt, final_user_prompt, model_name, on_partial, use_cache=use_cache, token_usage=token_usage)
+        return api_call_with_retry(final_system_prompt, final_user_prompt, model_name, use_cache=use_cache, priority=PRIORITY_FINAL, token_usage=token_usage)
+
+# Function to summarize with retry logic
+def summarize_with_langchain_and_openai(transcript, mode, language_code='en', model_name='llama-3.1-8b-instant', use_cache=True, transcript_language=None, on_partial=None, on_progress=None, segments=None, check=None):
+    """Summarize a transcript with parallel chunk calls and a tree reduce.
+
+    on_progress, if given, receives one event dict per finished chunk or merge
+    (in completion order) and is always called from the calling thread. When
+    the transcript's TranscriptSegments are passed, chunk events also carry
+    the chunk's start and end time in the video. check is passed to
+    summarize_sections.
+    """
+    token_usage = TokenUsage()
+    section_summaries = summarize_sections(transcript, mode, get_map_language(language_code, transcript_language),
+                                           model_name, use_cache, transcript_language, on_progress, segments, token_usage, check)
+    if check:
+        check()
+    if on_progress:
+        on_progress(make_progress_event('final', 0, 1, time.monotonic(), token_usage))
+    return write_final_summary(section_summaries, language_code, mode, model_name, use_cache, on_partial, token_usage)
+
+# Function to summarize one transcript into several languages
+def summarize_languages(transcript, language_codes, mode, model_name='llama-3.1-8b-instant', use_cache=True, transcript_language=None, on_partial=None, on_progress=None, segments=None, check=None):
+    """Summarize a transcript into every language in language_codes; return {language_code: summary}.
+
+    The section summaries are computed once per map language (once in
+    total with SHARED_MAP_PHASE) and the final calls for all languages run
+    concurrently. on_partial, if given, is called as on_partial(language_code,
+    text) from worker threads; on_progress and check as in summarize_sections,
+    with one 'final' event per finished language.
+    """
+    token_usage = TokenUsage()
+    sections = {}
+    for language_code in language_codes:
+        map_language = get_map_language(language_code, transcript_language)
+        if map_language not in sections:
+            sections[map_language] = summarize_sections(transcript, mode, map_language, model_name, use_cache,
+                                                        transcript_language, on_progress, segments, token_usage, check)
+
+    def write(language_code):
+        if check:
+            check()
+        stream = (lambda text: on_partial(language_code, text)) if on_partial else None
+        return write_final_summary(sections[get_map_language(language_code, transcript_language)], language_code,
+                                   mode, model_name, use_cache, stream, token_usage)
+
+    started = time.monotonic()
+    if on_progress:
+        on_progress(make_progress_event('final', 0, len(language_codes), started, token_usage))
+    summaries = {}
+    with ThreadPoolExecutor(max_workers=min(len(language_codes), MAX_CONCURRENT_REQUESTS)) as executor:
+        futures = {executor.submit(contextvars.copy_context().run, write, language_code): language_code
+                   for language_code in language_codes}
+        try:
+            for completed, future in enumerate(as_completed(futures), 1):
+                language_code = futures[future]
+                summaries[language_code] = future.result()
+                if on_progress:
+                    on_progress(make_progress_event('final', completed, len(language_codes), started, token_usage,
+                                                    language=language_code))
+        except BaseException:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+    return {language_code: summaries[language_code] for language_code in language_codes}
+
+# 'threads' runs the pipeline in a thread pool per request, 'async' on the shared event loop
+SUMMARY_ENGINE = os.getenv('SUMMARY_ENGINE', 'threads')
+
+class AsyncSummaryEngine:
+    """Async variant of the map/reduce pipeline running on one shared event loop.
+
+    All sessions in the process submit jobs to the same loop, which reuses
+    connections through a single AsyncOpenAI client and bounds in-flight
+    requests with a semaphore. Jobs are returned as futures so the UI can
+    cancel them when the link, language or mode changes.
+    """
+
+    def __init__(self, max_in_flight=MAX_CONCURRENT_REQUESTS):
+        self.max_in_flight = max_in_flight
+        self.loop = asyncio.new_event_loop()
+        self._client = None
+        self._semaphore = None
+        threading.Thread(target=self.loop.run_forever, name='summary-engine', daemon=True).start()
+
+    def _get_client(self):
+        # Created lazily inside the loop so the client and semaphore bind to it
+        if self._client is None:
+            groq_client = get_groq_client()
+            self._client = AsyncOpenAI(api_key=groq_client.api_key, base_url=groq_client.base_url)
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        return self._client
+
+    async def api_call_with_retry(self, system_prompt, user_prompt, model_name, retries=3, temperature=0.7, max_tokens=8000, use_cache=True, priority=PRIORITY_MAP, token_usage=None):
+        client = self._get_client()
+        request = LLMRequest(system_prompt, user_prompt, model_name, temperature, max_tokens, use_cache, token_usage)
+        cached = await asyncio.to_thread(request.cached)
+        if cached is not None:
+            return cached
+
+        for attempt in range(retries):
+            request.start(await request.scheduler.acquire_async(model_name, request.reserved_tokens, priority))
+            try:
+                async with self._semaphore:
+                    raw_response = await client.chat.completions.with_raw_response.create(**request.create_args)
+                request.received_headers(raw_response.headers)
+                response = raw_response.parse()
+                return await asyncio.to_thread(request.succeeded, response.choices[0].message.content, response.usage)
+            except Exception as e:
+                if not request.failed(e, attempt):
+                    return None
+        return request.exhausted()
+
+    async def stream_api_call_with_retry(self, system_prompt, user_prompt, model_name, on_partial, retries=3, temperature=0.7, max_tokens=8000, use_cache=True, priority=PRIORITY_FINAL, token_usage=None):
+        client = self._get_client()
+        request = LLMRequest(system_prompt, user_prompt, model_name, temperature, max_tokens, use_cache, token_usage, stream=True)
+        cached = await asyncio.to_thread(request.cached)
+        if cached is not None:
+            on_partial(cached)
+            return cached
+
+        for attempt in range(retries):
+            request.start(await request.scheduler.acquire_async(model_name, request.reserved_tokens, priority))
+            try:
+                async with self._semaphore:
+                    raw_response = await client.chat.completions.with_raw_response.create(**request.create_args)
+                    request.received_headers(raw_response.headers)
+                    parts = []
+                    usage = None
+                    reported_at = 0.0
+                    async for chunk in await raw_response.parse():
+                        usage = getattr(chunk, 'usage', None) or usage
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            parts.append(chunk.choices[0].delta.content)
+                            if time.monotonic() - reported_at >= PARTIAL_INTERVAL:
+                                on_partial("".join(parts))
+                                reported_at = time.monotonic()
+                content = "".join(parts)
+                on_partial(content)
+                return await asyncio.to_thread(request.succeeded, content, usage)
+            except Exception as e:
+                if not request.failed(e, attempt):
+                    return None
+        return request.exhausted()
+
+    async def summarize_sections(self, transcript, mode, map_language, model_name='llama-3.1-8b-instant', use_cache=True, transcript_language=None, on_progress=None, segments=None, token_usage=None):
+        use_cache = use_cache and not cache_disabled()
+        if use_cache:
+            sections_key = get_sections_key(transcript, mode, map_language, model_name)
+            cached = await asyncio.to_thread(get_llm_cache().get_sections, sections_key)
+            record_cache_lookup('sections', cached is not None)
+            if cached is not None:
+                return cached
+        if token_usage is None:
+            token_usage = TokenUsage()
+
+        with span('chunking'):
+            texts = await asyncio.to_thread(split_transcript, transcript, mode, map_language, model_name, transcript_language)
+        chunk_times = segments.chunk_times(texts) if segments is not None else None
+
+        async def get_summary(text_chunk):
+            system_prompt, user_prompt = create_summary_prompt(text_chunk, map_language, mode)
+            return await self.api_call_with_retry(system_prompt, user_prompt, model_name, use_cache=use_cache, token_usage=token_usage)
+
+        async def merge_summaries(group):
+            if len(group) == 1:
+                return group[0]
+            system_prompt, user_prompt = create_merge_prompts(SECTION_SEPARATOR.join(group), map_language, mode)
+            return await self.api_call_with_retry(system_prompt, user_prompt, model_name, use_cache=use_cache, priority=PRIORITY_REDUCE, token_usage=token_usage)
+
+        async def run_stage(function, items, stage, times=None, **fields):
+            started = time.monotonic()
+
+            async def indexed(index, item):
+                return index, await function(item)
+
+            results = [None] * len(items)
+            tasks = [asyncio.ensure_future(indexed(index, item)) for index, item in enumerate(items)]
+            try:
+                for completed, task in enumerate(asyncio.as_completed(tasks), 1):
+                    index, results[index] = await task
+                    if on_progress:
+                        if times:
+                            fields['start'], fields['end'] = times[index]
+                        on_progress(make_progress_event(stage, completed, len(items), started, token_usage,
+                                                        index=index, summary=results[index], **fields))
+            finally:
+                # as_completed does not cancel pending calls when the job is cancelled
+                for task in tasks:
+                    task.cancel()
+            return [result for result in results if result]
+
+        with span('map', chunks=len(texts)):
+            intermediate_summaries = await run_stage(get_summary, texts, 'map', times=chunk_times)
+        complete = len(intermediate_summaries) == len(texts)
+
+        reduce_budget = get_reduce_budget(map_language, mode, model_name)
+        level = 0
+        while needs_reduce(intermediate_summaries, reduce_budget):
+            groups = group_summaries(intermediate_summaries, reduce_budget)
+            if len(groups) == len(intermediate_summaries):
+                break
+            level += 1
+            with span('reduce', level=level, groups=len(groups)):
+                intermediate_summaries = await run_stage(merge_summaries, groups, 'reduce', level=level)
+            complete = complete and len(intermediate_summaries) == len(groups)
+
+        if use_cache and complete and intermediate_summaries:
+            await asyncio.to_thread(get_llm_cache().set_sections, sections_key, intermediate_summaries)
+        return intermediate_summaries
+
+    async def write_final_summary(self, section_summaries, language_code, mode, model_name='llama-3.1-8b-instant', use_cache=True, on_partial=None, token_usage=None):
+        if not section_summaries:
+            return None
+        final_system_prompt, final_user_prompt = create_final_prompts(SECTION_SEPARATOR.join(section_summaries), language_code, mode)
+        with span('final', language=language_code, stream=bool(on_partial)):
+            if on_partial:
+                return await self.stream_api_call_with_retry(final_system_prompt, final_user_prompt, model_name, on_partial, use_cache=use_cache, token_usage=token_usage)
+            return await self.api_call_with_retry(final_system_prompt, final_user_prompt, model_name, use_cache=use_cache, priority=PRIORITY_FINAL, token_usage=token_usage)
+
+    async def summarize(self, transcript, mode, language_code='en', model_name='llama-3.1-8b-instant', use_cache=True, transcript_language=None, on_partial=None, on_progress=None, segments=None):
+        token_usage = TokenUsage()
+        section_summaries = await self.summarize_sections(transcript, mode, get_map_language(language_code, transcript_language),
+                                                          model_name, use_cache, transcript_language, on_progress, segments, token_usage)
+        if on_progress:
+            on_progress(make_progress_event('final', 0, 1, time.monotonic(), token_usage))
+        return await self.write_final_summary(section_summaries, language_code, mode, model_name, use_cache, on_partial, token_usage)
+
+    async def summarize_languages(self, transcript, language_codes, mode, model_name='llama-3.1-8b-instant', use_cache=True, transcript_language=None, on_partial=None, on_progress=None, segments=None):
+        token_usage = TokenUsage()
+        sections = {}
+        for language_code in language_codes:
+            map_language = get_map_language(language_code, transcript_language)
+            if map_language not in sections:
+                sections[map_language] = await self.summarize_sections(transcript, mode, map_language, model_name, use_cache,
+                                                                       transcript_language, on_progress, segments, token_usage)
+
+        async def write(language_code):
+            stream = (lambda text: on_partial(language_code, text)) if on_partial else None
+            return language_code, await self.write_final_summary(
+                sections[get_map_language(language_code, transcript_language)], language_code,
+                mode, model_name, use_cache, stream, token_usage)
+
+        started = time.monotonic()
+        if on_progress:
+            on_progress(make_progress_event('final', 0, len(language_codes), started, token_usage))
+        summaries = {}
+        tasks = [asyncio.ensure_future(write(language_code)) for language_code in language_codes]
+        try:
+            for completed, task in enumerate(asyncio.as_completed(tasks), 1):
+                language_code, summaries[language_code] = await task
+                if on_progress:
+                    on_progress(make_progress_event('final', completed, len(language_codes), started, token_usage,
+                                                    language=language_code))
+        finally:
+            for task in tasks:
+                task.cancel()
+        return {language_code: summaries[language_code] for language_code in language_codes}
+
+    def _submit(self, function, *args, **kwargs):
+        traced_job = current_job()
+
+        async def traced_call():
+            # The engine loop does not inherit the caller's context, so carry the job over
+            with use_job(traced_job):
+                return await function(*args, **kwargs)
+
+        return asyncio.run_coroutine_threadsafe(traced_call(), self.loop)
+
+    def submit(self, *args, **kwargs):
+        """Schedule a summary on the engine loop and return a cancellable Future."""
+        return self._submit(self.summarize, *args, **kwargs)
+
+    def submit_languages(self, *args, **kwargs):
+        """Schedule summaries in several languages (see summarize_languages) and return a cancellable Future."""
+        return self._submit(self.summarize_languages, *args, **kwargs)
+
+@st.cache_resource
+def get_async_engine():
+    """Return the async summary engine shared by all sessions."""
+    return AsyncSummaryEngine()
 
 def extract_key_points(summary):
     """Extract key points from the summary."""
@@ -441,95 +993,215 @@ def extract_key_points(summary):
     key_points = [line for line in summary.split('\n') if line.startswith('🔑') or line.startswith('* ')]
     return key_points
 
-def create_highlight_reels(video_path, key_points, subtitles, reel_duration=60):
-    """Create video highlight reels with subtitles."""
-    cap = cv2.VideoCapture(video_path)
-    fps = int(cap.get(cv2.CAP_PROP_FPS))
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    total_duration = total_frames / fps  # in seconds
-    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    
-    intervals = map_key_points_to_intervals(key_points, total_duration)
-    num_reels = math.ceil(total_duration / reel_duration)
-    reel_paths = []
-
-    for i in range(num_reels):
-        start_time = i * reel_duration
-        end_time = min((i + 1) * reel_duration, total_duration)
-        
-        video_output_path = f'reel_{i + 1}_video.mp4'
-        audio_output_path = f'reel_{i + 1}_audio.mp4'
-        final_output_path = f'reel_{i + 1}.mp4'
-        
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(video_output_path, fourcc, fps, (width, height))
-        
-        cap.set(cv2.CAP_PROP_POS_MSEC, start_time * 1000)
-        while cap.isOpened() and cap.get(cv2.CAP_PROP_POS_MSEC) < end_time * 1000:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            current_time = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
-            subtitle_index = find_subtitle_index(current_time, intervals)
-
-            if subtitle_index is not None:
-                current_subtitle = subtitles[subtitle_index]
-                cv2.putText(frame, current_subtitle, (10, height - 30), 
-                            cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2, cv2.LINE_AA)
-            
-            out.write(frame)
-
-        out.release()
-        
-        # Extract audio using ffmpeg
-        subprocess.run([
-            'ffmpeg', '-y', '-i', video_path, '-ss', str(start_time), '-to', str(end_time),
-            '-q:a', '0', '-map', 'a', audio_output_path
-        ])
-        
-        # Combine video and audio using ffmpeg
-        subprocess.run([
-            'ffmpeg', '-y', '-i', video_output_path, '-i', audio_output_path, '-c:v', 'copy', '-c:a', 'aac', final_output_path
-        ])
-        
-        reel_paths.append(final_output_path)
-    
-    cap.release()
-    return reel_paths
-
-def get_time_interval(point):
-    """Placeholder for actual mapping of points to time intervals."""
-    time_intervals = {
-        "First Key Point": (10, 20),  # start time in seconds, end time in seconds
-        "Second Key Point": (30, 45),
-        "Third Key Point": (50, 65)
-        # Add more mappings as needed
-    }
-    return time_intervals.get(point.strip(), (0, 5))  # default to the first 5 seconds if not found
-
-def download_youtube_video(url, cookies_path=None):
-    """Download YouTube video using yt_dlp."""
+def get_time_interval(segments, start_offset, end_offset):
+    """Return the (start, end) time in seconds of a span of the transcript text."""
+    return segments.span_times(start_offset, end_offset)
+
+def format_timestamp(seconds):
+    """Format seconds as H:MM:SS or M:SS."""
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+SUMMARY_JOB = 'summary'
+SUMMARY_MODEL = 'llama-3.1-8b-instant'
+
+def prepare_summary_job(kind, params):
+    """Validate a summary request and return the job parameters and deduplication key."""
+    if kind != SUMMARY_JOB:
+        raise ValueError(f"Unknown job kind: {kind}")
+    link = params.get('url') or ''
+    if not isinstance(link, str):
+        raise ValueError("The video URL must be a string.")
     try:
-        ydl_opts = {
-            'format': 'bestaudio+bvideo',  # Download best audio and video streams
-            'outtmpl': 'videos/%(title)s.%(ext)s',  # Save video with title
-            'quiet': False,  # Show progress during download
-        }
-
-        if cookies_path:
-            ydl_opts['cookiefile'] = cookies_path
+        video_id = extract_video_id(link)
+    except ValueError:
+        raise ValueError("Invalid YouTube URL. Please check the link and try again.")
+    # 'languages' asks for several summaries built from the same section summaries
+    language_codes = params.get('languages') or [params.get('language') or 'en']
+    if isinstance(language_codes, str):
+        language_codes = language_codes.split(',')
+    if not isinstance(language_codes, list) or not all(isinstance(code, str) for code in language_codes):
+        raise ValueError("Languages must be a language code or a list of language codes.")
+    language_codes = list(dict.fromkeys(code.strip() for code in language_codes if code.strip()))
+    for language_code in language_codes:
+        if language_code not in get_available_languages().values():
+            raise ValueError(f"Unsupported summary language: {language_code}")
+    if not language_codes:
+        raise ValueError("No summary language given.")
+    mode = params.get('mode') or 'video'
+    if not isinstance(mode, str):
+        raise ValueError("The mode must be a string.")
+    mode = mode.lower()
+    if mode not in ('video', 'podcast'):
+        raise ValueError(f"Unsupported mode: {mode}")
+    try:
+        token_budget = int(params.get('token_budget') or TRANSCRIPT_TOKEN_BUDGET)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid token budget: {params.get('token_budget')}")
+    job_params = {'url': link, 'language': language_codes[0], 'languages': language_codes, 'mode': mode,
+                  'token_budget': token_budget}
+    job_key = f"{video_id}:{','.join(language_codes)}:{mode}:{SUMMARY_MODEL}"
+    if token_budget:
+        job_key += f":{token_budget}"
+    return job_params, job_key
+
+def run_summary_job(params, context):
+    """Job handler: fetch the transcript, summarize it and score its sentiment.
+
+    Progress is published through the job context as a dict with the
+    percentage, a status message, the finished section summaries and the
+    final summary streamed so far, for the UI (or API clients) to poll.
+    A job for several languages streams each final summary into
+    'partials' and returns all of them in 'summaries'; 'partial' and
+    'summary' hold the first language.
+    """
+    link, mode = params['url'], params['mode']
+    language_codes = params.get('languages') or [params['language']]
+    language_code = language_codes[0]
+    language_names = {code: name for name, code in get_available_languages().items()}
+    language_name = ', '.join(language_names.get(code, code) for code in language_codes)
+    state = {'percent': 5, 'message': '📥 Fetching video transcript...', 'sections': [], 'partial': '', 'partials': {}}
+    published = {'at': 0.0}
+    # Final summaries stream in from several threads at once
+    state_lock = threading.Lock()
+
+    def publish(force=True):
+        # Streamed text arrives token by token; write it at most a few times per second
+        with state_lock:
+            if force or time.monotonic() - published['at'] >= JOB_POLL_INTERVAL:
+                context.report(state)
+                published['at'] = time.monotonic()
+
+    def show_progress(event):
+        eta = f" · ~{event['eta']:.0f}s left" if event['eta'] else ""
+        if event['stage'] == 'map':
+            state['percent'] = 10 + int(70 * event['completed'] / event['total'])
+            state['message'] = (f"🤖 Summarized {event['completed']}/{event['total']} sections · "
+                                f"{event['tokens']:,} tokens{eta}")
+            if event['summary']:
+                state['sections'].append({'index': event['index'], 'start': event.get('start'),
+                                          'end': event.get('end'), 'summary': event['summary']})
+        elif event['stage'] == 'reduce':
+            state['percent'] = 80 + int(10 * event['completed'] / event['total'])
+            state['message'] = (f"🧩 Merging sections (level {event['level']}): "
+                                f"{event['completed']}/{event['total']} · {event['tokens']:,} tokens{eta}")
+        else:
+            state['percent'] = 90 + int(5 * event['completed'] / event['total'])
+            if len(language_codes) == 1:
+                state['message'] = f"✍️ Writing final {language_name} summary · {event['tokens']:,} tokens used"
+            else:
+                state['message'] = (f"✍️ Writing final {language_name} summaries: {event['completed']}/{event['total']} · "
+                                    f"{event['tokens']:,} tokens used")
+        publish()
+
+    def show_status(message):
+        state['message'] = message
+        publish()
+
+    def set_partial_summary(code, text):
+        with state_lock:
+            state['partials'][code] = text
+            if code == language_code:
+                state['partial'] = text
+
+    def show_partial_summary(code, text):
+        set_partial_summary(code, text)
+        publish(force=False)
+
+    with job(SUMMARY_JOB, job_id=context.job['id'], link=link, language=','.join(language_codes), mode=mode) as summary_job_trace:
+        publish()
+        # The reason a transcript is missing (cookies, transcription) becomes the job's error
+        with span('transcript'):
+            try:
+                segments, transcript_language = get_timed_transcript(link, on_status=show_status)
+            except TranscriptError:
+                summary_job_trace['status'] = 'failed'
+                raise
+        if not segments.text.strip():
+            summary_job_trace['status'] = 'failed'
+            raise TranscriptError("No transcript could be fetched or transcribed for this video.")
+
+        # Drop caption noise (and, with a token budget, less central passages) before paying for tokens
+        with span('preprocess'):
+            summary_segments, transcript_stats = preprocess_transcript(segments, transcript_language, params.get('token_budget', 0))
+        record_transcript_tokens(transcript_stats)
+        transcript = summary_segments.text
+
+        state['percent'] = 10
+        state['message'] = (f"🤖 Generating {language_name} summary "
+                            f"({transcript_stats['final_tokens']:,} of {transcript_stats['raw_tokens']:,} transcript tokens)...")
+        publish()
+
+        if SUMMARY_ENGINE == 'async':
+            # Callbacks run on the engine thread, so they only hand data to this worker thread
+            progress_events = queue.SimpleQueue()
+            summary_future = get_async_engine().submit_languages(
+                transcript,
+                language_codes,
+                mode,
+                model_name=SUMMARY_MODEL,
+                transcript_language=transcript_language,
+                on_partial=set_partial_summary,
+                on_progress=progress_events.put,
+                segments=summary_segments
+            )
+            try:
+                while not summary_future.done() or not progress_events.empty():
+                    while not progress_events.empty():
+                        show_progress(progress_events.get())
+                    context.check()
+                    publish(force=False)
+                    time.sleep(0.2)
+            except JobCancelled:
+                summary_future.cancel()
+                raise
+            summaries = summary_future.result()
+        else:
+            # Section summaries are shared by (and cached for) every language; only the final calls run per language
+            summaries = summarize_languages(
+                transcript,
+                language_codes,
+                mode,
+                model_name=SUMMARY_MODEL,
+                transcript_language=transcript_language,
+                on_partial=show_partial_summary,
+                on_progress=show_progress,
+                segments=summary_segments,
+                check=context.check
+            )
 
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info_dict = ydl.extract_info(url, download=True)
-            video_path = ydl.prepare_filename(info_dict)
-            return video_path
-    except Exception as e:
-        print(f"Error downloading the video: {str(e)}")
-        return None
+        missing = [language_names.get(code, code) for code, summary in summaries.items() if not summary]
+        if missing:
+            summary_job_trace['status'] = 'failed'
+            reason = f" {summary_job_trace['llm_error']}" if summary_job_trace.get('llm_error') else ""
+            if len(language_codes) == 1:
+                raise RuntimeError(f"No summary could be generated for this video.{reason}")
+            raise RuntimeError(f"No summary could be generated for this video in {', '.join(missing)}.{reason}")
+        summary = summaries[language_code]
+        state.update(percent=95, message='📊 Analyzing sentiment...', partial=summary)
+        publish()
+        with span('sentiment', segments=len(segments)):
+            sentiment = analyze_sentiment_timeline(segments)
+        return {'summary': summary, 'summaries': summaries, 'sentiment': sentiment, 'transcript': transcript_stats}
+
+# Job kinds the workers of this app can run
+JOB_HANDLERS = {SUMMARY_JOB: run_summary_job}
+
+@st.cache_resource
+def get_worker_pool():
+    """Start this process's job workers (none with JOB_WORKERS=0, see worker.py)."""
+    return WorkerPool(get_job_queue(), JOB_HANDLERS, workers=JOB_WORKERS).start()
 
 def main():
+    try:
+        get_groq_client()
+    except Exception as e:
+        st.error(f"Error initializing API client: {str(e)}")
+        st.stop()
+    start_metrics_server()
+    get_worker_pool()
+    start_job_api(prepare_summary_job)
     st.title('📺 Advanced YouTube Video Summarizer')
     st.markdown("""
     This tool creates comprehensive summaries of YouTube videos using advanced AI technology.
@@ -545,10 +1217,18 @@ def main():
         st.session_state.mode = ""
     if 'summary' not in st.session_state:
         st.session_state.summary = None
+    if 'summaries' not in st.session_state:
+        st.session_state.summaries = {}
     if 'sentiment' not in st.session_state:
         st.session_state.sentiment = None
     if 'reel' not in st.session_state:
         st.session_state.reel = None
+    if 'export' not in st.session_state:
+        st.session_state.export = None
+    if 'job_id' not in st.session_state:
+        st.session_state.job_id = None
+    if 'transcript_stats' not in st.session_state:
+        st.session_state.transcript_stats = None
 
     col1, col2, col3 = st.columns([3, 1, 1])
     
@@ -574,61 +1254,135 @@ def main():
         )
         mode = mode.lower()
 
+    # Summaries in more languages reuse the same section summaries and only add a final call each
+    extra_languages = st.multiselect(
+        '➕ Also summarize in:',
+        options=[name for name in languages if name != target_language],
+        key='extra_languages_input'
+    )
+
     # Check for changes in link, language, or mode
     if (link != st.session_state.link or 
         target_language != st.session_state.language or 
         mode != st.session_state.mode):
+        video_changed = link != st.session_state.link or mode != st.session_state.mode
+        if video_changed:
+            st.session_state.summaries = {}
+            st.session_state.sentiment = None
+            st.session_state.transcript_stats = None
         st.session_state.link = link
         st.session_state.language = target_language
         st.session_state.mode = mode
-        st.session_state.summary = None
-        st.session_state.sentiment = None
+        # A language change shows a summary generated earlier for this video, if there is one
+        st.session_state.summary = st.session_state.summaries.get(target_language_code)
         st.session_state.reel = None
+        st.session_state.export = None
+        # Stop any summary still running for the previous selection, unless other sessions wait for it;
+        # a job that also writes the newly selected language keeps running
+        if st.session_state.job_id:
+            running_job = get_job_queue().get(st.session_state.job_id)
+            if (video_changed or running_job is None or
+                    target_language_code not in running_job['params'].get('languages', [])):
+                get_job_queue().release(st.session_state.job_id)
+                st.session_state.job_id = None
 
     if st.button('Generate Summary'):
         if link:
             try:
-                with st.spinner('Processing...'):
-                    progress = st.progress(0)
-                    status_text = st.empty()
-
-                    status_text.text('📥 Fetching video transcript...')
-                    progress.progress(25)
-
-                    transcript, _ = get_transcript(link)
-
-                    status_text.text(f'🤖 Generating {target_language} summary...')
-                    progress.progress(75)
-
-                    summary = summarize_with_langchain_and_openai(
-                        transcript, 
-                        mode,
-                        target_language_code,
-                        model_name='llama-3.1-8b-instant'
-                    )
-                    
-                    sentiment = analyze_sentiment(transcript)
-
-                    status_text.text('✨ Summary Ready!')
-                    # Save summary and sentiment in session state
-                    st.session_state.summary = summary
-                    st.session_state.sentiment = sentiment
-
-                    progress.progress(100)
-
-            except Exception as e:
-                st.error(f"An error occurred: {str(e)}")
+                language_codes = [target_language_code] + [languages[name] for name in extra_languages]
+                params, job_key = prepare_summary_job(SUMMARY_JOB, {'url': link, 'languages': language_codes, 'mode': mode})
+            except ValueError as e:
+                st.error(str(e))
+            else:
+                # Identical requests from other sessions (or worker processes) share one job
+                previous_job_id = st.session_state.job_id
+                st.session_state.job_id = get_job_queue().submit(SUMMARY_JOB, params, job_key)
+                if previous_job_id:
+                    get_job_queue().release(previous_job_id)
+                st.session_state.summary = None
+                st.session_state.sentiment = None
         else:
             st.warning('Please enter a valid YouTube link.')
 
+    # The job runs on a worker; this run only polls it, so reruns never interrupt the work
+    if st.session_state.job_id:
+        with st.spinner('Processing...'):
+            progress = st.progress(0)
+            status_text = st.empty()
+            section_summaries = st.expander('📄 Section summaries', expanded=False)
+            summary_placeholder = st.empty()
+            shown_sections = 0
+            while True:
+                summary_job = get_job_queue().get(st.session_state.job_id)
+                if summary_job is None:
+                    break
+                job_progress = summary_job['progress'] or {}
+                if summary_job['status'] == 'queued':
+                    status_text.text('⏳ Waiting for a free worker...')
+                elif job_progress:
+                    progress.progress(job_progress['percent'])
+                    status_text.text(job_progress['message'])
+                for section in job_progress.get('sections', [])[shown_sections:]:
+                    time_range = (f" ({format_timestamp(section['start'])}–{format_timestamp(section['end'])})"
+                                  if section['start'] is not None else "")
+                    section_summaries.markdown(f"**Section {section['index'] + 1}{time_range}**\n\n{section['summary']}")
+                    shown_sections += 1
+                partial = job_progress.get('partials', {}).get(target_language_code) or job_progress.get('partial')
+                if partial:
+                    summary_placeholder.markdown(partial)
+                if summary_job['status'] in FINISHED_STATUSES:
+                    break
+                time.sleep(JOB_POLL_INTERVAL)
+            summary_placeholder.empty()
+
+        st.session_state.job_id = None
+        if summary_job is not None and summary_job['status'] == 'done':
+            # Save summary and sentiment in session state
+            st.session_state.summaries.update(summary_job['result'].get('summaries')
+                                              or {summary_job['params']['language']: summary_job['result']['summary']})
+            st.session_state.summary = (st.session_state.summaries.get(target_language_code)
+                                        or summary_job['result']['summary'])
+            st.session_state.sentiment = summary_job['result']['sentiment']
+            st.session_state.transcript_stats = summary_job['result'].get('transcript')
+            progress.progress(100)
+            status_text.text('✨ Summary Ready!')
+        elif summary_job is not None and summary_job['status'] == 'failed':
+            status_text.text('❌ No summary could be generated for this video.')
+            st.error(f"An error occurred: {summary_job['error']}")
+        else:
+            status_text.text('The summary job was cancelled.')
+
     # Display summary, sentiment, and download buttons if summary exists
     if st.session_state.summary:
         st.markdown(st.session_state.summary)
+        other_languages = [name for name, code in languages.items()
+                           if code in st.session_state.summaries and name != target_language]
+        if other_languages:
+            st.caption(f"Also summarized in {', '.join(other_languages)}; select the language above to view it.")
+
+        transcript_stats = st.session_state.transcript_stats
+        if transcript_stats:
+            reduced = " and TextRank reduction" if transcript_stats['reduced'] else ""
+            st.caption(f"Transcript sent to the model: {transcript_stats['final_tokens']:,} of "
+                       f"{transcript_stats['raw_tokens']:,} estimated tokens ({transcript_stats['saved_percent']}% saved "
+                       f"by caption cleanup{reduced}; {transcript_stats['removed_segments']} caption lines removed)")
 
         sentiment = st.session_state.sentiment
         if sentiment:
             st.markdown("### Sentiment Analysis")
-            st.json(sentiment)
+            st.json({key: value for key, value in sentiment.items() if key != 'timeline'})
+            timeline = sentiment.get('timeline')
+            if timeline:
+                st.markdown("#### Sentiment over time")
+                st.line_chart(
+                    {
+                        'minute': [window['start'] / 60 for window in timeline],
+                        'compound': [window['compound'] for window in timeline],
+                    },
+                    x='minute',
+                    y='compound'
+                )
+                st.caption(f"Scored {len(timeline)} windows at {sentiment['segments_per_second']:.0f} transcript segments/s")
             neg = sentiment['neg'] * 100
             neu = sentiment['neu'] * 100
             pos = sentiment['pos'] * 100
@@ -651,10 +1405,47 @@ def main():
         subtitles = [point.strip('🔑').strip('* ') for point in key_points]
 
         if st.button('Create Reel(s)'):
+            from media import fetch_video_info, plan_downloads
+            from reels import create_highlight_reels, plan_key_point_windows, plan_reel_windows
             with st.spinner('Creating reel(s)...'):
-                video_path = download_youtube_video(link)
-                if video_path:
-                    reel_paths = create_highlight_reels(video_path, key_points, subtitles, reel_duration=60)
+                video_id = extract_video_id(link)
+                try:
+                    total_duration = fetch_video_info(link)['duration']
+                except Exception as e:
+                    print(f"Error reading video metadata: {str(e)}")
+                    total_duration = None
+
+                # Cut one short reel per key point where it is actually discussed
+                intervals = None
+                windows = []
+                try:
+                    segments, transcript_language = get_timed_transcript(link)
+                except TranscriptError as e:
+                    print(f"Reels fall back to evenly spaced windows: {str(e)}")
+                    segments = None
+                if segments is not None and subtitles:
+                    from key_point_index import locate_key_points
+                    located = [(subtitle, window) for subtitle, window in
+                               zip(subtitles, locate_key_points(video_id, transcript_language, segments, subtitles))
+                               if window]
+                    if located:
+                        subtitles = [subtitle for subtitle, _ in located]
+                        intervals = [(start / 1000, end / 1000) for _, (start, end) in located]
+                        windows = plan_key_point_windows([window for _, window in located])
+                if not windows and total_duration:
+                    # No key point matched the transcript (e.g. summary in another language)
+                    windows = plan_reel_windows(total_duration, reel_duration=60)
+                # Only the media the reels need is downloaded, and reused from the media cache
+                with span('download', windows=len(windows)):
+                    sources = plan_downloads(link, video_id, windows, total_duration) if windows else None
+                if sources:
+                    try:
+                        with span('reels', reels=len(windows)):
+                            reel_paths = create_highlight_reels(sources, windows, key_points, subtitles, total_duration, intervals=intervals)
+                    except Exception as e:
+                        # e.g. ffprobe failing on a broken download; the page keeps the summary
+                        print(f"Error creating reels: {str(e)}")
+                        reel_paths = []
                     if reel_paths:
                         st.success(f'{len(reel_paths)} reel(s) created successfully!')
                         for i, reel_path in enumerate(reel_paths):
@@ -678,22 +1469,28 @@ def main():
                 mime="video/mp4"
             )
 
-        pdf_data = generate_pdf(st.session_state.summary)
-        if pdf_data:
-            st.download_button(
-                label="Download as PDF",
-                data=pdf_data,
-                file_name="summary.pdf",
-                mime="application/pdf"
-            )
-        
-        doc_data = generate_doc(st.session_state.summary)
-        st.download_button(
-            label="Download as DOCX",
-            data=doc_data,
-            file_name="summary.docx",
-            mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-        )
+        # Exports are rendered only when requested and memoized per summary
+        from exports import EXPORT_FORMATS, export_summary
+        export_col1, export_col2 = st.columns([3, 1])
+        with export_col1:
+            export_format = st.selectbox('📄 Export format:', options=list(EXPORT_FORMATS), key='export_format_input')
+        with export_col2:
+            if st.button('Prepare download'):
+                st.session_state.export = export_format
+        if st.session_state.export:
+            extension, mime = EXPORT_FORMATS[st.session_state.export]
+            try:
+                with span('export', format=st.session_state.export):
+                    export_data = export_summary(st.session_state.summary, st.session_state.export)
+            except Exception as e:
+                st.error(f"Could not create the {st.session_state.export} export: {str(e)}")
+            else:
+                st.download_button(
+                    label=f"Download as {st.session_state.export}",
+                    data=export_data,
+                    file_name=f"summary.{extension}",
+                    mime=mime
+                )
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,201 @@
+"""Summarize many videos without the Streamlit UI.
+
+Usage:
+    python batch.py manifest.jsonl results.jsonl [--workers 4] [--language en,de,fr] [--mode video]
+
+The manifest is either JSONL, one object per line with a `url` (or `video_id`)
+and optional `language` (or `languages`) and `mode` fields, or plain text with
+one URL or video ID per line. A row with several languages summarizes the
+transcript sections once and writes one final summary per language. Rows
+with an unknown language or mode are recorded as errors without being run.
+Results are appended to the output file as JSONL. Rows already present
+there with status "ok" are skipped, so an interrupted run can simply be
+restarted.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from app import (
+    TranscriptError, analyze_sentiment, extract_video_id, get_available_languages, get_groq_client,
+    get_timed_transcript, summarize_languages
+)
+from metrics import job, record_transcript_tokens
+from transcript_cleanup import preprocess_transcript
+
+
+def validate_options(row_languages, mode, language_codes):
+    """Return why a row's languages or mode cannot be summarized, or None."""
+    if not isinstance(row_languages, list) or not all(isinstance(code, str) for code in row_languages):
+        return f"invalid languages: {row_languages!r}"
+    unknown = [code for code in row_languages if code not in language_codes]
+    if unknown or not row_languages:
+        return f"unsupported language: {', '.join(unknown) or '(none)'}"
+    if mode not in ('video', 'podcast'):
+        return f"unsupported mode: {mode}"
+    return None
+
+
+def read_manifest(path, default_language, default_mode):
+    """Yield normalized rows from a JSONL or plain-text manifest.
+
+    Rows whose languages or mode are not supported carry an 'error'.
+    """
+    languages = get_available_languages()
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if line.startswith('{'):
+                row = json.loads(line)
+            else:
+                row = {'url': line}
+            url = row.get('url') or row.get('link') or row.get('video_id')
+            if not url:
+                print(f"Skipping line {line_number}: no url or video_id", file=sys.stderr)
+                continue
+            row_languages = row.get('languages') or row.get('language', default_language)
+            if isinstance(row_languages, str):
+                row_languages = row_languages.split(',')
+            if isinstance(row_languages, list) and all(isinstance(name, str) for name in row_languages):
+                # Accept names as well as codes
+                row_languages = list(dict.fromkeys(languages.get(name.strip(), name.strip())
+                                                   for name in row_languages if name.strip()))
+            language = ','.join(map(str, row_languages)) if isinstance(row_languages, list) else str(row_languages)
+            mode = row.get('mode') or default_mode
+            mode = mode.lower() if isinstance(mode, str) else str(mode)
+            error = validate_options(row_languages, mode, set(languages.values()))
+            try:
+                video_id = extract_video_id(url)
+            except ValueError:
+                print(f"Skipping line {line_number}: invalid URL {url}", file=sys.stderr)
+                continue
+            record = {
+                'id': row.get('id') or f"{video_id}:{language}:{mode}",
+                'url': url,
+                'video_id': video_id,
+                'language': row_languages[0] if not error else language,
+                'languages': row_languages,
+                'mode': mode,
+            }
+            if error:
+                print(f"Line {line_number}: {error}", file=sys.stderr)
+                record['error'] = error
+            yield record
+
+
+def read_completed(path):
+    """Return the IDs of rows already summarized successfully."""
+    completed = set()
+    if not os.path.exists(path):
+        return completed
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue  # Partially written line from an interrupted run
+            if result.get('status') == 'ok':
+                completed.add(result['id'])
+    return completed
+
+
+def process_row(row, model_name):
+    """Run transcript -> summary -> sentiment for a single row."""
+    if row.get('error'):
+        return dict(row, status='error', seconds=0.0)
+    with job('batch', url=row['url'], language=','.join(row['languages']), mode=row['mode']) as current:
+        result = summarize_row(row, model_name)
+        if result['status'] != 'ok' and current.get('llm_error'):
+            result['error'] += f": {current['llm_error']}"
+        current['status'] = result['status']
+        return result
+
+
+def summarize_row(row, model_name):
+    """Summarize one row and return the result record."""
+    started = time.monotonic()
+    result = dict(row)
+    try:
+        segments, transcript_language = get_timed_transcript(row['url'])
+    except TranscriptError as e:
+        result.update(status='error', error=str(e), seconds=round(time.monotonic() - started, 2))
+        return result
+    if not segments.text.strip():
+        result.update(status='error', error='transcript unavailable')
+    else:
+        transcript = segments.text
+        summary_segments, transcript_stats = preprocess_transcript(segments, transcript_language)
+        record_transcript_tokens(transcript_stats)
+        summaries = summarize_languages(
+            summary_segments.text,
+            row['languages'],
+            row['mode'],
+            model_name=model_name,
+            transcript_language=transcript_language
+        )
+        missing = [code for code, summary in summaries.items() if not summary]
+        if not missing:
+            result.update(
+                status='ok',
+                transcript_language=transcript_language,
+                transcript_tokens=transcript_stats,
+                summary=summaries[row['language']],
+                summaries=summaries,
+                sentiment=analyze_sentiment(transcript)
+            )
+        else:
+            result.update(status='error', error=f"summarization failed ({', '.join(missing)})")
+    result['seconds'] = round(time.monotonic() - started, 2)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Summarize YouTube videos listed in a manifest.')
+    parser.add_argument('manifest', help='JSONL or text file with one video per line')
+    parser.add_argument('output', help='JSONL file results are appended to')
+    parser.add_argument('--workers', type=int, default=4, help='videos processed concurrently')
+    parser.add_argument('--language', default='en', help='default summary language codes or names, comma-separated')
+    parser.add_argument('--mode', default='video', choices=['video', 'podcast'], help='default summary mode')
+    parser.add_argument('--model', default='llama-3.1-8b-instant')
+    args = parser.parse_args()
+    try:
+        get_groq_client()
+    except ValueError as e:
+        sys.exit(f"Cannot summarize: {str(e)}")
+
+    completed = read_completed(args.output)
+    rows = [row for row in read_manifest(args.manifest, args.language, args.mode) if row['id'] not in completed]
+    print(f"{len(completed)} rows already done, {len(rows)} to process with {args.workers} workers")
+
+    started = time.monotonic()
+    succeeded = failed = 0
+    with open(args.output, 'a', encoding='utf-8') as out, ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = {executor.submit(process_row, row, args.model): row for row in rows}
+        for future in as_completed(futures):
+            row = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = dict(row, status='error', error=str(e))
+            if result['status'] == 'ok':
+                succeeded += 1
+            else:
+                failed += 1
+            out.write(json.dumps(result, ensure_ascii=False) + '\n')
+            out.flush()
+            elapsed = time.monotonic() - started
+            print(f"[{succeeded + failed}/{len(rows)}] {row['id']}: {result['status']} "
+                  f"({result.get('seconds', 0)}s, {(succeeded + failed) / elapsed * 60:.2f} videos/min)")
+
+    elapsed = time.monotonic() - started
+    throughput = (succeeded + failed) / elapsed * 60 if elapsed else 0
+    print(f"Done: {succeeded} ok, {failed} failed in {elapsed:.1f}s ({throughput:.2f} videos/min)")
+
+
+if __name__ == '__main__':
+    main()
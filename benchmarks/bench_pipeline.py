@@ -0,0 +1,271 @@
+"""Benchmark chunking, summarization, exports and reels offline.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--durations 1m,10m,1h,10h] [--languages en,ru,ja,zh,ko]
+        [--scenarios chunking,summary,export,reels] [--repeat 3] [--engine threads|async] [--targets en,de,fr]
+        [--latency 0.05] [--tpm 6000] [--error-rate 0.05] [--json results.json] [--compare baseline.json]
+
+Summaries run against a local fake Groq server (fake_groq.py) on synthetic
+transcripts of 1 minute to 10 hours (synthetic.py), with the LLM cache
+disabled; reels are cut from a generated test video and need ffmpeg. Every
+scenario is timed --repeat times and then run once more under tracemalloc
+for its peak Python allocation. The report lists p50/p99 time, throughput
+and peak memory per scenario, plus per-request latency and rate-limit
+errors seen by the fake server. With several --targets, each transcript
+is summarized into all of them at once, sharing the section summaries.
+Write the results with --json and pass them to --compare on a later run
+to see the change in p50 time.
+"""
+import argparse
+import gc
+import json
+import math
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_groq import add_server_arguments, server_options, start_fake_server
+from synthetic import DURATIONS, make_segments, make_summary, make_test_video, parse_duration
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, if the platform reports it."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def measure(function, repeat):
+    """Time function() repeat times, then once more under tracemalloc for its peak allocation."""
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return timings, peak
+
+
+def make_result(scenario, case, timings, peak, work, unit, **extra):
+    p50 = percentile(timings, 50)
+    result = {
+        'scenario': scenario,
+        'case': case,
+        'runs': len(timings),
+        'p50': p50,
+        'p99': percentile(timings, 99),
+        'throughput': work / p50 if p50 else None,
+        'unit': unit,
+        'peak_mb': peak / (1024 * 1024),
+    }
+    result.update(extra)
+    return result
+
+
+def bench_chunking(app, segments_by_case, model_name, repeat):
+    results = []
+    for (language, duration_name), segments in segments_by_case.items():
+        def run():
+            return app.split_transcript(segments.text, 'video', 'en', model_name, language)
+        timings, peak = measure(run, repeat)
+        results.append(make_result('chunking', f'{language} {duration_name}', timings, peak,
+                                   segments.duration / 60, 'video min/s', chunks=len(run())))
+    return results
+
+
+def bench_summary(app, server, segments_by_case, model_name, repeat, engine, stream, targets):
+    results = []
+    async_engine = app.AsyncSummaryEngine() if engine == 'async' else None
+    for (language, duration_name), segments in segments_by_case.items():
+        def run():
+            kwargs = dict(model_name=model_name, use_cache=False, transcript_language=language, segments=segments)
+            if len(targets) > 1:
+                kwargs['on_partial'] = (lambda code, text: None) if stream else None
+                if async_engine is not None:
+                    summaries = async_engine.submit_languages(segments.text, targets, 'video', **kwargs).result()
+                else:
+                    summaries = app.summarize_languages(segments.text, targets, 'video', **kwargs)
+                summary = all(summaries.values())
+            else:
+                kwargs['on_partial'] = (lambda text: None) if stream else None
+                if async_engine is not None:
+                    summary = async_engine.submit(segments.text, 'video', targets[0], **kwargs).result()
+                else:
+                    summary = app.summarize_with_langchain_and_openai(segments.text, 'video', targets[0], **kwargs)
+            if not summary:
+                raise RuntimeError(f'No summary for {language} {duration_name}')
+            return summary
+        server.state.reset_stats()
+        timings, peak = measure(run, repeat)
+        stats = server.state.stats()
+        latencies = stats['latencies'] or [0.0]
+        case = f'{language} {duration_name}' + (f' x{len(targets)}' if len(targets) > 1 else '')
+        results.append(make_result(
+            'summary', case, timings, peak, segments.duration / 60, 'video min/s',
+            requests=stats['requests'], rate_limited=stats['rate_limited'],
+            request_p50=percentile(latencies, 50), request_p99=percentile(latencies, 99),
+            tokens=stats['prompt_tokens'] + stats['completion_tokens'],
+        ))
+    return results
+
+
+def bench_export(repeat):
+    from document import parse_summary
+    from exports import EXPORT_FORMATS, export_summary
+    results = []
+    skipped = set()
+    for key_points in (8, 40):
+        summary = make_summary(key_points)
+        for export_format in EXPORT_FORMATS:
+            if export_format in skipped:
+                continue
+            def run():
+                # Measure a cold render, not the memoized result
+                export_summary.cache_clear()
+                parse_summary.cache_clear()
+                return export_summary(summary, export_format)
+            try:
+                run()
+            except ImportError as e:
+                print(f"Skipping {export_format} export: {str(e)}")
+                skipped.add(export_format)
+                continue
+            timings, peak = measure(run, repeat)
+            results.append(make_result('export', f'{export_format} {key_points} points', timings, peak,
+                                       1, 'exports/s', bytes=len(run())))
+    return results
+
+
+def bench_reels(video_seconds, repeat, work_dir):
+    from reels import create_highlight_reels, map_key_points_to_intervals, plan_reel_windows
+    if not shutil.which('ffmpeg'):
+        print("Skipping reels: ffmpeg not found")
+        return []
+    video_path = make_test_video(os.path.join(work_dir, f'testsrc_{video_seconds}s.mp4'), video_seconds)
+    # One 20-second reel per minute, as when key points are found in the transcript
+    windows = [(start, min(start + 20, video_seconds)) for start, _ in plan_reel_windows(video_seconds, 60)]
+    summary = make_summary(len(windows))
+    key_points = [line for line in summary.split('\n') if line.startswith('🔑')]
+    intervals = map_key_points_to_intervals(key_points, video_seconds)
+    sources = [(video_path, 0)] * len(windows)
+    output_dir = os.path.join(work_dir, 'reels')
+    os.makedirs(output_dir, exist_ok=True)
+
+    def run():
+        paths = create_highlight_reels(sources, windows, key_points, key_points, video_seconds,
+                                       output_dir=output_dir, intervals=intervals)
+        if len(paths) != len(windows):
+            raise RuntimeError('Some reels failed to render')
+        return paths
+    timings, peak = measure(run, repeat)
+    rendered = sum(end - start for start, end in windows)
+    return [make_result('reels', f'{len(windows)} reels from {video_seconds}s', timings, peak,
+                        rendered, 'reel s/s')]
+
+
+def format_seconds(seconds):
+    return f"{seconds * 1000:.2f}ms" if seconds < 1 else f"{seconds:.2f}s"
+
+
+def print_report(results, baseline=None):
+    previous = {(result['scenario'], result['case']): result for result in baseline or []}
+    print(f"{'scenario':<10} {'case':<22} {'runs':>4} {'p50':>9} {'p99':>9} {'throughput':>20} {'peak MB':>8}"
+          + ('  vs baseline' if baseline else ''))
+    for result in results:
+        throughput = f"{result['throughput']:.1f} {result['unit']}" if result['throughput'] else '-'
+        line = (f"{result['scenario']:<10} {result['case']:<22} {result['runs']:>4} {format_seconds(result['p50']):>9} "
+                f"{format_seconds(result['p99']):>9} {throughput:>20} {result['peak_mb']:>8.1f}")
+        before = previous.get((result['scenario'], result['case']))
+        if before:
+            line += f"  {(result['p50'] / before['p50'] - 1) * 100:+.1f}%"
+        print(line)
+        if result['scenario'] == 'summary':
+            print(f"{'':<33}{result['requests']} requests ({result['rate_limited']} rate limited), "
+                  f"request p50 {format_seconds(result['request_p50'])} / p99 {format_seconds(result['request_p99'])}, "
+                  f"{result['tokens']} tokens")
+    rss = peak_rss_mb()
+    if rss is not None:
+        print(f"Peak RSS: {rss:.0f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scenarios', default='chunking,summary,export,reels')
+    parser.add_argument('--durations', default='1m,10m,1h', help=f"comma-separated, from {', '.join(DURATIONS)} or seconds")
+    parser.add_argument('--languages', default='en,ja')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--model', default='llama-3.1-8b-instant')
+    parser.add_argument('--engine', choices=['threads', 'async'], default='threads')
+    parser.add_argument('--stream', action='store_true', help='stream the final summary')
+    parser.add_argument('--targets', default='en', help='comma-separated summary languages per transcript')
+    parser.add_argument('--video-seconds', type=int, default=300, help='length of the generated test video')
+    parser.add_argument('--json', help='write the results to this file')
+    parser.add_argument('--compare', help='results file of an earlier run')
+    add_server_arguments(parser)
+    args = parser.parse_args()
+    scenarios = args.scenarios.split(',')
+
+    # Point the app at the fake server before it creates its client
+    server = start_fake_server(**server_options(args))
+    os.environ['GROQ_BASE_URL'] = server.base_url
+    os.environ.setdefault('GROQ_API_KEY', 'offline-benchmark')
+    os.environ['LLM_CACHE_DISABLED'] = '1'
+    os.environ.setdefault('METRICS_LOG', os.devnull)
+    os.environ.setdefault('GROQ_RPM', str(args.rpm))
+    os.environ.setdefault('GROQ_TPM', str(args.tpm))
+    import app
+
+    segments_by_case = {}
+    for language in args.languages.split(','):
+        for duration_name in args.durations.split(','):
+            segments_by_case[(language, duration_name)] = make_segments(parse_duration(duration_name), language)
+
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        if 'chunking' in scenarios:
+            results += bench_chunking(app, segments_by_case, args.model, args.repeat)
+        if 'summary' in scenarios:
+            results += bench_summary(app, server, segments_by_case, args.model, args.repeat, args.engine, args.stream,
+                                     args.targets.split(','))
+        if 'export' in scenarios:
+            results += bench_export(args.repeat)
+        if 'reels' in scenarios:
+            results += bench_reels(args.video_seconds, args.repeat, work_dir)
+    server.shutdown()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+    print_report(results, baseline)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'args': vars(args), 'peak_rss_mb': peak_rss_mb(), 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Measure cold import time and first-render time of app.py.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--baseline REF] [--max-import-seconds 1.5]
+
+Every measurement runs in a fresh interpreter so module caches do not hide
+the cost of heavy imports. With --baseline, the same measurements are taken
+on a git worktree of REF (e.g. a release tag) for a before/after comparison.
+With --max-import-seconds or --max-render-seconds the script exits non-zero
+when the current tree is slower, so it can guard against regressions in CI.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = """
+import time
+started = time.perf_counter()
+import app
+print(time.perf_counter() - started)
+"""
+
+RENDER_SNIPPET = """
+import time
+from streamlit.testing.v1 import AppTest
+started = time.perf_counter()
+AppTest.from_file('app.py', default_timeout=120).run()
+print(time.perf_counter() - started)
+"""
+
+
+def measure(snippet, cwd, runs):
+    """Run snippet in fresh interpreters and return the timings in seconds."""
+    env = dict(os.environ)
+    env.setdefault('GROQ_API_KEY', 'offline-benchmark')
+    env['PYTHONDONTWRITEBYTECODE'] = '1'
+    timings = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', snippet], cwd=cwd, env=env,
+            capture_output=True, text=True, check=True
+        ).stdout
+        timings.append(float(output.strip().splitlines()[-1]))
+    return timings
+
+
+def report(label, cwd, runs):
+    import_times = measure(IMPORT_SNIPPET, cwd, runs)
+    render_times = measure(RENDER_SNIPPET, cwd, runs)
+    import_median = statistics.median(import_times)
+    render_median = statistics.median(render_times)
+    print(f"{label:<10} import: median {import_median:.3f}s (min {min(import_times):.3f}s)   "
+          f"first render: median {render_median:.3f}s (min {min(render_times):.3f}s)")
+    return import_median, render_median
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--baseline', help='git ref to compare against')
+    parser.add_argument('--max-import-seconds', type=float)
+    parser.add_argument('--max-render-seconds', type=float)
+    args = parser.parse_args()
+
+    if args.baseline:
+        with tempfile.TemporaryDirectory() as worktree:
+            subprocess.run(['git', 'worktree', 'add', '--detach', worktree, args.baseline],
+                           cwd=REPO_DIR, check=True, capture_output=True)
+            try:
+                baseline = report(args.baseline, worktree, args.runs)
+            finally:
+                subprocess.run(['git', 'worktree', 'remove', '--force', worktree], cwd=REPO_DIR, check=False)
+
+    current = report('current', REPO_DIR, args.runs)
+    if args.baseline:
+        print(f"speedup    import: {baseline[0] / current[0]:.2f}x   first render: {baseline[1] / current[1]:.2f}x")
+
+    failed = False
+    if args.max_import_seconds is not None and current[0] > args.max_import_seconds:
+        print(f"FAIL: import took {current[0]:.3f}s (limit {args.max_import_seconds}s)")
+        failed = True
+    if args.max_render_seconds is not None and current[1] > args.max_render_seconds:
+        print(f"FAIL: first render took {current[1]:.3f}s (limit {args.max_render_seconds}s)")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
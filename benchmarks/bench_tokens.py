@@ -0,0 +1,103 @@
+"""Compare chunk counts and token estimation error for every supported language.
+
+Usage:
+    python benchmarks/bench_tokens.py [--chars 200000] [--model llama-3.1-8b-instant]
+
+The reference token counts come from a real tokenizer when one is available:
+set TOKENIZER to a Hugging Face tokenizer name (e.g. meta-llama/Meta-Llama-3-8B)
+to use `transformers`, otherwise `tiktoken` is tried. Without either, only the
+estimates and chunk counts are reported.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('GROQ_API_KEY', 'offline-benchmark')
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from app import LANGUAGE_INSTRUCTIONS, create_summary_prompt, get_available_languages, get_request_token_budget
+from tokens import estimate_tokens, plan_chunk_size
+
+
+def load_reference_tokenizer():
+    """Return (name, count_function) for the best available real tokenizer."""
+    name = os.getenv('TOKENIZER')
+    if name:
+        from transformers import AutoTokenizer
+        tokenizer = AutoTokenizer.from_pretrained(name)
+        return name, lambda text: len(tokenizer.encode(text, add_special_tokens=False))
+    try:
+        import tiktoken
+    except ImportError:
+        return None, None
+    encoding = tiktoken.get_encoding('o200k_base')
+    return 'tiktoken/o200k_base', lambda text: len(encoding.encode(text))
+
+
+def build_sample(language_code, target_chars):
+    """Build a transcript-like sample of roughly target_chars characters."""
+    sentence = LANGUAGE_INSTRUCTIONS.get(language_code, LANGUAGE_INSTRUCTIONS['en'])
+    return ' '.join([sentence] * (target_chars // (len(sentence) + 1) + 1))[:target_chars]
+
+
+def count_chunks_by_chars(text):
+    """Chunk count with the previous 1 token = 4 characters heuristic."""
+    chunk_tokens = min(7000, max(1000, (len(text) // 4) // 10))
+    chunk_size = chunk_tokens * 4
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_size // 5, length_function=len)
+    return len(splitter.split_text(text))
+
+
+def count_chunks_by_tokens(text, language_code, model_name, count_tokens):
+    """Chunk count with the token estimator, plus the largest chunk in real tokens."""
+    system_prompt, user_prompt = create_summary_prompt('', 'en', 'video')
+    budget = get_request_token_budget(model_name, estimate_tokens(system_prompt + user_prompt))
+    chunk_tokens, overlap = plan_chunk_size(estimate_tokens(text, language_code), budget)
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_tokens,
+        chunk_overlap=overlap,
+        length_function=lambda chunk: estimate_tokens(chunk, language_code)
+    )
+    chunks = splitter.split_text(text)
+    largest = max(count_tokens(chunk) for chunk in chunks) if count_tokens else None
+    return len(chunks), chunk_tokens, largest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--chars', type=int, default=200000, help='characters of sample text per language')
+    parser.add_argument('--model', default='llama-3.1-8b-instant')
+    args = parser.parse_args()
+
+    tokenizer_name, count_tokens = load_reference_tokenizer()
+    print(f"Reference tokenizer: {tokenizer_name or 'none (estimates only)'}")
+    print(f"{'language':<12} {'code':<5} {'estimated':>10} {'actual':>10} {'error':>8} "
+          f"{'chunks(chars/4)':>16} {'chunks(tokens)':>15} {'target':>8} {'largest':>8}")
+
+    errors = []
+    started = time.perf_counter()
+    for language, code in get_available_languages().items():
+        sample = build_sample(code, args.chars)
+        estimated = estimate_tokens(sample, code)
+        actual = count_tokens(sample) if count_tokens else None
+        old_chunks = count_chunks_by_chars(sample)
+        new_chunks, target, largest = count_chunks_by_tokens(sample, code, args.model, count_tokens)
+        if actual:
+            error = (estimated - actual) / actual * 100
+            errors.append(abs(error))
+            error_text = f"{error:+.1f}%"
+        else:
+            error_text = '-'
+        print(f"{language:<12} {code:<5} {estimated:>10} {actual or '-':>10} {error_text:>8} "
+              f"{old_chunks:>16} {new_chunks:>15} {target:>8} {largest or '-':>8}")
+
+    if errors:
+        print(f"\nMean absolute error: {sum(errors) / len(errors):.1f}%  max: {max(errors):.1f}%")
+    print(f"Total time: {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
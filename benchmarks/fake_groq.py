@@ -0,0 +1,254 @@
+"""Local stand-in for Groq's OpenAI-compatible chat completions API.
+
+Usage:
+    python benchmarks/fake_groq.py [--port 8765] [--latency 0.2] [--tpm 6000] [--error-rate 0.05]
+    GROQ_BASE_URL=http://127.0.0.1:8765/openai/v1 streamlit run app.py
+
+Responses are synthetic summaries delivered after a configurable latency,
+streamed as server-sent events when requested. Per-model RPM/TPM buckets
+answer like Groq does: every response carries x-ratelimit-* headers, and a
+request over budget (or picked by --error-rate) gets a 429
+rate_limit_exceeded error with a "Please try again in ...s" message and a
+retry-after header, the format api_call_with_retry() parses.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rate_limiter import TokenBucket
+from synthetic import make_summary
+from tokens import estimate_tokens
+
+API_PREFIX = '/openai/v1'
+
+
+class FakeGroqState:
+    """Limits, latency model and request statistics shared by all handler threads."""
+
+    def __init__(self, latency=0.05, tokens_per_second=2000.0, rpm=100000, tpm=100000000,
+                 error_rate=0.0, key_points=8, seed=0):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.rpm = rpm
+        self.tpm = tpm
+        self.error_rate = error_rate
+        self.key_points = key_points
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.buckets = {}
+        self.latencies = []
+        self.requests = 0
+        self.rate_limited = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def reset_stats(self):
+        with self.lock:
+            self.latencies = []
+            self.requests = self.rate_limited = self.prompt_tokens = self.completion_tokens = 0
+
+    def stats(self):
+        with self.lock:
+            return {
+                'requests': self.requests,
+                'rate_limited': self.rate_limited,
+                'prompt_tokens': self.prompt_tokens,
+                'completion_tokens': self.completion_tokens,
+                'latencies': list(self.latencies),
+            }
+
+    def admit(self, model, tokens):
+        """Consume budget for one request; return (wait_seconds, limit_type, headers)."""
+        now = time.monotonic()
+        with self.lock:
+            self.requests += 1
+            buckets = self.buckets.get(model)
+            if buckets is None:
+                buckets = self.buckets[model] = (TokenBucket(self.rpm), TokenBucket(self.tpm))
+            requests, budget = buckets
+            wait_requests = requests.wait_time(1, now)
+            wait_tokens = budget.wait_time(tokens, now)
+            injected = self.error_rate and self.random.random() < self.error_rate
+            if wait_requests or wait_tokens or injected:
+                self.rate_limited += 1
+                limit_type = 'requests' if wait_requests >= wait_tokens else 'tokens'
+                wait_time = max(wait_requests, wait_tokens) or self.random.uniform(0.05, 0.5)
+            else:
+                requests.consume(1, now)
+                budget.consume(tokens, now)
+                limit_type, wait_time = None, 0.0
+            headers = {
+                'x-ratelimit-limit-requests': str(int(requests.capacity)),
+                'x-ratelimit-limit-tokens': str(int(budget.capacity)),
+                'x-ratelimit-remaining-requests': str(max(0, int(requests.tokens))),
+                'x-ratelimit-remaining-tokens': str(max(0, int(budget.tokens))),
+                'x-ratelimit-reset-requests': f'{(requests.capacity - requests.tokens) * 60 / requests.capacity:.2f}s',
+                'x-ratelimit-reset-tokens': f'{(budget.capacity - budget.tokens) * 60 / budget.capacity:.2f}s',
+            }
+            return wait_time, limit_type, headers
+
+    def record(self, seconds, prompt_tokens, completion_tokens):
+        with self.lock:
+            self.latencies.append(seconds)
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+
+
+def rate_limit_error(model, limit_type, wait_time, headers):
+    """Build Groq's 429 error body for a request over the given limit."""
+    name = 'requests per minute (RPM)' if limit_type == 'requests' else 'tokens per minute (TPM)'
+    limit = headers[f'x-ratelimit-limit-{limit_type}']
+    return {'error': {
+        'message': (f'Rate limit reached for model `{model}` in organization `org_offline` on {name}: '
+                    f'Limit {limit}. Please try again in {wait_time:.3f}s. '
+                    'Visit https://console.groq.com/docs/rate-limits for more information.'),
+        'type': limit_type,
+        'code': 'rate_limit_exceeded',
+    }}
+
+
+class FakeGroqHandler(BaseHTTPRequestHandler):
+    server_version = 'FakeGroq/1.0'
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip('/') == API_PREFIX + '/models':
+            self.send_json(200, {'object': 'list', 'data': [
+                {'id': model, 'object': 'model', 'owned_by': 'offline'} for model in sorted(self.state.buckets)
+            ]})
+        else:
+            self.send_json(404, {'error': {'message': f'Unknown path {self.path}', 'type': 'invalid_request_error'}})
+
+    def do_POST(self):
+        if self.path.rstrip('/') != API_PREFIX + '/chat/completions':
+            self.send_json(404, {'error': {'message': f'Unknown path {self.path}', 'type': 'invalid_request_error'}})
+            return
+        request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        started = time.monotonic()
+        model = request.get('model', 'llama-3.1-8b-instant')
+        prompt = '\n'.join(message.get('content', '') for message in request.get('messages', []))
+        prompt_tokens = estimate_tokens(prompt)
+        content = make_summary(self.state.key_points, seed=len(prompt), source_text=prompt[-4000:])
+        completion_tokens = min(estimate_tokens(content), request.get('max_tokens') or 8000)
+
+        wait_time, limit_type, headers = self.state.admit(model, prompt_tokens + completion_tokens)
+        if limit_type:
+            headers['retry-after'] = f'{wait_time:.3f}'
+            self.send_json(429, rate_limit_error(model, limit_type, wait_time, headers), headers)
+            return
+
+        time.sleep(self.state.latency)
+        response_id = f'chatcmpl-{uuid.uuid4().hex}'
+        usage = {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                 'total_tokens': prompt_tokens + completion_tokens}
+        if request.get('stream'):
+            include_usage = (request.get('stream_options') or {}).get('include_usage')
+            self.stream_completion(response_id, model, content, completion_tokens, headers, usage if include_usage else None)
+        else:
+            time.sleep(completion_tokens / self.state.tokens_per_second)
+            self.send_json(200, {
+                'id': response_id, 'object': 'chat.completion', 'created': int(time.time()), 'model': model,
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+                'usage': usage,
+            }, headers)
+        self.state.record(time.monotonic() - started, prompt_tokens, completion_tokens)
+
+    def stream_completion(self, response_id, model, content, completion_tokens, headers, usage=None):
+        # HTTP/1.0 without Content-Length: the stream ends when the connection closes
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        pieces = content.split(' ')
+        delay = completion_tokens / self.state.tokens_per_second / max(1, len(pieces))
+        for i, piece in enumerate(pieces):
+            chunk = {
+                'id': response_id, 'object': 'chat.completion.chunk', 'created': int(time.time()), 'model': model,
+                'choices': [{'index': 0, 'delta': {'content': piece if i == 0 else ' ' + piece}, 'finish_reason': None}],
+            }
+            self.wfile.write(f'data: {json.dumps(chunk)}\n\n'.encode('utf-8'))
+            time.sleep(delay)
+        done = {'id': response_id, 'object': 'chat.completion.chunk', 'created': int(time.time()), 'model': model,
+                'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]}
+        self.wfile.write(f'data: {json.dumps(done)}\n\n'.encode('utf-8'))
+        if usage:
+            # Sent when the request asks for stream_options.include_usage, like OpenAI and Groq
+            usage_chunk = {'id': response_id, 'object': 'chat.completion.chunk', 'created': int(time.time()),
+                           'model': model, 'choices': [], 'usage': usage}
+            self.wfile.write(f'data: {json.dumps(usage_chunk)}\n\n'.encode('utf-8'))
+        self.wfile.write(b'data: [DONE]\n\n')
+
+    def log_message(self, format, *args):
+        pass  # Benchmarks send thousands of requests
+
+
+def start_fake_server(port=0, host='127.0.0.1', **options):
+    """Start the fake server on a daemon thread; options go to FakeGroqState.
+
+    The returned server has .state and .base_url (to use as GROQ_BASE_URL);
+    call .shutdown() to stop it.
+    """
+    server = ThreadingHTTPServer((host, port), FakeGroqHandler)
+    server.daemon_threads = True
+    server.state = FakeGroqState(**options)
+    server.base_url = f'http://{host}:{server.server_address[1]}{API_PREFIX}'
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def add_server_arguments(parser):
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds before the first token')
+    parser.add_argument('--tokens-per-second', type=float, default=2000.0, help='completion generation speed')
+    parser.add_argument('--rpm', type=int, default=100000, help='requests per minute per model')
+    parser.add_argument('--tpm', type=int, default=100000000, help='tokens per minute per model')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of requests answered with a 429')
+
+
+def server_options(args):
+    return {'latency': args.latency, 'tokens_per_second': args.tokens_per_second,
+            'rpm': args.rpm, 'tpm': args.tpm, 'error_rate': args.error_rate}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    server = start_fake_server(args.port, args.host, **server_options(args))
+    print(f"Serving fake Groq API at {server.base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(60)
+            stats = server.state.stats()
+            print(f"{stats['requests']} requests, {stats['rate_limited']} rate limited, "
+                  f"{stats['prompt_tokens'] + stats['completion_tokens']} tokens")
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""Deterministic synthetic inputs for the offline benchmarks.
+
+Transcripts are built from small per-language vocabularies at a realistic
+speaking rate, so a "10h" transcript has roughly the length and token count
+of a real ten-hour video in that script. The test video is rendered with
+ffmpeg's testsrc and a sine tone, so nothing is fetched from YouTube.
+"""
+import os
+import random
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transcript_segments import TranscriptSegments
+
+# Named transcript lengths in seconds
+DURATIONS = {'1m': 60, '10m': 10 * 60, '1h': 60 * 60, '10h': 10 * 60 * 60}
+
+# Latin, Cyrillic, Japanese, Han and Hangul scripts
+VOCABULARY = {
+    'en': ('the model data video people time system we really going think important because example '
+           'market energy climate research question answer problem result growth network learning '
+           'so and but actually you know which that this with about from they have more').split(),
+    'de': ('das modell daten video menschen zeit system wir wirklich denken wichtig weil beispiel '
+           'markt energie klima forschung frage antwort problem ergebnis wachstum netzwerk lernen '
+           'also und aber eigentlich sozusagen welche dass diese mit über von sie haben mehr').split(),
+    'ru': ('модель данные видео люди время система мы действительно думаем важно потому пример '
+           'рынок энергия климат исследование вопрос ответ проблема результат рост сеть обучение '
+           'так и но вообще знаете который что это с о от они имеют больше').split(),
+    'ja': ('モデル データ 動画 人々 時間 システム 私たち 本当に 考える 重要 なぜなら 例えば '
+           '市場 エネルギー 気候 研究 質問 答え 問題 結果 成長 ネットワーク 学習 '
+           'です ます が は を に で と から まで について という こと もの').split(),
+    'zh': ('模型 数据 视频 人们 时间 系统 我们 真的 认为 重要 因为 例如 '
+           '市场 能源 气候 研究 问题 答案 难题 结果 增长 网络 学习 '
+           '的 了 是 在 和 但是 其实 这个 那个 关于 他们 更多').split(),
+    'ko': ('모델 데이터 영상 사람들 시간 시스템 우리는 정말 생각합니다 중요한 왜냐하면 예를 '
+           '시장 에너지 기후 연구 질문 답변 문제 결과 성장 네트워크 학습 '
+           '그래서 그리고 하지만 사실 아시다시피 어떤 그것은 이것은 함께 대해 그들은 더').split(),
+}
+
+# Words (or word-like units for scripts without spaces) spoken per second
+SPEECH_RATE = {'en': 2.5, 'de': 2.2, 'ru': 2.0, 'ja': 3.0, 'zh': 3.0, 'ko': 2.0}
+
+_NO_SPACES = {'ja', 'zh'}
+_SENTENCE_END = {'ja': '。', 'zh': '。'}
+
+
+def parse_duration(value):
+    """Accept a DURATIONS name such as '10h' or a number of seconds."""
+    return DURATIONS[value] if value in DURATIONS else float(value)
+
+
+def _sentence(rng, language, length):
+    words = rng.choices(VOCABULARY[language], k=length)
+    joiner = '' if language in _NO_SPACES else ' '
+    sentence = joiner.join(words)
+    if language not in _NO_SPACES:
+        sentence = sentence[0].upper() + sentence[1:]
+    return sentence + _SENTENCE_END.get(language, '.')
+
+
+def make_transcript_parts(duration, language='en', seed=0):
+    """Return caption parts ({'text', 'start', 'duration'}) covering duration seconds."""
+    rng = random.Random(f'{language}:{seed}')
+    rate = SPEECH_RATE[language]
+    parts = []
+    start = 0.0
+    while start < duration:
+        length = min(rng.uniform(2.0, 5.0), duration - start)
+        words = max(1, round(length * rate))
+        parts.append({'text': _sentence(rng, language, words), 'start': round(start, 3), 'duration': round(length, 3)})
+        start += length
+    return parts
+
+
+def make_segments(duration, language='en', seed=0):
+    """Return a synthetic TranscriptSegments of the given length in seconds."""
+    return TranscriptSegments.from_parts(make_transcript_parts(duration, language, seed))
+
+
+def make_summary(key_points=8, language='en', seed=0, source_text=None):
+    """Return a summary in the structure the prompts ask for.
+
+    With source_text, each key point quotes a stretch of it, so key points can
+    be located in the transcript like real ones.
+    """
+    rng = random.Random(f'summary:{language}:{seed}')
+    source_words = source_text.split() if source_text and language not in _NO_SPACES else None
+
+    def sentence(length):
+        return _sentence(rng, language, length)
+
+    def key_point():
+        if source_words:
+            start = rng.randrange(max(1, len(source_words) - 20))
+            return ' '.join(source_words[start:start + 20])
+        return sentence(18)
+
+    lines = [f'# 🎯 {sentence(5)}', '', '## 📝 Overview', sentence(25), sentence(20), '', '## 🔑 Key Points']
+    lines += [f'🔑 **{sentence(3)}** {key_point()}' for _ in range(key_points)]
+    lines += ['', '## 💡 Main Takeaways']
+    lines += [f'* {sentence(14)}' for _ in range(3)]
+    lines += ['', '## 🔄 Context & Implications', sentence(30)]
+    return '\n'.join(lines)
+
+
+def make_test_video(path, duration=120, width=1280, height=720, fps=30):
+    """Render a test pattern video with a sine tone using ffmpeg (reused if present)."""
+    if os.path.exists(path):
+        return path
+    subprocess.run([
+        'ffmpeg', '-y', '-loglevel', 'error',
+        '-f', 'lavfi', '-i', f'testsrc=size={width}x{height}:rate={fps}',
+        '-f', 'lavfi', '-i', 'sine=frequency=440:sample_rate=44100',
+        '-t', str(duration), '-c:v', 'libx264', '-preset', 'ultrafast', '-pix_fmt', 'yuv420p',
+        '-c:a', 'aac', '-shortest', path
+    ], check=True)
+    return path
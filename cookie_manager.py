@@ -0,0 +1,224 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+try:
+    import fcntl
+except ImportError:  # Windows: refreshes are only serialized within the process
+    fcntl = None
+
+# Refresh this long before the first login cookie expires
+COOKIE_REFRESH_MARGIN = float(os.getenv('COOKIE_REFRESH_MARGIN', 60 * 60))
+
+# Never start Chrome more often than this, even if requests keep failing
+COOKIE_REFRESH_MIN_INTERVAL = float(os.getenv('COOKIE_REFRESH_MIN_INTERVAL', 10 * 60))
+
+# Cookies that carry the Google login; their expiry decides when to refresh
+AUTH_COOKIE_NAMES = {'SID', 'HSID', 'SSID', 'APISID', 'SAPISID', '__Secure-1PSID', '__Secure-3PSID', 'LOGIN_INFO'}
+
+# youtube_transcript_api errors raised when YouTube rejects the client or its cookies
+AUTH_ERROR_NAMES = {
+    'RequestBlocked', 'IpBlocked', 'TooManyRequests',
+    'CookiePathInvalid', 'CookiesInvalid', 'FailedToCreateConsentCookie',
+}
+
+UPDATER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'update_cookies.py')
+
+
+def get_cookie_path():
+    """Return the cookies.txt location shared by the app and the updater."""
+    return os.getenv('COOKIE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cookies.txt'))
+
+
+def is_auth_error(error):
+    """Return True if the error, or one it was raised from, means YouTube rejected our credentials."""
+    while error is not None:
+        if any(cls.__name__ in AUTH_ERROR_NAMES for cls in type(error).__mro__):
+            return True
+        response = getattr(error, 'response', None)
+        if getattr(response, 'status_code', None) in (401, 403):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def parse_netscape_cookies(content):
+    """Parse a Netscape cookies.txt into a list of cookie dicts."""
+    cookies = []
+    for line in content.splitlines():
+        if line.startswith('#HttpOnly_'):
+            line = line[len('#HttpOnly_'):]
+        elif not line.strip() or line.startswith('#'):
+            continue
+        fields = line.rstrip('\n').split('\t')
+        if len(fields) != 7:
+            continue
+        domain, _, path, secure, expires, name, value = fields
+        cookies.append({
+            'domain': domain,
+            'path': path,
+            'secure': secure.upper() == 'TRUE',
+            'expires': int(expires) if expires.isdigit() else 0,
+            'name': name,
+            'value': value,
+        })
+    return cookies
+
+
+def build_cookie_jar(cookies):
+    """Build a requests cookie jar from parsed cookie dicts."""
+    from requests.cookies import RequestsCookieJar, create_cookie
+    jar = RequestsCookieJar()
+    for cookie in cookies:
+        jar.set_cookie(create_cookie(
+            cookie['name'], cookie['value'], domain=cookie['domain'], path=cookie['path'],
+            secure=cookie['secure'], expires=cookie['expires'] or None))
+    return jar
+
+
+@contextmanager
+def refresh_lock(path):
+    """Hold the cross-process lock that serializes cookie refreshes."""
+    if fcntl is None:
+        yield
+        return
+    with open(path + '.lock', 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def refresh_cookies(path, updater, if_needed=False, stale_mtime=None):
+    """Run updater() under the refresh lock unless the cookies no longer need it.
+
+    With if_needed, nothing happens while the login cookies are far from
+    expiring. With stale_mtime (the version of the file a failed request
+    used), nothing happens if another process has replaced the file since.
+    """
+    with refresh_lock(path):
+        manager = CookieManager(path)
+        if stale_mtime is not None and manager.mtime != stale_mtime:
+            print("Cookies were already refreshed by another process")
+            return True
+        if if_needed and stale_mtime is None and not manager.needs_refresh():
+            print(f"Cookies valid until {time.ctime(manager.expires) if manager.expires else 'end of session'}, no refresh needed")
+            return True
+        return updater()
+
+
+class CookieManager:
+    """In-memory view of cookies.txt that reloads only when the file changes.
+
+    Requests only pay for a stat() call. The file is re-parsed (into a cookie
+    jar that transcript requests copy from memory) when its mtime or size
+    changes, and a refresh through update_cookies.py is started in
+    the background when the login cookies are about to expire or when a
+    request reports an authentication failure.
+    """
+
+    def __init__(self, path=None, refresh_margin=COOKIE_REFRESH_MARGIN, auto_refresh=None):
+        self.path = path or get_cookie_path()
+        self.refresh_margin = refresh_margin
+        if auto_refresh is None:
+            # The updater logs in with YOUTUBE_EMAIL/YOUTUBE_PASSWORD; without them it cannot help
+            has_credentials = os.getenv('YOUTUBE_EMAIL') or os.path.exists(os.path.join(os.path.dirname(UPDATER_PATH), '.env'))
+            auto_refresh = os.getenv('COOKIE_AUTO_REFRESH', '1' if has_credentials else '0') == '1'
+        self.auto_refresh = auto_refresh
+        self.cookies = []
+        self.jar = None
+        self.expires = None
+        self.mtime = None
+        self._signature = None
+        self._lock = threading.Lock()
+        self._refresh_thread = None
+        self._last_refresh = 0.0
+        self._load()
+
+    def _load(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self.cookies, self.jar, self.expires, self.mtime, self._signature = [], None, None, None, None
+            return
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == self._signature:
+            return
+        with open(self.path, 'r', encoding='utf-8', errors='replace') as f:
+            cookies = parse_netscape_cookies(f.read())
+        expiries = [cookie['expires'] for cookie in cookies if cookie['name'] in AUTH_COOKIE_NAMES and cookie['expires']]
+        if not expiries:
+            expiries = [cookie['expires'] for cookie in cookies if cookie['expires']]
+        self.cookies = cookies
+        self.jar = build_cookie_jar(cookies)
+        self.expires = min(expiries) if expiries else None
+        self.mtime = stat.st_mtime_ns
+        self._signature = signature
+
+    def exists(self):
+        with self._lock:
+            self._load()
+            return self._signature is not None
+
+    def needs_refresh(self):
+        """Return True if there are no cookies or the login cookies expire soon."""
+        with self._lock:
+            self._load()
+            if not self.cookies:
+                return True
+            return self.expires is not None and self.expires - time.time() < self.refresh_margin
+
+    def get_cookie_file(self):
+        """Return the cookies.txt path if it holds cookies, refreshing ahead of expiry."""
+        if self.needs_refresh():
+            self.refresh()
+        with self._lock:
+            return self.path if self.cookies else None
+
+    def get_session(self):
+        """Return a requests.Session carrying the parsed cookies, without reading cookies.txt again."""
+        import requests
+        session = requests.Session()
+        with self._lock:
+            if self.jar is not None:
+                session.cookies.update(self.jar)
+        return session
+
+    def report_auth_failure(self):
+        """Called when YouTube rejected the current cookies; refresh them."""
+        with self._lock:
+            mtime = self.mtime
+        self.refresh(stale_mtime=mtime)
+
+    def refresh(self, stale_mtime=None):
+        """Start update_cookies.py in the background unless one is already running."""
+        if not self.auto_refresh:
+            return False
+        with self._lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return False
+            if self._last_refresh and time.monotonic() - self._last_refresh < COOKIE_REFRESH_MIN_INTERVAL:
+                return False
+            self._last_refresh = time.monotonic()
+            args = [sys.executable, UPDATER_PATH]
+            args += ['--stale', str(stale_mtime)] if stale_mtime is not None else ['--if-needed']
+            self._refresh_thread = threading.Thread(target=self._run_updater, args=(args,), daemon=True)
+            self._refresh_thread.start()
+        return True
+
+    def _run_updater(self, args):
+        print(f"Refreshing YouTube cookies: {' '.join(args[1:])}")
+        result = subprocess.run(args, env=dict(os.environ, COOKIE_PATH=self.path))
+        if result.returncode != 0:
+            print(f"Cookie refresh failed with exit code {result.returncode}")
+
+
+@lru_cache(maxsize=None)
+def get_cookie_manager():
+    """Return the process-wide cookie manager."""
+    return CookieManager()
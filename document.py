@@ -0,0 +1,54 @@
+import re
+from functools import lru_cache
+
+_HEADING_PATTERN = re.compile(r'^(#{1,6})\s+(.*)$')
+_BULLET_PATTERN = re.compile(r'^(?:[*\-•]\s+|🔑\s*)(.*)$')
+
+
+def parse_runs(text):
+    """Split **bold** markup into (text, bold) runs."""
+    runs = []
+    for i, part in enumerate(text.split('**')):
+        if part:
+            runs.append((part, i % 2 == 1))
+    return runs
+
+
+def heading_runs(text):
+    """Headings are bold as a whole, so inline markup is dropped."""
+    return [(text.replace('**', '').strip(' *'), False)]
+
+
+def plain_text(block):
+    """Return the text of a block without formatting."""
+    return ''.join(text for text, _ in block['runs'])
+
+
+@lru_cache(maxsize=32)
+def parse_summary(summary):
+    """Parse a summary once into a list of heading, bullet and paragraph blocks.
+
+    Each block is a dict with a 'type', a heading 'level' (0 for other
+    blocks) and the block text as (text, bold) 'runs'. Every export format
+    renders from this list, so they all agree on what a heading or a key
+    point is. The result is cached and must not be modified.
+    """
+    blocks = []
+    for line in summary.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        heading = _HEADING_PATTERN.match(line)
+        bullet = _BULLET_PATTERN.match(line)
+        if heading:
+            blocks.append({'type': 'heading', 'level': len(heading.group(1)), 'runs': heading_runs(heading.group(2))})
+        elif line.startswith('**') and line.endswith('**') and line.count('**') == 2:
+            blocks.append({'type': 'heading', 'level': 2, 'runs': heading_runs(line)})
+        elif bullet and not (line.startswith('🔑') and line.endswith(':')):
+            # "🔑 KEY POINTS:" introduces the key points rather than being one
+            blocks.append({'type': 'bullet', 'level': 0, 'runs': parse_runs(bullet.group(1))})
+        elif line.endswith(':') and len(line) < 80:
+            blocks.append({'type': 'heading', 'level': 2, 'runs': heading_runs(line)})
+        else:
+            blocks.append({'type': 'paragraph', 'level': 0, 'runs': parse_runs(line)})
+    return tuple(blocks)
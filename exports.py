@@ -0,0 +1,201 @@
+import html
+import json
+import os
+import pickle
+from functools import lru_cache
+from io import BytesIO
+
+from document import parse_summary, plain_text
+
+# Download formats offered in the UI: file extension and MIME type
+EXPORT_FORMATS = {
+    'PDF': ('pdf', 'application/pdf'),
+    'DOCX': ('docx', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'),
+    'Markdown': ('md', 'text/markdown'),
+    'HTML': ('html', 'text/html'),
+    'JSON': ('json', 'application/json'),
+}
+
+
+# FreeSerif ships with the app, together with PyFPDF's .pkl metric caches
+FONTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'textFormat', 'freeserif')
+PDF_FONT_FAMILY = 'FreeSerif'
+PDF_FONT_FILES = {'': 'FreeSerif', 'B': 'FreeSerifBold', 'I': 'FreeSerifItalic', 'BI': 'FreeSerifBoldItalic'}
+
+
+@lru_cache(maxsize=None)
+def load_font_metrics(style):
+    """Load the metrics of one FreeSerif style once per process."""
+    base_path = os.path.join(FONTS_DIR, PDF_FONT_FILES[style])
+    ttf_path = base_path + '.ttf'
+    if os.path.exists(base_path + '.pkl'):
+        with open(base_path + '.pkl', 'rb') as f:
+            metrics = pickle.load(f)
+    else:
+        from fpdf.ttfonts import TTFontFile
+        ttf = TTFontFile()
+        ttf.getMetrics(ttf_path)
+        metrics = {
+            'name': ttf.fullName.replace(' ', '').replace('(', '').replace(')', ''),
+            'type': 'TTF',
+            'desc': {
+                'Ascent': int(round(ttf.ascent)), 'Descent': int(round(ttf.descent)),
+                'CapHeight': int(round(ttf.capHeight)), 'Flags': ttf.flags,
+                'FontBBox': "[%s %s %s %s]" % tuple(int(round(value)) for value in ttf.bbox),
+                'ItalicAngle': int(ttf.italicAngle), 'StemV': int(round(ttf.stemV)),
+                'MissingWidth': int(round(ttf.defaultWidth)),
+            },
+            'up': round(ttf.underlinePosition),
+            'ut': round(ttf.underlineThickness),
+            'originalsize': os.stat(ttf_path).st_size,
+            'cw': ttf.charWidths,
+        }
+    # The shipped pickles point at the original author's Windows checkout
+    metrics['ttffile'] = ttf_path
+    return metrics
+
+
+def pdf_text(text):
+    """Drop characters outside the Basic Multilingual Plane (emoji), which PyFPDF 1.7 cannot encode."""
+    return ''.join(char for char in text if ord(char) <= 0xFFFF).strip()
+
+
+@lru_cache(maxsize=None)
+def _pdf_class():
+    from fpdf import FPDF
+
+    class PDF(FPDF):
+        def set_font(self, family, style='', size=0):
+            # Register FreeSerif styles on first use from the preloaded metrics;
+            # styles never used are not embedded, and used ones only as glyph subsets
+            style = style.upper().replace('U', '')
+            fontkey = family.lower() + style
+            if family == PDF_FONT_FAMILY and fontkey not in self.fonts:
+                metrics = load_font_metrics(style)
+                self.fonts[fontkey] = {
+                    'i': len(self.fonts) + 1, 'type': 'TTF', 'name': metrics['name'], 'desc': metrics['desc'],
+                    'up': metrics['up'], 'ut': metrics['ut'], 'cw': metrics['cw'],
+                    'ttffile': metrics['ttffile'], 'fontkey': fontkey,
+                    'subset': list(range(0, 57 if hasattr(self, 'str_alias_nb_pages') else 32)),
+                    'unifilename': os.path.splitext(metrics['ttffile'])[0] + '.pkl',
+                }
+                self.font_files[fontkey] = {'length1': metrics['originalsize'], 'type': 'TTF', 'ttffile': metrics['ttffile']}
+            super().set_font(family, style, size)
+
+        def header(self):
+            self.set_font('FreeSerif', 'B', 12)
+            self.cell(0, 10, 'Summary Report', 0, 1, 'C')
+            self.ln(10)
+
+        def chapter_title(self, title):
+            self.set_font('FreeSerif', 'B', 12)
+            self.cell(0, 10, pdf_text(title), 0, 1, 'L')
+            self.ln(5)
+
+        def chapter_body(self, blocks):
+            for block in blocks:
+                if block['type'] == 'heading':
+                    self.set_font('FreeSerif', 'B', 12)
+                    self.multi_cell(0, 10, pdf_text(plain_text(block)))
+                elif block['type'] == 'bullet':
+                    self.set_font('FreeSerif', '', 12)
+                    self.multi_cell(0, 10, u'\u2022 ' + pdf_text(plain_text(block)))
+                else:
+                    self.set_font('FreeSerif', '', 12)
+                    self.multi_cell(0, 10, pdf_text(plain_text(block)))
+                self.ln(5)
+
+    return PDF
+
+
+# Function to generate PDF
+def generate_pdf(summary, title="Summary"):
+    pdf = _pdf_class()()
+    pdf.add_page()
+    pdf.chapter_title(title)
+    pdf.chapter_body(parse_summary(summary))
+
+    # Output PDF to a string
+    pdf_output = pdf.output(dest='S').encode('latin1')
+    return pdf_output
+
+# Function to generate DOCX
+def generate_doc(summary, title="Summary"):
+    from docx import Document
+    doc = Document()
+    doc.add_heading(title, 0)
+
+    for block in parse_summary(summary):
+        if block['type'] == 'heading':
+            doc.add_heading(plain_text(block), level=min(block['level'], 9))
+            continue
+        paragraph = doc.add_paragraph(style='List Bullet' if block['type'] == 'bullet' else None)
+        for text, bold in block['runs']:
+            paragraph.add_run(text).bold = bold
+
+    with BytesIO() as doc_output:
+        doc.save(doc_output)
+        doc_output.seek(0)
+        return doc_output.read()
+
+# Function to generate Markdown
+def generate_markdown(summary, title="Summary"):
+    output = f"# {title}"
+    previous = 'heading'
+    for block in parse_summary(summary):
+        text = ''.join(f"**{text}**" if bold else text for text, bold in block['runs'])
+        if block['type'] == 'heading':
+            text = f"{'#' * min(block['level'] + 1, 6)} {text}"
+        elif block['type'] == 'bullet':
+            text = f"- {text}"
+        # Consecutive bullets form one list; everything else is separated by a blank line
+        output += ('\n' if block['type'] == previous == 'bullet' else '\n\n') + text
+        previous = block['type']
+    return (output + '\n').encode('utf-8')
+
+# Function to generate HTML
+def generate_html(summary, title="Summary"):
+    parts = [f"<!DOCTYPE html>\n<html>\n<head><meta charset=\"utf-8\"><title>{html.escape(title)}</title></head>\n<body>",
+             f"<h1>{html.escape(title)}</h1>"]
+    in_list = False
+    for block in parse_summary(summary):
+        text = ''.join(f"<strong>{html.escape(text)}</strong>" if bold else html.escape(text)
+                       for text, bold in block['runs'])
+        if block['type'] == 'bullet' and not in_list:
+            parts.append("<ul>")
+        elif block['type'] != 'bullet' and in_list:
+            parts.append("</ul>")
+        in_list = block['type'] == 'bullet'
+        if block['type'] == 'heading':
+            level = min(block['level'] + 1, 6)
+            parts.append(f"<h{level}>{text}</h{level}>")
+        elif block['type'] == 'bullet':
+            parts.append(f"<li>{text}</li>")
+        else:
+            parts.append(f"<p>{text}</p>")
+    if in_list:
+        parts.append("</ul>")
+    parts.append("</body>\n</html>\n")
+    return '\n'.join(parts).encode('utf-8')
+
+# Function to generate JSON
+def generate_json(summary, title="Summary"):
+    blocks = [{'type': block['type'], 'level': block['level'], 'text': plain_text(block),
+               'runs': [{'text': text, 'bold': bold} for text, bold in block['runs']]}
+              for block in parse_summary(summary)]
+    return json.dumps({'title': title, 'blocks': blocks}, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+_GENERATORS = {
+    'PDF': generate_pdf,
+    'DOCX': generate_doc,
+    'Markdown': generate_markdown,
+    'HTML': generate_html,
+    'JSON': generate_json,
+}
+
+
+@lru_cache(maxsize=32)
+def export_summary(summary, export_format, title="Summary"):
+    """Render the summary in one format; repeated requests reuse the result."""
+    return _GENERATORS[export_format](summary, title)
@@ -10,7 +10,7 @@ sleep 2
 echo "Starting initial cookie update..."
 
 # Führe update_cookies.py aus und zeige die Ausgabe live an
-unbuffer python3 /app/update_cookies.py 2>&1 | tee -a /app/logs/initial_cookie_update.log | while IFS= read -r line; do
+unbuffer python3 /app/update_cookies.py --if-needed 2>&1 | tee -a /app/logs/initial_cookie_update.log | while IFS= read -r line; do
     echo "[$(date '+%Y-%m-%d %H:%M:%S')] $line"
 done
 
@@ -0,0 +1,422 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from functools import lru_cache
+
+from sqlite_cache import _Transaction, get_cache_dir
+
+# Worker threads started inside the Streamlit process; 0 leaves the queue to `python worker.py`
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))
+
+# Port of the local job HTTP API (disabled when unset); listens on localhost unless JOB_API_HOST is set
+JOB_API_PORT = os.getenv('JOB_API_PORT')
+JOB_API_HOST = os.getenv('JOB_API_HOST', '127.0.0.1')
+
+# A running job whose worker has not sent a heartbeat for this long is handed to another worker
+JOB_LEASE_SECONDS = float(os.getenv('JOB_LEASE_SECONDS', 60))
+
+# Finished jobs are reused for identical requests this long, and deleted after JOB_RETENTION_SECONDS
+JOB_RESULT_TTL = float(os.getenv('JOB_RESULT_TTL', 10 * 60))
+JOB_RETENTION_SECONDS = float(os.getenv('JOB_RETENTION_SECONDS', 7 * 24 * 60 * 60))
+
+JOB_MAX_ATTEMPTS = 3
+JOB_POLL_INTERVAL = 0.5
+
+# JobContext.check() reads the job's status at most this often
+JOB_CHECK_INTERVAL = 1.0
+
+FINISHED_STATUSES = ('done', 'failed', 'cancelled')
+
+
+class JobCancelled(Exception):
+    """The job was cancelled while a worker was running it."""
+
+
+class JobQueue:
+    """Persistent job queue shared by every Streamlit session and worker process.
+
+    Jobs live in one SQLite table. Submitting a job whose key matches a
+    queued, running or recently finished job returns that job instead, so
+    identical requests are computed once. Workers claim the oldest queued
+    job, report progress (which doubles as a heartbeat) and store the result
+    or error; jobs of workers that stopped sending heartbeats are requeued.
+    """
+
+    def __init__(self, path=None, lease_seconds=JOB_LEASE_SECONDS, result_ttl=JOB_RESULT_TTL):
+        self.path = path or os.path.join(get_cache_dir(), 'jobs.sqlite3')
+        self.lease_seconds = lease_seconds
+        self.result_ttl = result_ttl
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    key TEXT,
+                    params TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    progress TEXT,
+                    result TEXT,
+                    error TEXT,
+                    watchers INTEGER NOT NULL DEFAULT 1,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    worker TEXT,
+                    created REAL NOT NULL,
+                    started REAL,
+                    finished REAL,
+                    heartbeat REAL
+                )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created)")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_key ON jobs (key, created)")
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return _Transaction(conn)
+
+    @staticmethod
+    def _to_dict(row):
+        job = dict(row)
+        for field in ('params', 'progress', 'result'):
+            if job[field] is not None:
+                job[field] = json.loads(job[field])
+        return job
+
+    def submit(self, kind, params, key=None):
+        """Queue a job and return its ID, or the ID of an identical job already queued or done."""
+        now = time.time()
+        with self._connect() as conn:
+            if key is not None:
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE kind = ? AND key = ? AND "
+                    "(status IN ('queued', 'running') OR (status = 'done' AND finished > ?)) "
+                    "ORDER BY created DESC LIMIT 1", (kind, key, now - self.result_ttl)).fetchone()
+                if row is not None:
+                    conn.execute("UPDATE jobs SET watchers = watchers + 1 WHERE id = ?", (row['id'],))
+                    return row['id']
+            job_id = uuid.uuid4().hex[:16]
+            conn.execute(
+                "INSERT INTO jobs (id, kind, key, params, status, created) VALUES (?, ?, ?, ?, 'queued', ?)",
+                (job_id, kind, key, json.dumps(params, ensure_ascii=False), now))
+            return job_id
+
+    def get(self, job_id):
+        """Return the job as a dict, or None if it does not exist."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row is not None else None
+
+    def list(self, status=None, limit=50):
+        """Return the most recent jobs (without results), optionally filtered by status."""
+        query = "SELECT id, kind, key, status, error, attempts, worker, created, started, finished FROM jobs"
+        args = ()
+        if status:
+            query += " WHERE status = ?"
+            args = (status,)
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY created DESC LIMIT ?", args + (limit,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def claim(self, worker_id, kinds):
+        """Mark the oldest queued job of the given kinds as running and return it."""
+        now = time.time()
+        placeholders = ','.join('?' * len(kinds))
+        with self._connect() as conn:
+            # Hand jobs of crashed workers to someone else, or give up on them
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'Worker stopped responding', finished = ? "
+                "WHERE status = 'running' AND heartbeat < ? AND attempts >= ?",
+                (now, now - self.lease_seconds, JOB_MAX_ATTEMPTS))
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', worker = NULL WHERE status = 'running' AND heartbeat < ?",
+                (now - self.lease_seconds,))
+            row = conn.execute(
+                f"SELECT * FROM jobs WHERE status = 'queued' AND kind IN ({placeholders}) "
+                "ORDER BY created LIMIT 1", tuple(kinds)).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, attempts = attempts + 1, "
+                "started = ?, heartbeat = ? WHERE id = ?", (worker_id, now, now, row['id']))
+        job = self._to_dict(row)
+        job.update(status='running', worker=worker_id, attempts=job['attempts'] + 1)
+        return job
+
+    def heartbeat(self, job_id, worker_id, progress=None):
+        """Refresh the job's lease (and progress); raise JobCancelled if it was cancelled."""
+        with self._connect() as conn:
+            if progress is None:
+                cursor = conn.execute(
+                    "UPDATE jobs SET heartbeat = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                    (time.time(), job_id, worker_id))
+            else:
+                cursor = conn.execute(
+                    "UPDATE jobs SET heartbeat = ?, progress = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                    (time.time(), json.dumps(progress, ensure_ascii=False), job_id, worker_id))
+        if cursor.rowcount == 0:
+            raise JobCancelled(job_id)
+
+    def is_running(self, job_id, worker_id):
+        """Return True while the job is running on this worker (not cancelled or handed to another)."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT 1 FROM jobs WHERE id = ? AND worker = ? AND status = 'running'",
+                               (job_id, worker_id)).fetchone()
+        return row is not None
+
+    def finish(self, job_id, worker_id, result=None, error=None):
+        """Store the result (or error) of a running job."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished = ? "
+                "WHERE id = ? AND worker = ? AND status = 'running'",
+                ('failed' if error else 'done', json.dumps(result, ensure_ascii=False) if result is not None else None,
+                 error, time.time(), job_id, worker_id))
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job; return False if it had already finished."""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished = ? WHERE id = ? AND status IN ('queued', 'running')",
+                (time.time(), job_id))
+        return cursor.rowcount > 0
+
+    def release(self, job_id):
+        """Stop waiting for a job; it is cancelled once nobody else waits for it."""
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET watchers = watchers - 1 WHERE id = ? AND watchers > 0", (job_id,))
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished = ? "
+                "WHERE id = ? AND watchers = 0 AND status IN ('queued', 'running')", (time.time(), job_id))
+        return cursor.rowcount > 0
+
+    def purge(self, max_age=JOB_RETENTION_SECONDS):
+        """Delete finished jobs older than max_age seconds."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM jobs WHERE status IN ('done', 'failed', 'cancelled') AND finished < ?",
+                         (time.time() - max_age,))
+
+    def stats(self):
+        with self._connect() as conn:
+            return dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+
+class JobContext:
+    """Handed to a job handler to report progress and notice cancellation."""
+
+    def __init__(self, job_queue, job, worker_id):
+        self.job_queue = job_queue
+        self.job = job
+        self.worker_id = worker_id
+        self.cancelled = threading.Event()
+        self._checked = time.monotonic()
+        self._check_lock = threading.Lock()
+
+    def report(self, progress):
+        """Publish progress; raises JobCancelled if the job was cancelled meanwhile."""
+        try:
+            self.job_queue.heartbeat(self.job['id'], self.worker_id, progress)
+        except JobCancelled:
+            self.cancelled.set()
+            raise
+
+    def check(self):
+        """Raise JobCancelled if the job was cancelled, reading its status at most every JOB_CHECK_INTERVAL."""
+        with self._check_lock:
+            due = not self.cancelled.is_set() and time.monotonic() - self._checked >= JOB_CHECK_INTERVAL
+            if due:
+                self._checked = time.monotonic()
+        if due and not self.job_queue.is_running(self.job['id'], self.worker_id):
+            self.cancelled.set()
+        if self.cancelled.is_set():
+            raise JobCancelled(self.job['id'])
+
+
+class WorkerPool:
+    """Threads that claim jobs from the queue and run the matching handler.
+
+    handlers maps a job kind to a function(params, context) returning a
+    JSON-serializable result. Exceptions become the job's error message.
+    """
+
+    def __init__(self, job_queue, handlers, workers=JOB_WORKERS, poll_interval=JOB_POLL_INTERVAL):
+        self.job_queue = job_queue
+        self.handlers = handlers
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        self.job_queue.purge()
+        for i in range(self.workers):
+            worker_id = f'{socket.gethostname()}:{os.getpid()}:{i}'
+            thread = threading.Thread(target=self._run, args=(worker_id,), name=f'job-worker-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _run(self, worker_id):
+        while not self._stop.is_set():
+            try:
+                job = self.job_queue.claim(worker_id, list(self.handlers))
+            except sqlite3.OperationalError as e:
+                print(f"Error claiming job: {str(e)}")
+                job = None
+            if job is None:
+                self._stop.wait(self.poll_interval)
+                continue
+            self.run_job(job, worker_id)
+
+    def run_job(self, job, worker_id):
+        context = JobContext(self.job_queue, job, worker_id)
+        # Keep the lease alive during long API calls that report no progress
+        beating = threading.Event()
+
+        def keep_alive():
+            while not beating.wait(self.job_queue.lease_seconds / 3):
+                try:
+                    self.job_queue.heartbeat(job['id'], worker_id)
+                except JobCancelled:
+                    context.cancelled.set()
+                    return
+
+        threading.Thread(target=keep_alive, daemon=True).start()
+        try:
+            result = self.handlers[job['kind']](job['params'], context)
+        except JobCancelled:
+            print(f"Job {job['id']} was cancelled")
+        except Exception as e:
+            print(f"Job {job['id']} failed: {str(e)}")
+            self.job_queue.finish(job['id'], worker_id, error=str(e) or type(e).__name__)
+        else:
+            self.job_queue.finish(job['id'], worker_id, result=result)
+        finally:
+            beating.set()
+
+
+@lru_cache(maxsize=None)
+def get_job_queue():
+    """Return the process-wide job queue."""
+    return JobQueue()
+
+
+def wait_for_job(job_queue, job_id, timeout=None, poll_interval=JOB_POLL_INTERVAL):
+    """Block until the job has finished and return it."""
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    while True:
+        job = job_queue.get(job_id)
+        if job is None or job['status'] in FINISHED_STATUSES:
+            return job
+        if deadline is not None and time.monotonic() >= deadline:
+            return job
+        time.sleep(poll_interval)
+
+
+@lru_cache(maxsize=None)
+def start_job_api(prepare, port=None, host=JOB_API_HOST):
+    """Serve the job queue over HTTP on JOB_API_PORT from a daemon thread (once per process).
+
+    prepare(kind, body) validates a submitted request body and returns the
+    job's (params, key); it raises ValueError for bad requests.
+
+        POST   /jobs             submit {"kind": "summary", ...}; returns {"id", "status"}
+        GET    /jobs             recent jobs, ?status= filters
+        GET    /jobs/<id>        status and progress, plus the result once done
+        GET    /jobs/<id>/result the result (409 while the job is not done)
+        DELETE /jobs/<id>        cancel the job
+    """
+    port = port or JOB_API_PORT
+    if not port:
+        return None
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qs, urlparse
+
+    job_queue = get_job_queue()
+
+    class JobHandler(BaseHTTPRequestHandler):
+        def send_json(self, status, body):
+            data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def route(self):
+            url = urlparse(self.path)
+            parts = [part for part in url.path.split('/') if part]
+            if not parts or parts[0] != 'jobs' or len(parts) > 3:
+                return None, None, url
+            job_id = parts[1] if len(parts) > 1 else None
+            action = parts[2] if len(parts) > 2 else None
+            return job_id, action, url
+
+        def do_GET(self):
+            job_id, action, url = self.route()
+            if job_id is None:
+                if url.path.rstrip('/') != '/jobs':
+                    self.send_json(404, {'error': 'Not found'})
+                    return
+                status = parse_qs(url.query).get('status', [None])[0]
+                self.send_json(200, {'jobs': job_queue.list(status), 'counts': job_queue.stats()})
+                return
+            job = job_queue.get(job_id)
+            if job is None or action not in (None, 'result'):
+                self.send_json(404, {'error': 'Not found'})
+            elif action == 'result':
+                if job['status'] == 'done':
+                    self.send_json(200, job['result'])
+                else:
+                    self.send_json(409, {'id': job_id, 'status': job['status'], 'error': job['error']})
+            else:
+                self.send_json(200, job)
+
+        def do_POST(self):
+            if self.route()[2].path.rstrip('/') != '/jobs':
+                self.send_json(404, {'error': 'Not found'})
+                return
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                if not isinstance(body, dict):
+                    raise ValueError('The request body must be a JSON object.')
+                kind = body.pop('kind', 'summary')
+                params, key = prepare(kind, body)
+            except ValueError as e:
+                self.send_json(400, {'error': str(e)})
+                return
+            job_id = job_queue.submit(kind, params, key)
+            self.send_json(202, {'id': job_id, 'status': job_queue.get(job_id)['status']})
+
+        def do_DELETE(self):
+            job_id, action, _ = self.route()
+            if job_id is None or action is not None or job_queue.get(job_id) is None:
+                self.send_json(404, {'error': 'Not found'})
+                return
+            cancelled = job_queue.cancel(job_id)
+            self.send_json(200, {'id': job_id, 'cancelled': cancelled})
+
+        def log_message(self, format, *args):
+            pass  # Status polling is not worth a log line each
+
+    try:
+        server = ThreadingHTTPServer((host, int(port)), JobHandler)
+    except OSError as e:
+        # Another Streamlit or worker process already serves the port
+        print(f"Job API not started on port {port}: {str(e)}")
+        return None
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,159 @@
+import io
+import re
+from collections import Counter
+
+import numpy as np
+
+from transcript_cache import get_transcript_cache
+
+# Transcript windows the key points are matched against
+WINDOW_SECONDS = 20
+STRIDE_SECONDS = 10
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_WORD_PATTERN = re.compile(r'\w+')
+_CJK_PATTERN = re.compile(r'[぀-ヿ㐀-䶿一-鿿가-힯]')
+
+
+def tokenize(text):
+    """Lowercase word tokens; runs of CJK characters become character bigrams."""
+    tokens = []
+    for word in _WORD_PATTERN.findall(text.lower()):
+        if _CJK_PATTERN.search(word) and len(word) > 1:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            tokens.append(word)
+    return tokens
+
+
+class KeyPointIndex:
+    """BM25 index over overlapping time windows of one transcript.
+
+    Postings are stored term-major in CSR form (indptr, window ids, term
+    frequencies), so scoring a query is a handful of NumPy gathers and one
+    scatter-add over the windows that contain its terms.
+    """
+
+    def __init__(self, vocabulary, indptr, windows, term_freqs, window_lengths, window_starts, window_ends):
+        self.vocabulary = vocabulary
+        self.term_ids = {term: i for i, term in enumerate(vocabulary)}
+        self.indptr = indptr
+        self.windows = windows
+        self.term_freqs = term_freqs
+        self.window_lengths = window_lengths
+        self.window_starts = window_starts
+        self.window_ends = window_ends
+
+    @classmethod
+    def build(cls, segments, window_seconds=WINDOW_SECONDS, stride_seconds=STRIDE_SECONDS):
+        """Index a TranscriptSegments in windows of window_seconds every stride_seconds."""
+        term_ids = {}
+        rows, cols, counts, lengths, starts, ends = [], [], [], [], [], []
+        start = 0.0
+        duration = segments.duration
+        while start < duration or not starts:
+            end = min(start + window_seconds, duration)
+            tokens = tokenize(segments.text_between(start, end))
+            window = len(starts)
+            for term, count in Counter(tokens).items():
+                rows.append(term_ids.setdefault(term, len(term_ids)))
+                cols.append(window)
+                counts.append(count)
+            lengths.append(len(tokens))
+            starts.append(start)
+            ends.append(end)
+            start += stride_seconds
+
+        rows = np.asarray(rows, dtype=np.int64)
+        order = np.argsort(rows, kind='stable')
+        indptr = np.zeros(len(term_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(term_ids)), out=indptr[1:])
+        vocabulary = [None] * len(term_ids)
+        for term, i in term_ids.items():
+            vocabulary[i] = term
+        return cls(
+            vocabulary,
+            indptr,
+            np.asarray(cols, dtype=np.int32)[order],
+            np.asarray(counts, dtype=np.float32)[order],
+            np.asarray(lengths, dtype=np.float32),
+            np.asarray(starts, dtype=np.float64),
+            np.asarray(ends, dtype=np.float64),
+        )
+
+    def scores(self, query):
+        """Return the BM25 score of every window for a query string."""
+        scores = np.zeros(len(self.window_starts), dtype=np.float32)
+        ids = [self.term_ids[term] for term in set(tokenize(query)) if term in self.term_ids]
+        if not ids:
+            return scores
+        ids = np.asarray(ids, dtype=np.int64)
+        begins, finishes = self.indptr[ids], self.indptr[ids + 1]
+        document_freqs = finishes - begins
+        total = len(self.window_starts)
+        idf = np.log1p((total - document_freqs + 0.5) / (document_freqs + 0.5)).astype(np.float32)
+
+        # Gather every posting of the query terms at once
+        positions = np.concatenate([np.arange(b, f) for b, f in zip(begins, finishes)])
+        windows = self.windows[positions]
+        term_freqs = self.term_freqs[positions]
+        average_length = max(float(self.window_lengths.mean()), 1.0)
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self.window_lengths[windows] / average_length)
+        weights = np.repeat(idf, document_freqs) * term_freqs * (BM25_K1 + 1) / (term_freqs + norm)
+        np.add.at(scores, windows, weights)
+        return scores
+
+    def locate(self, query):
+        """Return the (start_ms, end_ms) window best matching query, or None."""
+        scores = self.scores(query)
+        if not len(scores) or scores.max() <= 0:
+            return None
+        best = int(scores.argmax())
+        return int(self.window_starts[best] * 1000), int(self.window_ends[best] * 1000)
+
+    def to_bytes(self):
+        buffer = io.BytesIO()
+        np.savez_compressed(
+            buffer,
+            vocabulary=np.asarray(self.vocabulary, dtype=str),
+            indptr=self.indptr,
+            windows=self.windows,
+            term_freqs=self.term_freqs,
+            window_lengths=self.window_lengths,
+            window_starts=self.window_starts,
+            window_ends=self.window_ends,
+        )
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data):
+        with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+            return cls(
+                arrays['vocabulary'].tolist(),
+                arrays['indptr'],
+                arrays['windows'],
+                arrays['term_freqs'],
+                arrays['window_lengths'],
+                arrays['window_starts'],
+                arrays['window_ends'],
+            )
+
+
+def get_key_point_index(video_id, language_code, segments):
+    """Return the transcript's index, building and caching it on first use."""
+    transcript_cache = get_transcript_cache()
+    data = transcript_cache.get_index(video_id, language_code)
+    if data is not None:
+        return KeyPointIndex.from_bytes(data)
+    index = KeyPointIndex.build(segments)
+    transcript_cache.set_index(video_id, language_code, index.to_bytes())
+    return index
+
+
+def locate_key_points(video_id, language_code, segments, key_points):
+    """Map each key point to its best matching (start_ms, end_ms) window, or None."""
+    index = get_key_point_index(video_id, language_code, segments)
+    return [index.locate(point) for point in key_points]
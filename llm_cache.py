@@ -0,0 +1,64 @@
+import hashlib
+import json
+import os
+from functools import lru_cache
+
+from sqlite_cache import SQLiteCache, get_cache_dir
+
+
+def cache_disabled():
+    """Return True when the LLM_CACHE_DISABLED switch is set."""
+    return os.getenv('LLM_CACHE_DISABLED', '').lower() in ('1', 'true', 'yes')
+
+
+class LLMCache:
+    """Content-addressed store of chat completion responses."""
+
+    def __init__(self, path=None, ttl=None, max_bytes=None):
+        if path is None:
+            path = os.path.join(get_cache_dir(), 'llm_responses.sqlite3')
+        if ttl is None:
+            ttl = float(os.getenv('LLM_CACHE_TTL', 30 * 24 * 60 * 60))
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv('LLM_CACHE_MAX_MB', 500)) * 1024 * 1024)
+        self.store = SQLiteCache(path, ttl=ttl, max_bytes=max_bytes)
+
+    @staticmethod
+    def make_key(model_name, system_prompt, user_prompt, temperature, max_tokens):
+        """Hash every field that influences the response into a cache key."""
+        payload = json.dumps(
+            [model_name, system_prompt, user_prompt, temperature, max_tokens],
+            ensure_ascii=False, separators=(',', ':'))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def make_sections_key(model_name, prompt_templates, transcript):
+        """Hash the model, map/merge prompt templates and transcript into a section summaries key."""
+        payload = json.dumps(
+            ['sections', model_name, prompt_templates, transcript],
+            ensure_ascii=False, separators=(',', ':'))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        value = self.store.get(key)
+        return value.decode('utf-8') if value is not None else None
+
+    def set(self, key, content):
+        self.store.set(key, content)
+
+    def get_sections(self, key):
+        """Return the cached section summaries of a transcript, or None."""
+        value = self.get(key)
+        return json.loads(value) if value is not None else None
+
+    def set_sections(self, key, summaries):
+        self.set(key, json.dumps(summaries, ensure_ascii=False))
+
+    def stats(self):
+        return self.store.stats()
+
+
+@lru_cache(maxsize=None)
+def get_llm_cache():
+    """Return the process-wide LLM response cache."""
+    return LLMCache()
@@ -0,0 +1,110 @@
+import glob
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlite_cache import get_cache_dir
+
+# yt-dlp format selectors, keyed by the name used in the media cache
+MEDIA_FORMATS = {
+    'video': 'bestaudio+bvideo',
+    'audio': 'bestaudio/best',
+}
+
+# Above this share of the video, one full download is cheaper than many sections
+FULL_DOWNLOAD_THRESHOLD = 0.5
+
+
+def get_media_dir(video_id):
+    """Return the media cache directory for one video."""
+    media_dir = os.path.join(get_cache_dir(), 'media', video_id)
+    os.makedirs(media_dir, exist_ok=True)
+    return media_dir
+
+
+def find_cached_media(media_dir, stem):
+    """Return a finished download named stem.<ext> in media_dir, if any."""
+    for path in glob.glob(os.path.join(glob.escape(media_dir), glob.escape(stem) + '.*')):
+        if not path.endswith(('.part', '.ytdl', '.temp')):
+            return path
+    return None
+
+
+def fetch_video_info(url, cookies_path=None):
+    """Return yt-dlp metadata (duration, formats, ...) without downloading."""
+    import yt_dlp
+    ydl_opts = {'quiet': True, 'skip_download': True}
+    if cookies_path:
+        ydl_opts['cookiefile'] = cookies_path
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        return ydl.extract_info(url, download=False)
+
+
+def download_media(url, video_id, format_key='video', cookies_path=None, section=None):
+    """Download (or reuse) one format of a video, optionally only a time section."""
+    import yt_dlp
+    media_dir = get_media_dir(video_id)
+    stem = format_key if section is None else f"{format_key}_{section[0]:.2f}-{section[1]:.2f}"
+    cached = find_cached_media(media_dir, stem)
+    if cached:
+        return cached
+
+    ydl_opts = {
+        'format': MEDIA_FORMATS[format_key],
+        'outtmpl': os.path.join(media_dir, stem + '.%(ext)s'),
+        'quiet': False,  # Show progress during download
+    }
+    if section is not None:
+        # Only the requested byte ranges are fetched; cuts are snapped to keyframes
+        ydl_opts['download_ranges'] = yt_dlp.utils.download_range_func(None, [section])
+        ydl_opts['force_keyframes_at_cuts'] = True
+    if cookies_path:
+        ydl_opts['cookiefile'] = cookies_path
+
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        ydl.extract_info(url, download=True)
+    return find_cached_media(media_dir, stem)
+
+
+def download_youtube_video(url, video_id, cookies_path=None):
+    """Download YouTube video using yt_dlp, reusing the local media cache."""
+    try:
+        return download_media(url, video_id, 'video', cookies_path)
+    except Exception as e:
+        print(f"Error downloading the video: {str(e)}")
+        return None
+
+
+def download_audio(url, video_id, cookies_path=None):
+    """Download only the audio stream of a video, reusing the local media cache."""
+    try:
+        return download_media(url, video_id, 'audio', cookies_path)
+    except Exception as e:
+        print(f"Error downloading the audio: {str(e)}")
+        return None
+
+
+def plan_downloads(url, video_id, windows, total_duration, cookies_path=None, max_workers=4):
+    """Fetch the media needed for the given (start, end) windows.
+
+    Returns one (path, offset) pair per window, where offset is the position
+    of the file's first frame in the original video; path is None for a
+    section that could not be downloaded. Returns None if nothing was.
+    Small selections are downloaded as separate sections; larger ones fall
+    back to a single full download that every window shares.
+    """
+    covered = sum(end - start for start, end in windows)
+    try:
+        if total_duration and covered / total_duration >= FULL_DOWNLOAD_THRESHOLD:
+            video_path = download_media(url, video_id, 'video', cookies_path)
+            return [(video_path, 0.0) for _ in windows] if video_path else None
+
+        def download(window):
+            return download_media(url, video_id, 'video', cookies_path, section=window), window[0]
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            sources = list(executor.map(download, windows))
+        # Windows whose section yt-dlp did not produce keep a None path and are skipped
+        return sources if any(path for path, _ in sources) else None
+    except Exception as e:
+        print(f"Error downloading the video: {str(e)}")
+        return None
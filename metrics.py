@@ -0,0 +1,258 @@
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from functools import lru_cache
+
+# Histogram buckets in seconds, from a cache hit to a 10-hour transcript
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+# JSON lines go to METRICS_LOG (a file path) or, if unset, to stdout
+METRICS_LOG = os.getenv('METRICS_LOG')
+# Prometheus text file rewritten after every job, e.g. for node_exporter's textfile collector
+METRICS_FILE = os.getenv('METRICS_FILE')
+# Port for a /metrics HTTP endpoint (disabled when unset)
+METRICS_PORT = os.getenv('METRICS_PORT')
+
+METRIC_HELP = {
+    'ytsum_jobs_total': ('counter', 'Summary jobs by status'),
+    'ytsum_job_seconds': ('histogram', 'End-to-end job latency'),
+    'ytsum_stage_seconds': ('histogram', 'Latency of each pipeline stage'),
+    'ytsum_llm_requests_total': ('counter', 'Groq API calls by model and outcome'),
+    'ytsum_llm_request_seconds': ('histogram', 'Groq API call latency, excluding scheduler waits'),
+    'ytsum_llm_tokens_total': ('counter', 'Tokens reported by Groq, by model and kind'),
+    'ytsum_llm_retries_total': ('counter', 'Groq calls retried after a rate limit'),
+    'ytsum_rate_limit_wait_seconds': ('histogram', 'Time spent waiting in the rate limit scheduler'),
+    'ytsum_rate_limit_penalty_seconds_total': ('counter', 'Pauses imposed after rate limit errors'),
+    'ytsum_cache_requests_total': ('counter', 'Cache lookups by cache and result'),
+    'ytsum_transcript_tokens_total': ('counter', 'Estimated transcript tokens before and after cleanup and reduction'),
+}
+
+_current_job = contextvars.ContextVar('metrics_job', default=None)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in labels) + '}'
+
+
+class Metrics:
+    """Thread-safe counters and histograms rendered in Prometheus text format."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._log_lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {'buckets': [0] * len(self.buckets), 'count': 0, 'sum': 0.0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram['buckets'][i] += 1
+            histogram['count'] += 1
+            histogram['sum'] += value
+
+    def render(self):
+        """Return all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, dict(value, buckets=list(value['buckets']))) for key, value in self._histograms.items())
+        lines = []
+        described = set()
+
+        def describe(name):
+            if name not in described and name in METRIC_HELP:
+                kind, help_text = METRIC_HELP[name]
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {kind}')
+            described.add(name)
+
+        for (name, labels), value in counters:
+            describe(name)
+            lines.append(f'{name}{_format_labels(labels)} {value}')
+        for (name, labels), histogram in histograms:
+            describe(name)
+            for bound, count in zip(self.buckets, histogram['buckets']):
+                lines.append(f'{name}_bucket{_format_labels(labels + (("le", bound),))} {count}')
+            lines.append(f'{name}_bucket{_format_labels(labels + (("le", "+Inf"),))} {histogram["count"]}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {histogram["sum"]:.6f}')
+            lines.append(f'{name}_count{_format_labels(labels)} {histogram["count"]}')
+        return '\n'.join(lines) + '\n'
+
+    def write_file(self, path):
+        """Atomically write the current metrics to a Prometheus text file."""
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        with open(temp_path, 'w') as f:
+            f.write(self.render())
+        os.replace(temp_path, path)
+
+    def log(self, event, **fields):
+        """Emit one structured JSON log line."""
+        job = _current_job.get()
+        record = {'ts': round(time.time(), 3), 'event': event}
+        if job is not None:
+            record['job_id'] = job['id']
+        record.update(fields)
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._log_lock:
+            if METRICS_LOG:
+                with open(METRICS_LOG, 'a', encoding='utf-8') as f:
+                    f.write(line + '\n')
+            else:
+                print(line)
+
+
+@lru_cache(maxsize=None)
+def get_metrics():
+    """Return the process-wide metrics registry."""
+    return Metrics()
+
+
+def inc(name, value=1, **labels):
+    get_metrics().inc(name, value, **labels)
+
+
+def observe(name, value, **labels):
+    get_metrics().observe(name, value, **labels)
+
+
+def log_event(event, **fields):
+    get_metrics().log(event, **fields)
+
+
+@contextmanager
+def job(kind, job_id=None, **fields):
+    """Trace one job; spans and API calls inside it are tagged with its ID."""
+    current = {'id': job_id or uuid.uuid4().hex[:12], 'kind': kind}
+    token = _current_job.set(current)
+    started = time.monotonic()
+    log_event('job_start', kind=kind, **fields)
+    try:
+        yield current
+    except BaseException:
+        current.setdefault('status', 'error')
+        raise
+    finally:
+        status = current.get('status', 'ok')
+        seconds = time.monotonic() - started
+        inc('ytsum_jobs_total', kind=kind, status=status)
+        observe('ytsum_job_seconds', seconds, kind=kind)
+        log_event('job_end', kind=kind, status=status, seconds=round(seconds, 3), **fields)
+        _current_job.reset(token)
+        if METRICS_FILE:
+            get_metrics().write_file(METRICS_FILE)
+
+
+def current_job():
+    """Return the job traced in this context, if any."""
+    return _current_job.get()
+
+
+@contextmanager
+def use_job(current):
+    """Attach work running in another thread or event loop to an existing job."""
+    token = _current_job.set(current)
+    try:
+        yield current
+    finally:
+        _current_job.reset(token)
+
+
+@contextmanager
+def span(stage, **fields):
+    """Time one pipeline stage and log it when it ends."""
+    started = time.monotonic()
+    status = 'error'
+    try:
+        yield fields
+        status = 'ok'
+    finally:
+        seconds = time.monotonic() - started
+        observe('ytsum_stage_seconds', seconds, stage=stage)
+        log_event('span', stage=stage, status=status, seconds=round(seconds, 3), **fields)
+
+
+def record_cache_lookup(cache, hit):
+    inc('ytsum_cache_requests_total', cache=cache, result='hit' if hit else 'miss')
+
+
+def record_transcript_tokens(stats):
+    """Record the token savings of transcript preprocessing for one video."""
+    for stage in ('raw', 'clean', 'final'):
+        inc('ytsum_transcript_tokens_total', stats[f'{stage}_tokens'], stage=stage)
+    log_event('transcript_preprocessed', **stats)
+
+
+def record_llm_call(model, outcome, seconds, waited, usage=None, stream=False, error=None):
+    """Record one Groq API call: latency, scheduler wait and token usage."""
+    inc('ytsum_llm_requests_total', model=model, outcome=outcome)
+    observe('ytsum_rate_limit_wait_seconds', waited, model=model)
+    fields = {}
+    if outcome == 'ok':
+        observe('ytsum_llm_request_seconds', seconds, model=model, stream=str(stream).lower())
+    if usage is not None:
+        inc('ytsum_llm_tokens_total', usage.prompt_tokens, model=model, kind='prompt')
+        inc('ytsum_llm_tokens_total', usage.completion_tokens, model=model, kind='completion')
+        fields = {'prompt_tokens': usage.prompt_tokens, 'completion_tokens': usage.completion_tokens}
+    if error is not None:
+        fields['error'] = str(error)
+    log_event('llm_call', model=model, outcome=outcome, stream=stream,
+              seconds=round(seconds, 3), waited=round(waited, 3), **fields)
+
+
+def record_rate_limit(model, wait_time):
+    """Record a rate limit error and the pause it caused."""
+    inc('ytsum_llm_retries_total', model=model)
+    inc('ytsum_rate_limit_penalty_seconds_total', wait_time, model=model)
+
+
+@lru_cache(maxsize=None)
+def start_metrics_server(port=None):
+    """Serve /metrics on METRICS_PORT from a daemon thread (once per process)."""
+    port = port or METRICS_PORT
+    if not port:
+        return None
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = get_metrics().render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Scrapes are not worth a log line each
+
+    try:
+        server = ThreadingHTTPServer(('0.0.0.0', int(port)), MetricsHandler)
+    except OSError as e:
+        # Another Streamlit worker process already serves the port
+        print(f"Metrics endpoint not started on port {port}: {str(e)}")
+        return None
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
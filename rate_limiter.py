@@ -0,0 +1,281 @@
+import asyncio
+import heapq
+import itertools
+import os
+import random
+import re
+import threading
+import time
+from functools import lru_cache
+
+# Default per-model limits (requests and tokens per minute). The scheduler
+# replaces these with the real values as soon as Groq reports them in headers.
+DEFAULT_RATE_LIMITS = {
+    'llama-3.1-8b-instant': {'rpm': 30, 'tpm': 6000},
+    'llama-3.3-70b-versatile': {'rpm': 30, 'tpm': 6000},
+    'llama3-8b-8192': {'rpm': 30, 'tpm': 6000},
+    'llama3-70b-8192': {'rpm': 30, 'tpm': 6000},
+    'mixtral-8x7b-32768': {'rpm': 30, 'tpm': 5000},
+    'gemma2-9b-it': {'rpm': 30, 'tpm': 15000},
+    'whisper-large-v3-turbo': {'rpm': 20, 'tpm': 6000},
+    'whisper-large-v3': {'rpm': 20, 'tpm': 6000},
+}
+
+# Worker threads used for parallel API calls; the scheduler paces them
+MAX_CONCURRENT_REQUESTS = int(os.getenv('GROQ_MAX_CONCURRENCY', 8))
+
+# Completion tokens reserved per request until the real usage is known
+EXPECTED_COMPLETION_TOKENS = 1000
+
+# Request priorities, lower runs first
+PRIORITY_FINAL = 0
+PRIORITY_REDUCE = 5
+PRIORITY_MAP = 10
+
+_DURATION_PATTERN = re.compile(r"(?:(\d+)h)?(?:(\d+)m(?!s))?(?:(\d+(?:\.\d+)?)s)?(?:(\d+(?:\.\d+)?)ms)?")
+_RETRY_AFTER_PATTERN = re.compile(r"try again in ((?:\d+h)?(?:\d+m)?(?:\d+(?:\.\d+)?m?s))")
+
+
+def parse_duration(value):
+    """Parse durations such as '7.66s', '2m59.56s' or '120ms' into seconds."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    match = _DURATION_PATTERN.fullmatch(value)
+    if not match or not any(match.groups()):
+        return None
+    hours, minutes, seconds, milliseconds = match.groups()
+    return (int(hours or 0) * 3600 + int(minutes or 0) * 60
+            + float(seconds or 0) + float(milliseconds or 0) / 1000)
+
+
+def refill_window(limit, remaining, reset):
+    """Infer the window of a rate limit from its x-ratelimit-limit/remaining/reset values.
+
+    A bucket of limit requests refills linearly, so limit - remaining used
+    requests take reset seconds to come back. Returns None when nothing is
+    used yet or a value is missing.
+    """
+    if limit is None or remaining is None or reset is None or remaining >= limit:
+        return None
+    return reset * limit / (limit - remaining)
+
+
+def parse_retry_after(error):
+    """Return the wait time in seconds requested by a rate-limit error, if any."""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if headers is not None:
+        wait_time = parse_duration(headers.get('retry-after'))
+        if wait_time is not None:
+            return wait_time
+    match = _RETRY_AFTER_PATTERN.search(str(error))
+    if match:
+        return parse_duration(match.group(1))
+    return None
+
+
+def _header_int(headers, name):
+    value = headers.get(name)
+    return int(value) if value and value.isdigit() else None
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously over one minute."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.capacity / 60.0)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """Seconds until amount is available (amounts above capacity wait for a full bucket)."""
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.tokens
+        return max(0.0, missing * 60.0 / self.capacity)
+
+    def consume(self, amount, now):
+        self._refill(now)
+        self.tokens -= amount
+
+    def set_capacity(self, per_minute, now):
+        self._refill(now)
+        self.capacity = float(per_minute)
+        self.tokens = min(self.tokens, self.capacity)
+
+    def limit_remaining(self, remaining, now):
+        """Trust the server if it reports fewer tokens left than we think we have."""
+        self._refill(now)
+        self.tokens = min(self.tokens, float(remaining))
+
+    def drain(self, now):
+        self._refill(now)
+        self.tokens = min(self.tokens, 0.0)
+
+
+class _ModelState:
+    def __init__(self, limits):
+        self.requests = TokenBucket(limits['rpm'])
+        self.tokens = TokenBucket(limits['tpm'])
+        self.blocked_until = 0.0
+        self.waiters = []
+
+
+class RateLimitScheduler:
+    """Process-wide scheduler keeping Groq calls under per-model RPM/TPM budgets.
+
+    Callers block in acquire() until their request fits into both buckets and
+    no higher-priority request for the same model is waiting. Rate-limit
+    headers and errors feed back into the buckets so all threads slow down
+    together instead of bursting and sleeping in lockstep.
+    """
+
+    def __init__(self, limits=None, jitter=0.25):
+        self.limits = dict(DEFAULT_RATE_LIMITS)
+        self.limits.update(limits or {})
+        self.jitter = jitter
+        self._models = {}
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    def _state(self, model_name):
+        state = self._models.get(model_name)
+        if state is None:
+            limits = self.limits.get(model_name, {'rpm': 30, 'tpm': 6000})
+            limits = {
+                'rpm': int(os.getenv('GROQ_RPM', limits['rpm'])),
+                'tpm': int(os.getenv('GROQ_TPM', limits['tpm'])),
+            }
+            state = self._models[model_name] = _ModelState(limits)
+        return state
+
+    def _try_acquire(self, state, entry, tokens):
+        """Take a slot if entry is first in line; return the delay otherwise (None if not first)."""
+        if state.waiters[0] != entry:
+            return None
+        now = time.monotonic()
+        delay = max(
+            state.blocked_until - now,
+            state.requests.wait_time(1, now),
+            state.tokens.wait_time(tokens, now),
+        )
+        if delay <= 0:
+            state.requests.consume(1, now)
+            state.tokens.consume(tokens, now)
+            return 0.0
+        return delay
+
+    def _enqueue(self, model_name, priority):
+        state = self._state(model_name)
+        entry = (priority, next(self._sequence))
+        heapq.heappush(state.waiters, entry)
+        return state, entry
+
+    def _dequeue(self, state, entry):
+        state.waiters.remove(entry)
+        heapq.heapify(state.waiters)
+        self._condition.notify_all()
+
+    def acquire(self, model_name, tokens, priority=PRIORITY_MAP):
+        """Block until a request of the given token size may be sent; return seconds waited."""
+        started = time.monotonic()
+        with self._condition:
+            state, entry = self._enqueue(model_name, priority)
+            try:
+                while True:
+                    delay = self._try_acquire(state, entry, tokens)
+                    if delay == 0:
+                        return time.monotonic() - started
+                    self._condition.wait(delay)
+            finally:
+                self._dequeue(state, entry)
+
+    async def acquire_async(self, model_name, tokens, priority=PRIORITY_MAP, poll_interval=0.25):
+        """Awaitable variant of acquire() that never blocks the event loop."""
+        started = time.monotonic()
+        with self._condition:
+            state, entry = self._enqueue(model_name, priority)
+        try:
+            while True:
+                with self._condition:
+                    delay = self._try_acquire(state, entry, tokens)
+                if delay == 0:
+                    return time.monotonic() - started
+                await asyncio.sleep(poll_interval if delay is None else min(delay, poll_interval * 4))
+        finally:
+            with self._condition:
+                self._dequeue(state, entry)
+
+    def token_limit(self, model_name):
+        """Return a model's tokens-per-minute budget, as reported by Groq once known."""
+        with self._condition:
+            return self._state(model_name).tokens.capacity
+
+    def record_usage(self, model_name, reserved_tokens, used_tokens):
+        """Correct the token bucket once the real usage of a request is known."""
+        if used_tokens is None:
+            return
+        with self._condition:
+            self._state(model_name).tokens.consume(used_tokens - reserved_tokens, time.monotonic())
+
+    def update_from_headers(self, model_name, headers):
+        """Learn the real request and token budgets from x-ratelimit-* response headers."""
+        if headers is None:
+            return
+        with self._condition:
+            state = self._state(model_name)
+            now = time.monotonic()
+            limit = _header_int(headers, 'x-ratelimit-limit-requests')
+            remaining = _header_int(headers, 'x-ratelimit-remaining-requests')
+            # Groq reports a per-day request budget here, other servers a per-minute one;
+            # only a budget that refills within about a minute becomes the RPM bucket
+            window = refill_window(limit, remaining, parse_duration(headers.get('x-ratelimit-reset-requests')))
+            if window is not None and window <= 90:
+                state.requests.set_capacity(limit, now)
+            if remaining is not None:
+                state.requests.limit_remaining(remaining, now)
+            limit = headers.get('x-ratelimit-limit-tokens')
+            if limit and limit.isdigit():
+                state.tokens.set_capacity(int(limit), now)
+            remaining = headers.get('x-ratelimit-remaining-tokens')
+            if remaining and remaining.isdigit():
+                state.tokens.limit_remaining(int(remaining), now)
+            self._condition.notify_all()
+
+    def penalize(self, model_name, wait_time):
+        """Pause every request for a model after the server reported a rate limit."""
+        with self._condition:
+            state = self._state(model_name)
+            now = time.monotonic()
+            state.blocked_until = max(state.blocked_until, now + wait_time + random.uniform(0, self.jitter * wait_time))
+            state.tokens.drain(now)
+            self._condition.notify_all()
+
+    def handle_error(self, model_name, error, attempt):
+        """Pause a model after a rate_limit_exceeded error and return the pause, or None for other errors."""
+        if "rate_limit_exceeded" not in str(error):
+            return None
+        wait_time = parse_retry_after(error)
+        if wait_time is None:
+            wait_time = self.backoff(attempt)
+        print(f"Rate limit reached. Pausing {model_name} requests for {wait_time:.1f} seconds...")
+        self.penalize(model_name, wait_time)
+        return wait_time
+
+    def backoff(self, attempt, base=2.0, cap=60.0):
+        """Exponential backoff with full jitter for errors without a retry hint."""
+        return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+@lru_cache(maxsize=None)
+def get_rate_limit_scheduler():
+    """Return the scheduler shared by every session in this process."""
+    return RateLimitScheduler()
@@ -0,0 +1,160 @@
+import json
+import math
+import os
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+FONTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'textFormat', 'freeserif')
+
+
+def probe_video(video_path):
+    """Return duration (seconds), width and height of a video using ffprobe."""
+    output = subprocess.run([
+        'ffprobe', '-v', 'error', '-select_streams', 'v:0',
+        '-show_entries', 'stream=width,height:format=duration', '-of', 'json', video_path
+    ], capture_output=True, text=True, check=True).stdout
+    info = json.loads(output)
+    stream = info['streams'][0]
+    return float(info['format']['duration']), int(stream['width']), int(stream['height'])
+
+
+def map_key_points_to_intervals(key_points, total_duration):
+    """Map key points to evenly distributed time intervals across the video duration."""
+    num_points = len(key_points)
+    interval_duration = total_duration / num_points  # Divide video into equal segments
+
+    intervals = []
+    for i in range(num_points):
+        start_time = i * interval_duration
+        end_time = min((i + 1) * interval_duration, total_duration)
+        intervals.append((start_time, end_time))
+
+    return intervals
+
+
+def format_ass_time(seconds):
+    """Format seconds as an ASS timestamp (H:MM:SS.cc)."""
+    centiseconds = int(round(max(seconds, 0) * 100))
+    hours, centiseconds = divmod(centiseconds, 360000)
+    minutes, centiseconds = divmod(centiseconds, 6000)
+    seconds, centiseconds = divmod(centiseconds, 100)
+    return f"{hours}:{minutes:02d}:{seconds:02d}.{centiseconds:02d}"
+
+
+def write_ass_subtitles(path, events, width, height):
+    """Write (start, end, text) events, relative to the reel start, as an ASS file."""
+    font_size = max(16, height // 18)
+    lines = [
+        "[Script Info]",
+        "ScriptType: v4.00+",
+        f"PlayResX: {width}",
+        f"PlayResY: {height}",
+        "WrapStyle: 0",
+        "",
+        "[V4+ Styles]",
+        "Format: Name, Fontname, Fontsize, PrimaryColour, OutlineColour, BackColour, Bold, Italic, "
+        "BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV",
+        f"Style: Default,FreeSerif,{font_size},&H00FFFFFF,&H00000000,&H80000000,0,0,1,2,1,2,20,20,30",
+        "",
+        "[Events]",
+        "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text",
+    ]
+    for start, end, text in events:
+        text = text.replace('\\', '\\\\').replace('{', '(').replace('}', ')').replace('\n', '\\N')
+        lines.append(f"Dialogue: 0,{format_ass_time(start)},{format_ass_time(end)},Default,,0,0,0,,{text}")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def escape_filter_path(path):
+    """Escape a path for use inside an ffmpeg filter argument."""
+    return path.replace('\\', '/').replace(':', '\\:').replace("'", "\\'")
+
+
+def render_reel(video_path, start_time, end_time, events, output_path, width, height, threads=0):
+    """Cut one reel, burn in its subtitles and keep the audio with a single ffmpeg run."""
+    with tempfile.TemporaryDirectory() as work_dir:
+        subtitles_path = os.path.join(work_dir, 'subtitles.ass')
+        write_ass_subtitles(subtitles_path, events, width, height)
+        subprocess.run([
+            'ffmpeg', '-y', '-v', 'error',
+            # Input seeking jumps to the nearest keyframe instead of decoding from the start
+            '-ss', f"{start_time:.3f}", '-t', f"{end_time - start_time:.3f}", '-i', video_path,
+            '-map', '0:v:0', '-map', '0:a:0?',
+            '-vf', f"ass='{escape_filter_path(subtitles_path)}':fontsdir='{escape_filter_path(FONTS_DIR)}'",
+            '-c:v', 'libx264', '-preset', 'veryfast', '-crf', '23', '-pix_fmt', 'yuv420p',
+            '-c:a', 'aac', '-b:a', '128k', '-movflags', '+faststart',
+            '-threads', str(threads), output_path
+        ], check=True)
+    return output_path
+
+
+def reel_subtitle_events(intervals, subtitles, start_time, end_time):
+    """Return the subtitles visible in a reel, shifted to start at zero."""
+    events = []
+    for (interval_start, interval_end), subtitle in zip(intervals, subtitles):
+        if interval_end > start_time and interval_start < end_time:
+            events.append((max(interval_start, start_time) - start_time,
+                           min(interval_end, end_time) - start_time,
+                           subtitle))
+    return events
+
+
+def plan_reel_windows(total_duration, reel_duration=60):
+    """Split the video into consecutive (start, end) reel windows."""
+    num_reels = math.ceil(total_duration / reel_duration)
+    return [(i * reel_duration, min((i + 1) * reel_duration, total_duration)) for i in range(num_reels)]
+
+
+def plan_key_point_windows(key_point_windows):
+    """Turn (start_ms, end_ms) key point windows into merged reel windows in seconds."""
+    spans = sorted((start / 1000, end / 1000) for start, end in key_point_windows)
+    windows = []
+    for start, end in spans:
+        if windows and start <= windows[-1][1]:
+            windows[-1] = (windows[-1][0], max(windows[-1][1], end))
+        else:
+            windows.append((start, end))
+    return windows
+
+
+def create_highlight_reels(sources, windows, key_points, subtitles, total_duration, output_dir='.', max_workers=None, intervals=None):
+    """Create video highlight reels with subtitles, rendering reels in parallel.
+
+    sources holds one (path, offset) pair per window: the downloaded file to
+    cut the reel from and the time in the original video its first frame
+    corresponds to (0 for a full download, the section start otherwise).
+    intervals gives each subtitle's (start, end) time; without it the key
+    points are spread evenly over the video. Windows without a source
+    path (failed downloads) are skipped.
+    """
+    available = [path for path, _ in sources if path]
+    if not windows or not available:
+        return []
+    _, width, height = probe_video(available[0])
+    if intervals is None:
+        intervals = map_key_points_to_intervals(key_points, total_duration) if key_points else []
+
+    cpu_count = os.cpu_count() or 1
+    workers = max(1, min(len(windows), max_workers or cpu_count))
+    threads_per_reel = max(1, cpu_count // workers)
+
+    def render(i):
+        start_time, end_time = windows[i]
+        source_path, offset = sources[i]
+        if source_path is None:
+            print(f"Skipping reel {i + 1}: its video section was not downloaded")
+            return None
+        output_path = os.path.join(output_dir, f'reel_{i + 1}.mp4')
+        events = reel_subtitle_events(intervals, subtitles, start_time, end_time)
+        try:
+            return render_reel(source_path, max(start_time - offset, 0), end_time - offset, events,
+                               output_path, width, height, threads_per_reel)
+        except subprocess.CalledProcessError as e:
+            print(f"Error rendering reel {i + 1}: {str(e)}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        reel_paths = list(executor.map(render, range(len(windows))))
+    return [path for path in reel_paths if path]
@@ -0,0 +1,107 @@
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from metrics import log_event
+
+# Seconds of transcript scored together in the sentiment timeline
+SENTIMENT_WINDOW_SECONDS = 30
+
+# Below this many windows, starting worker processes costs more than it saves
+PARALLEL_MIN_WINDOWS = int(os.getenv('SENTIMENT_PARALLEL_MIN_WINDOWS', 400))
+
+_SENTENCE_PATTERN = re.compile(r'(?<=[.!?。！？])\s+')
+
+
+@lru_cache(maxsize=None)
+def ensure_vader_lexicon():
+    """Make sure the VADER lexicon is available (normally installed at image build time)."""
+    import nltk
+    try:
+        nltk.data.find('sentiment/vader_lexicon.zip')
+    except LookupError:
+        nltk.download('vader_lexicon')
+
+
+@lru_cache(maxsize=None)
+def get_analyzer():
+    """Return this process's VADER analyzer; loading the lexicon is the slow part."""
+    ensure_vader_lexicon()
+    from nltk.sentiment.vader import SentimentIntensityAnalyzer
+    return SentimentIntensityAnalyzer()
+
+
+def _score_batch(texts):
+    analyzer = get_analyzer()
+    return [analyzer.polarity_scores(text) for text in texts]
+
+
+def score_texts(texts, max_workers=None):
+    """Score many short texts, spreading long inputs over worker processes."""
+    if len(texts) < PARALLEL_MIN_WINDOWS:
+        return _score_batch(texts)
+    ensure_vader_lexicon()  # Download once, before the workers start
+    workers = max_workers or os.cpu_count() or 1
+    batch_size = -(-len(texts) // (workers * 4))
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+    # Spawned workers: forking a process that runs Streamlit and worker threads can deadlock
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+        return [scores for batch in executor.map(_score_batch, batches) for scores in batch]
+
+
+def aggregate_scores(scores, weights):
+    """Weighted mean of neg/neu/pos/compound plus spread statistics of compound."""
+    total = sum(weights) or 1
+    aggregate = {
+        key: sum(score[key] * weight for score, weight in zip(scores, weights)) / total
+        for key in ('neg', 'neu', 'pos', 'compound')
+    }
+    compounds = [score['compound'] for score in scores] or [0.0]
+    mean = sum(compounds) / len(compounds)
+    aggregate.update(
+        min_compound=min(compounds),
+        max_compound=max(compounds),
+        std_compound=(sum((value - mean) ** 2 for value in compounds) / len(compounds)) ** 0.5,
+    )
+    return aggregate
+
+
+# Function to analyze sentiment
+def analyze_sentiment(text):
+    """Score the text sentence by sentence and return the length-weighted averages."""
+    sentences = [sentence for sentence in _SENTENCE_PATTERN.split(text) if sentence.strip()]
+    if len(sentences) <= 1:
+        # Captions often have no punctuation; fall back to fixed-size word windows
+        words = text.split()
+        sentences = [' '.join(words[i:i + 50]) for i in range(0, len(words), 50)] or [text]
+    return aggregate_scores(score_texts(sentences), [len(sentence) for sentence in sentences])
+
+
+def analyze_sentiment_timeline(segments, window_seconds=SENTIMENT_WINDOW_SECONDS):
+    """Score a TranscriptSegments in fixed time windows.
+
+    Returns the aggregate neg/neu/pos/compound scores (as analyze_sentiment
+    does) together with a 'timeline' of per-window scores and the scoring
+    throughput in transcript segments per second.
+    """
+    started = time.monotonic()
+    windows = {}
+    for index in range(len(segments)):
+        windows.setdefault(int(segments.starts[index] // window_seconds), []).append(segments.segment_text(index))
+    keys = sorted(windows)
+    texts = [' '.join(windows[key]) for key in keys]
+    scores = score_texts(texts)
+
+    sentiment = aggregate_scores(scores, [len(text) for text in texts])
+    sentiment['timeline'] = [
+        dict(score, start=key * window_seconds, end=(key + 1) * window_seconds)
+        for key, score in zip(keys, scores)
+    ]
+    elapsed = time.monotonic() - started
+    sentiment['segments_per_second'] = len(segments) / elapsed if elapsed else float(len(segments))
+    log_event('sentiment_scored', segments=len(segments), windows=len(texts),
+              segments_per_second=round(sentiment['segments_per_second']))
+    return sentiment
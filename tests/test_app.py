@@ -0,0 +1,87 @@
+import os
+
+import pytest
+
+pytest.importorskip('streamlit.testing.v1')
+pytest.importorskip('openai')
+from streamlit.testing.v1 import AppTest
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+LINK = 'https://www.youtube.com/watch?v=dQw4w9WgXcQ'
+SUMMARY = '**Overview**\n\nA video about testing.\n\n🔑 KEY POINTS:\n🔑 First point\n🔑 Second point'
+
+
+@pytest.fixture
+def app_test(tmp_path, monkeypatch):
+    monkeypatch.setenv('GROQ_API_KEY', 'test')
+    monkeypatch.setenv('CACHE_DIR', str(tmp_path))
+    monkeypatch.setenv('COOKIE_PATH', str(tmp_path / 'cookies.txt'))
+    monkeypatch.setenv('COOKIE_AUTO_REFRESH', '0')
+    monkeypatch.setenv('JOB_WORKERS', '0')
+    monkeypatch.delenv('JOB_API_PORT', raising=False)
+    monkeypatch.delenv('METRICS_PORT', raising=False)
+    app_test = AppTest.from_file(APP_PATH, default_timeout=30)
+    # A summary from an earlier run, as left in the session by a finished job
+    app_test.session_state['link_input'] = LINK
+    app_test.session_state['link'] = LINK
+    app_test.session_state['language'] = 'English'
+    app_test.session_state['language_input'] = 'English'
+    app_test.session_state['mode'] = 'video'
+    app_test.session_state['summary'] = SUMMARY
+    return app_test.run()
+
+
+def click(app_test, label):
+    next(button for button in app_test.button if button.label == label).click()
+    return app_test.run()
+
+
+def test_summary_page_renders(app_test):
+    assert not app_test.exception
+    assert any(SUMMARY.split('\n')[0] in markdown.value for markdown in app_test.markdown)
+
+
+def test_export_branch_runs(app_test):
+    app_test = click(app_test, 'Prepare download')
+    assert not app_test.exception
+    assert not app_test.error
+
+
+def test_reel_branch_runs(app_test, monkeypatch):
+    import media
+    import reels
+    windows = []
+    monkeypatch.setattr(media, 'fetch_video_info', lambda link: {'duration': 600})
+    monkeypatch.setattr(media, 'plan_downloads', lambda *args: [('video.mp4', 0, 600)])
+
+    def create_highlight_reels(sources, reel_windows, *args, **kwargs):
+        windows.extend(reel_windows)
+        return []
+
+    monkeypatch.setattr(reels, 'create_highlight_reels', create_highlight_reels)
+    app_test = click(app_test, 'Create Reel(s)')
+    assert not app_test.exception
+    assert windows
+    assert [error.value for error in app_test.error] == ['Failed to create reels.']
+
+
+@pytest.mark.parametrize('params', [
+    {'url': ['not', 'a', 'string']},
+    {'url': LINK, 'languages': ['en', 7]},
+    {'url': LINK, 'languages': {'en': True}},
+    {'url': LINK, 'language': 'xx'},
+    {'url': LINK, 'mode': 3},
+    {'url': LINK, 'mode': 'radio'},
+    {'url': LINK, 'token_budget': 'lots'},
+])
+def test_prepare_summary_job_rejects_bad_params(params):
+    import app
+    with pytest.raises(ValueError):
+        app.prepare_summary_job(app.SUMMARY_JOB, params)
+
+
+def test_prepare_summary_job_normalizes_languages():
+    import app
+    params, key = app.prepare_summary_job(app.SUMMARY_JOB, {'url': LINK, 'languages': 'en, de,en', 'mode': 'Podcast'})
+    assert params['languages'] == ['en', 'de'] and params['mode'] == 'podcast'
+    assert key.startswith('dQw4w9WgXcQ:en,de:podcast:')
@@ -0,0 +1,35 @@
+import json
+
+import pytest
+
+pytest.importorskip('streamlit')
+pytest.importorskip('openai')
+import batch
+
+
+def write_manifest(tmp_path, rows):
+    path = tmp_path / 'manifest.jsonl'
+    path.write_text('\n'.join(row if isinstance(row, str) else json.dumps(row) for row in rows), encoding='utf-8')
+    return str(path)
+
+
+def test_manifest_accepts_language_names_and_codes(tmp_path):
+    path = write_manifest(tmp_path, [{'url': 'dQw4w9WgXcQ', 'languages': ['en', 'Deutsch']}, 'dQw4w9WgXcQ'])
+    rows = list(batch.read_manifest(path, 'fr', 'podcast'))
+    assert rows[0]['languages'] == ['en', 'de'] and rows[0]['mode'] == 'podcast'
+    assert rows[1]['languages'] == ['fr']
+    assert not any('error' in row for row in rows)
+
+
+@pytest.mark.parametrize('fields, error', [
+    ({'language': 'english'}, 'unsupported language: english'),
+    ({'languages': ['en', 3]}, "invalid languages: ['en', 3]"),
+    ({'mode': 'radio'}, 'unsupported mode: radio'),
+    ({'mode': 5}, 'unsupported mode: 5'),
+])
+def test_manifest_marks_invalid_rows(tmp_path, fields, error):
+    path = write_manifest(tmp_path, [dict(url='dQw4w9WgXcQ', **fields)])
+    row, = batch.read_manifest(path, 'en', 'video')
+    assert row['error'] == error
+    # Invalid rows are recorded as errors without running the pipeline
+    assert batch.process_row(row, 'model') == dict(row, status='error', seconds=0.0)
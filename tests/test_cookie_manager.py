@@ -0,0 +1,51 @@
+from cookie_manager import CookieManager, is_auth_error
+
+COOKIES = (
+    "# Netscape HTTP Cookie File\n"
+    ".youtube.com\tTRUE\t/\tTRUE\t4102444800\tSID\tsecret\n"
+    "#HttpOnly_.youtube.com\tTRUE\t/\tTRUE\t0\tYSC\tsession\n"
+)
+
+
+def test_session_carries_parsed_cookies(tmp_path):
+    path = tmp_path / 'cookies.txt'
+    path.write_text(COOKIES)
+    manager = CookieManager(str(path), auto_refresh=False)
+    assert manager.get_cookie_file() == str(path)
+    session = manager.get_session()
+    assert session.cookies.get('SID', domain='.youtube.com') == 'secret'
+    assert session.cookies.get('YSC', domain='.youtube.com') == 'session'
+    # Sessions get copies; cookies set on one do not leak into the next
+    session.cookies.set('NEW', '1', domain='.youtube.com')
+    assert 'NEW' not in manager.get_session().cookies
+
+
+def test_session_without_cookie_file(tmp_path):
+    manager = CookieManager(str(tmp_path / 'missing.txt'), auto_refresh=False)
+    assert manager.get_cookie_file() is None
+    assert len(manager.get_session().cookies) == 0
+
+
+def test_auth_errors():
+    class RequestBlocked(Exception):
+        pass
+
+    class IpBlocked(RequestBlocked):
+        pass
+
+    class Response:
+        status_code = 403
+
+    class HTTPError(Exception):
+        response = Response()
+
+    assert is_auth_error(IpBlocked())
+    assert is_auth_error(HTTPError())
+    assert not is_auth_error(ValueError('no transcript'))
+    try:
+        try:
+            raise HTTPError()
+        except HTTPError as e:
+            raise RuntimeError('wrapped') from e
+    except RuntimeError as e:
+        assert is_auth_error(e)
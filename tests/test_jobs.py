@@ -0,0 +1,196 @@
+import json
+import socket
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+import jobs
+from jobs import JOB_MAX_ATTEMPTS, JobCancelled, JobContext, JobQueue, start_job_api
+
+
+@pytest.fixture
+def job_queue(tmp_path):
+    return JobQueue(str(tmp_path / 'jobs.sqlite3'))
+
+
+def test_identical_requests_share_a_job(job_queue):
+    job_id = job_queue.submit('summary', {'url': 'a'}, key='a:en')
+    assert job_queue.submit('summary', {'url': 'a'}, key='a:en') == job_id
+    assert job_queue.submit('summary', {'url': 'b'}, key='b:en') != job_id
+    assert job_queue.submit('summary', {'url': 'a'}) != job_id
+    assert job_queue.get(job_id)['watchers'] == 2
+
+
+def test_finished_job_is_reused_within_result_ttl(job_queue):
+    job_id = job_queue.submit('summary', {}, key='k')
+    job_queue.claim('w', ['summary'])
+    job_queue.finish(job_id, 'w', result={'summary': 'text'})
+    assert job_queue.submit('summary', {}, key='k') == job_id
+    assert job_queue.get(job_id)['result'] == {'summary': 'text'}
+
+
+def test_finished_job_expires_after_result_ttl(tmp_path):
+    job_queue = JobQueue(str(tmp_path / 'jobs.sqlite3'), result_ttl=0)
+    job_id = job_queue.submit('summary', {}, key='k')
+    job_queue.claim('w', ['summary'])
+    job_queue.finish(job_id, 'w', result={})
+    assert job_queue.submit('summary', {}, key='k') != job_id
+
+
+def test_failed_job_is_not_reused(job_queue):
+    job_id = job_queue.submit('summary', {}, key='k')
+    job_queue.claim('w', ['summary'])
+    job_queue.finish(job_id, 'w', error='boom')
+    assert job_queue.get(job_id)['status'] == 'failed'
+    assert job_queue.submit('summary', {}, key='k') != job_id
+
+
+def test_claim_takes_oldest_job_of_known_kinds(job_queue):
+    first = job_queue.submit('summary', {})
+    job_queue.submit('other', {})
+    job_queue.submit('summary', {})
+    job = job_queue.claim('w', ['summary'])
+    assert job['id'] == first
+    assert job['status'] == 'running' and job['attempts'] == 1
+    assert job_queue.get(first)['worker'] == 'w'
+
+
+def test_expired_lease_is_requeued_to_another_worker(tmp_path):
+    job_queue = JobQueue(str(tmp_path / 'jobs.sqlite3'), lease_seconds=0.05)
+    job_id = job_queue.submit('summary', {})
+    job_queue.claim('w1', ['summary'])
+    time.sleep(0.1)
+    job = job_queue.claim('w2', ['summary'])
+    assert job['id'] == job_id
+    assert job['worker'] == 'w2' and job['attempts'] == 2
+    # The first worker lost the lease and learns so on its next heartbeat
+    with pytest.raises(JobCancelled):
+        job_queue.heartbeat(job_id, 'w1')
+    job_queue.heartbeat(job_id, 'w2', {'percent': 50})
+    assert job_queue.get(job_id)['progress'] == {'percent': 50}
+
+
+def test_job_fails_after_max_attempts(tmp_path):
+    job_queue = JobQueue(str(tmp_path / 'jobs.sqlite3'), lease_seconds=0.05)
+    job_id = job_queue.submit('summary', {})
+    for attempt in range(JOB_MAX_ATTEMPTS):
+        assert job_queue.claim(f'w{attempt}', ['summary'])['id'] == job_id
+        time.sleep(0.1)
+    assert job_queue.claim('last', ['summary']) is None
+    job = job_queue.get(job_id)
+    assert job['status'] == 'failed'
+    assert job['error'] == 'Worker stopped responding'
+
+
+def test_release_cancels_only_when_last_watcher_leaves(job_queue):
+    job_id = job_queue.submit('summary', {}, key='k')
+    job_queue.submit('summary', {}, key='k')
+    assert job_queue.release(job_id) is False
+    assert job_queue.get(job_id)['status'] == 'queued'
+    assert job_queue.release(job_id) is True
+    assert job_queue.get(job_id)['status'] == 'cancelled'
+    # A cancelled job is not handed out again
+    assert job_queue.claim('w', ['summary']) is None
+
+
+def test_heartbeat_of_cancelled_job_raises(job_queue):
+    job_id = job_queue.submit('summary', {})
+    job_queue.claim('w', ['summary'])
+    assert job_queue.cancel(job_id) is True
+    with pytest.raises(JobCancelled):
+        job_queue.heartbeat(job_id, 'w', {'percent': 10})
+    assert job_queue.cancel(job_id) is False
+
+
+def prepare(kind, body):
+    if not body.get('url'):
+        raise ValueError('No URL given.')
+    return {'url': body['url']}, body['url']
+
+
+@pytest.fixture
+def api(job_queue, monkeypatch):
+    monkeypatch.setattr(jobs, 'get_job_queue', lambda: job_queue)
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    # start_job_api is cached per arguments; a fresh prepare function gives a fresh server
+    server = start_job_api(lambda kind, body: prepare(kind, body), port=port)
+    yield f'http://127.0.0.1:{port}'
+    server.shutdown()
+    server.server_close()
+
+
+def request(url, method='GET', body=None):
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=data, method=method)) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_api_submit_and_poll(api, job_queue):
+    status, body = request(f'{api}/jobs', 'POST', {'url': 'a'})
+    assert status == 202 and body['status'] == 'queued'
+    assert request(f'{api}/jobs', 'POST', {'url': 'a'})[1]['id'] == body['id']
+    status, job = request(f"{api}/jobs/{body['id']}")
+    assert status == 200 and job['params'] == {'url': 'a'}
+    status, listing = request(f'{api}/jobs?status=queued')
+    assert status == 200 and [job['id'] for job in listing['jobs']] == [body['id']]
+
+
+def test_api_rejects_invalid_request(api):
+    status, body = request(f'{api}/jobs', 'POST', {})
+    assert status == 400 and body['error'] == 'No URL given.'
+
+
+def test_api_unknown_paths_and_jobs_are_not_found(api):
+    assert request(f'{api}/other')[0] == 404
+    assert request(f'{api}/jobs/missing')[0] == 404
+    assert request(f'{api}/jobs/missing', 'DELETE')[0] == 404
+
+
+def test_api_result_conflicts_until_done(api, job_queue):
+    job_id = request(f'{api}/jobs', 'POST', {'url': 'a'})[1]['id']
+    status, body = request(f'{api}/jobs/{job_id}/result')
+    assert status == 409 and body['status'] == 'queued'
+    job_queue.claim('w', ['summary'])
+    job_queue.finish(job_id, 'w', result={'summary': 'text'})
+    assert request(f'{api}/jobs/{job_id}/result') == (200, {'summary': 'text'})
+
+
+def test_api_delete_cancels(api, job_queue):
+    job_id = request(f'{api}/jobs', 'POST', {'url': 'a'})[1]['id']
+    assert request(f'{api}/jobs/{job_id}', 'DELETE') == (200, {'id': job_id, 'cancelled': True})
+    assert job_queue.get(job_id)['status'] == 'cancelled'
+    assert request(f'{api}/jobs/{job_id}', 'DELETE')[1]['cancelled'] is False
+
+
+@pytest.mark.parametrize('body', [[1, 2], 3, 'text', False])
+def test_api_rejects_non_object_body(api, body):
+    status, response = request(f'{api}/jobs', 'POST', body)
+    assert status == 400 and response['error'] == 'The request body must be a JSON object.'
+
+
+def test_check_notices_cancellation_without_a_report(job_queue, monkeypatch):
+    monkeypatch.setattr(jobs, 'JOB_CHECK_INTERVAL', 0.0)
+    job_queue.submit('summary', {})
+    context = JobContext(job_queue, job_queue.claim('w', ['summary']), 'w')
+    context.check()
+    job_queue.cancel(context.job['id'])
+    with pytest.raises(JobCancelled):
+        context.check()
+    assert context.cancelled.is_set()
+
+
+def test_check_reads_the_status_at_most_every_interval(job_queue, monkeypatch):
+    monkeypatch.setattr(jobs, 'JOB_CHECK_INTERVAL', 60.0)
+    job_queue.submit('summary', {})
+    context = JobContext(job_queue, job_queue.claim('w', ['summary']), 'w')
+    reads = []
+    monkeypatch.setattr(job_queue, 'is_running', lambda *args: reads.append(args) or False)
+    context.check()
+    assert reads == []
@@ -0,0 +1,37 @@
+from rate_limiter import RateLimitScheduler, refill_window
+
+MODEL = 'llama-3.1-8b-instant'
+
+
+def test_refill_window():
+    assert refill_window(30, 29, 2.0) == 60.0
+    assert refill_window(14400, 14399, 6.0) == 86400.0
+    assert refill_window(30, 30, 0.0) is None
+    assert refill_window(30, None, 2.0) is None
+
+
+def test_per_minute_request_limit_sets_rpm_bucket():
+    scheduler = RateLimitScheduler()
+    scheduler.update_from_headers(MODEL, {
+        'x-ratelimit-limit-requests': '50', 'x-ratelimit-remaining-requests': '45',
+        'x-ratelimit-reset-requests': '6s',
+    })
+    assert scheduler._state(MODEL).requests.capacity == 50
+
+
+def test_daily_request_limit_only_caps_remaining_requests():
+    scheduler = RateLimitScheduler()
+    scheduler.update_from_headers(MODEL, {
+        'x-ratelimit-limit-requests': '14400', 'x-ratelimit-remaining-requests': '3',
+        'x-ratelimit-reset-requests': '23h59m0s',
+    })
+    requests = scheduler._state(MODEL).requests
+    assert requests.capacity == 30
+    assert requests.tokens <= 3.01
+
+
+def test_token_headers_set_tpm_bucket():
+    scheduler = RateLimitScheduler()
+    scheduler.update_from_headers(MODEL, {'x-ratelimit-limit-tokens': '20000', 'x-ratelimit-remaining-tokens': '500'})
+    assert scheduler.token_limit(MODEL) == 20000
+    assert scheduler._state(MODEL).tokens.tokens <= 501
@@ -0,0 +1,40 @@
+from tokens import get_chunk_token_budget, plan_chunk_size
+
+
+def test_transcript_within_budget_is_one_chunk():
+    chunk_tokens, overlap = plan_chunk_size(13000, 110000)
+    assert chunk_tokens >= 13000
+    assert overlap == 200
+
+
+def test_chunks_are_evenly_sized_and_within_budget():
+    chunk_tokens, overlap = plan_chunk_size(130000, 110000)
+    # Two chunks of about half the transcript, not one full chunk and a small remainder
+    assert 65000 <= chunk_tokens < 110000
+    assert chunk_tokens * 2 - overlap >= 130000
+
+
+def test_chunk_size_never_exceeds_budget():
+    for transcript_tokens in (110000, 500000, 1300000):
+        chunk_tokens, _ = plan_chunk_size(transcript_tokens, 110000)
+        assert chunk_tokens <= 110000
+
+
+def test_overlap_is_small_for_small_budgets():
+    chunk_tokens, overlap = plan_chunk_size(50000, 1000)
+    assert overlap == 100
+    assert chunk_tokens <= 1000
+
+
+def test_empty_transcript_gives_a_valid_splitter_size():
+    chunk_tokens, overlap = plan_chunk_size(0, 110000)
+    assert chunk_tokens > overlap
+
+
+def test_chunk_budget_fits_the_rate_limit():
+    context_budget = get_chunk_token_budget('llama-3.1-8b-instant', 300)
+    assert context_budget > 100000
+    # With a 6000 TPM limit, prompt, chunk and expected completion must fit into one minute
+    budget = get_chunk_token_budget('llama-3.1-8b-instant', 300, tokens_per_minute=6000, completion_tokens=1000)
+    assert budget + 300 + 1000 <= 6000
+    assert get_chunk_token_budget('llama-3.1-8b-instant', 300, tokens_per_minute=10 ** 6) == context_budget
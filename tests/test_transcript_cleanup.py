@@ -0,0 +1,78 @@
+from tokens import estimate_tokens
+from transcript_cleanup import clean_segments, reduce_segments, strip_non_speech
+from transcript_segments import TranscriptSegments
+
+
+def make_segments(lines, generated=False, duration=2.0):
+    parts = [{'text': line, 'start': i * duration, 'duration': duration} for i, line in enumerate(lines)]
+    return TranscriptSegments.from_parts(parts, generated=generated)
+
+
+def test_strip_non_speech():
+    assert strip_non_speech('[Music] so um the plan ♪ la la ♪ is >> simple') == 'so the plan is simple'
+
+
+def test_manual_captions_keep_repeated_words():
+    segments, removed = clean_segments(make_segments(['the best of the', 'of the year award']))
+    assert segments.text == 'the best of the of the year award'
+    assert removed == 0
+
+
+def test_rolling_captions_drop_repeated_words():
+    segments, removed = clean_segments(make_segments(
+        ['welcome back to the channel', 'back to the channel today we', 'today we look at'], generated=True))
+    assert segments.text == 'welcome back to the channel today we look at'
+    assert removed == 0
+
+
+def test_fully_repeated_and_non_speech_lines_are_dropped():
+    segments, removed = clean_segments(make_segments(
+        ['hello there everyone', '[Music]', 'hello there everyone'], generated=True))
+    assert segments.text == 'hello there everyone'
+    assert removed == 2
+
+
+def test_single_shared_word_is_kept():
+    segments, _ = clean_segments(make_segments(['we start now', 'now the results'], generated=True))
+    assert segments.text == 'we start now now the results'
+
+
+def test_cleaning_keeps_segment_timing():
+    segments, _ = clean_segments(make_segments(['[Applause]', 'first point', 'second point']))
+    assert list(segments.starts) == [2.0, 4.0]
+    assert segments.segment_text(1) == 'second point'
+
+
+def test_rolling_flag_overrides_segments():
+    segments, _ = clean_segments(make_segments(['a b c d', 'c d e f'], generated=True), rolling=False)
+    assert segments.text == 'a b c d c d e f'
+
+
+def topic_lines(count):
+    topics = ['rockets burn fuel to reach orbit.', 'bread needs yeast flour and water.',
+              'rivers carve valleys over time.', 'chess openings control the center.']
+    return [f'Part {i}: {topics[i % len(topics)]} ' + ' '.join(f'detail{i}word{j}' for j in range(30)) + '.'
+            for i in range(count)]
+
+
+def test_reduce_within_budget_returns_segments_unchanged():
+    segments = make_segments(topic_lines(5))
+    assert reduce_segments(segments, 'en', 10 ** 6) is segments
+
+
+def test_reduce_respects_budget_and_order():
+    segments = make_segments(topic_lines(200))
+    budget = estimate_tokens(segments.text, 'en') // 4
+    reduced = reduce_segments(segments, 'en', budget)
+    assert 0 < estimate_tokens(reduced.text, 'en') <= budget
+    assert list(reduced.starts) == sorted(reduced.starts)
+    # Every kept segment keeps its text and timing
+    original = {segments.starts[i]: segments.segment_text(i) for i in range(len(segments))}
+    assert all(original[reduced.starts[i]] == reduced.segment_text(i) for i in range(len(reduced)))
+
+
+def test_reduce_covers_the_whole_video():
+    segments = make_segments(topic_lines(200))
+    reduced = reduce_segments(segments, 'en', estimate_tokens(segments.text, 'en') // 4)
+    sections = {int(start // (segments.duration / 10)) for start in reduced.starts}
+    assert sections == set(range(10))
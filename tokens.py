@@ -0,0 +1,124 @@
+import math
+import os
+import re
+
+# Approximate characters per token for the Llama 3 tokenizer used by the Groq
+# models, measured per script. Latin text is further calibrated per language
+# because accented and agglutinative languages split into more tokens.
+SCRIPT_CHARS_PER_TOKEN = {
+    'latin': 4.0,
+    'latin_extended': 1.5,
+    'cyrillic': 3.0,
+    'arabic': 2.6,
+    'devanagari': 2.2,
+    'bengali': 1.6,
+    'tamil': 1.5,
+    'telugu': 1.4,
+    'kannada': 1.3,
+    'malayalam': 1.3,
+    'kana': 1.2,
+    'cjk': 1.1,
+    'hangul': 1.2,
+}
+
+LANGUAGE_CHARS_PER_TOKEN = {
+    'en': 4.2, 'de': 3.4, 'it': 3.5, 'es': 3.7, 'fr': 3.6, 'nl': 3.3,
+    'pl': 2.8, 'pt': 3.6, 'tr': 2.9,
+}
+
+_SCRIPT_PATTERNS = {
+    'latin_extended': re.compile('[À-ɏḀ-ỿ]+'),
+    'cyrillic': re.compile('[Ѐ-ӿ]+'),
+    'arabic': re.compile('[؀-ۿݐ-ݿ]+'),
+    'devanagari': re.compile('[ऀ-ॿ]+'),
+    'bengali': re.compile('[ঀ-৿]+'),
+    'tamil': re.compile('[஀-௿]+'),
+    'telugu': re.compile('[ఀ-౿]+'),
+    'kannada': re.compile('[ಀ-೿]+'),
+    'malayalam': re.compile('[ഀ-ൿ]+'),
+    'kana': re.compile('[぀-ヿㇰ-ㇿ]+'),
+    'cjk': re.compile('[㐀-䶿一-鿿豈-﫿　-〿＀-￯]+'),
+    'hangul': re.compile('[ᄀ-ᇿ㄰-㆏가-힯]+'),
+}
+
+# Context window and completion limit of each model served by Groq
+MODEL_LIMITS = {
+    'llama-3.1-8b-instant': {'context_window': 131072, 'max_output_tokens': 8192},
+    'llama-3.3-70b-versatile': {'context_window': 131072, 'max_output_tokens': 32768},
+    'llama3-8b-8192': {'context_window': 8192, 'max_output_tokens': 8192},
+    'llama3-70b-8192': {'context_window': 8192, 'max_output_tokens': 8192},
+    'mixtral-8x7b-32768': {'context_window': 32768, 'max_output_tokens': 32768},
+    'gemma2-9b-it': {'context_window': 8192, 'max_output_tokens': 8192},
+}
+DEFAULT_MODEL_LIMITS = {'context_window': 8192, 'max_output_tokens': 8192}
+
+# Fraction of the real budget we fill, leaving room for estimation error
+TOKEN_BUDGET_HEADROOM = 0.9
+
+
+def get_model_limits(model_name):
+    """Return the context window and completion limit for a model."""
+    return MODEL_LIMITS.get(model_name, DEFAULT_MODEL_LIMITS)
+
+
+def count_script_chars(text):
+    """Count the characters of text that fall into each script."""
+    if text.isascii():
+        return {'latin': len(text)}
+    counts = {}
+    remaining = len(text)
+    for script, pattern in _SCRIPT_PATTERNS.items():
+        count = sum(map(len, pattern.findall(text)))
+        if count:
+            counts[script] = count
+            remaining -= count
+    # Digits, spaces and punctuation are tokenized like plain Latin text
+    counts['latin'] = remaining
+    return counts
+
+
+def estimate_tokens(text, language_code=None):
+    """Estimate the number of tokens in text without calling a tokenizer."""
+    if not text:
+        return 0
+    tokens = 0.0
+    for script, count in count_script_chars(text).items():
+        if script == 'latin':
+            ratio = LANGUAGE_CHARS_PER_TOKEN.get(language_code, SCRIPT_CHARS_PER_TOKEN['latin'])
+        else:
+            ratio = SCRIPT_CHARS_PER_TOKEN[script]
+        tokens += count / ratio
+    return math.ceil(tokens)
+
+
+def get_chunk_token_budget(model_name, prompt_tokens, max_output_tokens=8000, min_chunk_tokens=1000,
+                           tokens_per_minute=None, completion_tokens=1000):
+    """Return how many transcript tokens fit into a single map call for a model.
+
+    With tokens_per_minute, the budget also leaves room for the prompt and
+    completion_tokens within that rate limit, since Groq rejects a request
+    larger than the model's per-minute budget outright.
+    """
+    limits = get_model_limits(model_name)
+    output_tokens = min(max_output_tokens, limits['max_output_tokens'])
+    available = limits['context_window'] - output_tokens - prompt_tokens
+    if tokens_per_minute:
+        available = min(available, tokens_per_minute - completion_tokens - prompt_tokens)
+    return max(min_chunk_tokens, int(available * TOKEN_BUDGET_HEADROOM))
+
+
+# Tokens repeated at the start of the next chunk, so a statement cut at a boundary keeps its context
+CHUNK_OVERLAP_TOKENS = int(os.getenv('CHUNK_OVERLAP_TOKENS', 200))
+
+
+def plan_chunk_size(transcript_tokens, max_chunk_tokens, overlap=CHUNK_OVERLAP_TOKENS):
+    """Return (chunk_tokens, overlap) that cut a transcript into the fewest evenly sized chunks.
+
+    The chunk count follows from the model budget alone; the transcript is
+    then divided evenly, so the last chunk is not a small remainder.
+    """
+    overlap = min(overlap, max_chunk_tokens // 10)
+    chunks = max(1, math.ceil((transcript_tokens - overlap) / (max_chunk_tokens - overlap)))
+    chunk_tokens = math.ceil((transcript_tokens - overlap) / chunks) + overlap
+    # The splitter cuts at separators, so leave some slack against a spill-over chunk
+    return max(2 * overlap, min(max_chunk_tokens, int(chunk_tokens * 1.05))), overlap
@@ -0,0 +1,61 @@
+import json
+import os
+from functools import lru_cache
+
+from sqlite_cache import SQLiteCache, get_cache_dir
+
+
+class TranscriptCache:
+    """Disk-backed transcript store keyed by video ID and language code."""
+
+    def __init__(self, path=None, ttl=None, max_bytes=None):
+        if path is None:
+            path = os.path.join(get_cache_dir(), 'transcripts.sqlite3')
+        if ttl is None:
+            ttl = float(os.getenv('TRANSCRIPT_CACHE_TTL', 7 * 24 * 60 * 60))
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv('TRANSCRIPT_CACHE_MAX_MB', 200)) * 1024 * 1024)
+        self.store = SQLiteCache(path, ttl=ttl, max_bytes=max_bytes)
+
+    @staticmethod
+    def _key(video_id, language_code):
+        return f"{video_id}:{language_code or 'auto'}"
+
+    def get(self, video_id, language_code=None):
+        """Return a dict with text, language_code, generated and segments, or None on a miss."""
+        value = self.store.get(self._key(video_id, language_code))
+        if value is None:
+            return None
+        return json.loads(value)
+
+    def set(self, video_id, language_code, text, segments, requested_language=None, generated=False):
+        """Store a fetched transcript under its own language and the requested one."""
+        value = json.dumps({
+            'text': text,
+            'language_code': language_code,
+            'generated': generated,
+            'segments': [
+                {'text': part['text'], 'start': part['start'], 'duration': part['duration']}
+                for part in segments
+            ],
+        }, ensure_ascii=False)
+        self.store.set(self._key(video_id, language_code), value)
+        if requested_language != language_code:
+            self.store.set(self._key(video_id, requested_language), value)
+
+    def get_index(self, video_id, language_code):
+        """Return the serialized key point index for a transcript, or None."""
+        return self.store.get(self._key(video_id, language_code) + ':index')
+
+    def set_index(self, video_id, language_code, data):
+        """Store a serialized key point index next to its transcript."""
+        self.store.set(self._key(video_id, language_code) + ':index', data)
+
+    def stats(self):
+        return self.store.stats()
+
+
+@lru_cache(maxsize=None)
+def get_transcript_cache():
+    """Return the process-wide transcript cache."""
+    return TranscriptCache()
@@ -0,0 +1,184 @@
+import os
+import re
+import zlib
+
+from tokens import estimate_tokens
+from transcript_segments import TranscriptSegments
+
+# Clean captions before summarizing (set to 0 to pass them through verbatim)
+TRANSCRIPT_CLEANUP = os.getenv('TRANSCRIPT_CLEANUP', '1') == '1'
+
+# Shrink longer transcripts to this many tokens with TextRank before map/reduce (0 = off)
+TRANSCRIPT_TOKEN_BUDGET = int(os.getenv('TRANSCRIPT_TOKEN_BUDGET', 0))
+
+# [Music], [Applause], (laughter), ♪ ... ♪ and speaker change markers
+_NON_SPEECH_PATTERN = re.compile(r'\[[^\]]{0,40}\]|\((?:[^)]{0,20}(?:music|applause|laugh|inaudible|silence)[^)]{0,20})\)|♪[^♪]{0,200}♪|[♪♫]|>>+', re.IGNORECASE)
+
+# Hesitations that carry no content in any of the supported languages
+FILLER_WORDS = {
+    'um', 'umm', 'uh', 'uhh', 'uhm', 'erm', 'hmm', 'mm', 'mhm', 'ah', 'eh', 'ehm',
+    'äh', 'ähm', 'öhm', 'euh', 'eee', 'эм', 'ээ', 'эээ', 'мм', 'えーと', 'えー', 'あのー', '嗯', '呃', '음', '어',
+}
+_FILLER_PATTERN = re.compile(
+    r'(?<!\w)(?:' + '|'.join(sorted(map(re.escape, FILLER_WORDS), key=len, reverse=True)) + r')(?!\w)[,.…]*\s*',
+    re.IGNORECASE)
+_SPACE_PATTERN = re.compile(r'\s+')
+
+# Rolling captions repeat at most this many words of the previous line
+MAX_OVERLAP_WORDS = 40
+
+# TextRank settings: sentence units of at least this many tokens, at most this many units
+MIN_UNIT_TOKENS = 40
+MAX_UNITS = 3000
+HASH_DIMENSIONS = 2048
+DAMPING = 0.85
+COVERAGE_SECTIONS = 10
+
+
+def strip_non_speech(text):
+    """Remove [Music]-style tags, music notes, speaker markers and filler words."""
+    text = _NON_SPEECH_PATTERN.sub(' ', text)
+    text = _FILLER_PATTERN.sub('', text)
+    return _SPACE_PATTERN.sub(' ', text).strip(' ,')
+
+
+def _normalize(word):
+    return word.lower().strip('.,!?;:…"\'')
+
+
+def remove_overlap(previous_words, words):
+    """Return words without the prefix that repeats the end of previous_words."""
+    previous = [_normalize(word) for word in previous_words[-MAX_OVERLAP_WORDS:]]
+    current = [_normalize(word) for word in words[:MAX_OVERLAP_WORDS]]
+    # Single shared words are usually a coincidence, not a repeated caption line
+    for size in range(min(len(previous), len(current)), 1, -1):
+        if previous[-size:] == current[:size]:
+            return words[size:]
+    return words
+
+
+def clean_segments(segments, rolling=None):
+    """Dedupe rolling caption lines and strip non-speech markers; return (segments, removed_count).
+
+    Repeated words are only removed from rolling (auto-generated) captions,
+    by default when segments.generated is set; in manual captions and audio
+    transcriptions a line starting with the last words of the previous one
+    is real speech. Segment timing is kept, so the cleaned transcript still
+    maps to the video. Segments left empty (pure [Music], or fully repeated
+    lines) are dropped.
+    """
+    if rolling is None:
+        rolling = segments.generated
+    parts = []
+    previous_words = []
+    for i in range(len(segments)):
+        words = strip_non_speech(segments.segment_text(i)).split()
+        if rolling:
+            words = remove_overlap(previous_words, words)
+        if not words:
+            continue
+        previous_words = (previous_words + words)[-MAX_OVERLAP_WORDS:]
+        parts.append({'text': ' '.join(words), 'start': segments.starts[i], 'duration': segments.durations[i]})
+    return TranscriptSegments.from_parts(parts), len(segments) - len(parts)
+
+
+def _sentence_units(segments, language_code, min_tokens):
+    """Group consecutive segments into units of at least min_tokens, ending at sentence ends if possible."""
+    units = []
+    first = 0
+    tokens = 0
+    for i in range(len(segments)):
+        text = segments.segment_text(i)
+        tokens += estimate_tokens(text, language_code)
+        sentence_end = text.endswith(('.', '!', '?', '。', '！', '？'))
+        if tokens >= min_tokens and (sentence_end or tokens >= 3 * min_tokens) or i == len(segments) - 1:
+            units.append((first, i + 1, tokens))
+            first = i + 1
+            tokens = 0
+    return units
+
+
+def textrank(texts):
+    """Score texts by TextRank over hashed TF-IDF vectors (power iteration in NumPy)."""
+    import numpy as np
+    from key_point_index import tokenize
+    vectors = np.zeros((len(texts), HASH_DIMENSIONS), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for token in tokenize(text):
+            vectors[row, zlib.crc32(token.encode('utf-8')) % HASH_DIMENSIONS] += 1.0
+    document_freq = np.count_nonzero(vectors, axis=0)
+    vectors *= np.log((1 + len(texts)) / (1 + document_freq)).astype(np.float32) + 1
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors /= np.where(norms > 0, norms, 1)
+
+    similarity = vectors @ vectors.T
+    np.fill_diagonal(similarity, 0)
+    row_sums = similarity.sum(axis=1, keepdims=True)
+    transition = np.divide(similarity, row_sums, out=np.full_like(similarity, 1.0 / len(texts)), where=row_sums > 0)
+    scores = np.full(len(texts), 1.0 / len(texts), dtype=np.float32)
+    for _ in range(50):
+        updated = (1 - DAMPING) / len(texts) + DAMPING * (transition.T @ scores)
+        if np.abs(updated - scores).sum() < 1e-6:
+            return updated
+        scores = updated
+    return scores
+
+
+def reduce_segments(segments, language_code, token_budget):
+    """Keep the most central passages of a transcript within token_budget tokens.
+
+    The transcript is grouped into sentence-like units, which are ranked with
+    TextRank. Each tenth of the video gets a share of the budget in
+    proportion to its length, so the reduced transcript still covers the
+    whole video, and kept units stay in their original order and timing.
+    """
+    total_tokens = estimate_tokens(segments.text, language_code)
+    if total_tokens <= token_budget or len(segments) < 2:
+        return segments
+    units = _sentence_units(segments, language_code, max(MIN_UNIT_TOKENS, total_tokens // MAX_UNITS))
+    scores = textrank([segments.text[segments.offsets[first]:segments.offsets[end] if end < len(segments) else None]
+                       for first, end, _ in units])
+
+    keep = []
+    section_size = -(-len(units) // COVERAGE_SECTIONS)
+    for section_start in range(0, len(units), section_size):
+        section = range(section_start, min(section_start + section_size, len(units)))
+        budget = token_budget * sum(units[i][2] for i in section) / total_tokens
+        for i in sorted(section, key=lambda i: -scores[i]):
+            if units[i][2] <= budget:
+                keep.append(i)
+                budget -= units[i][2]
+
+    parts = []
+    for i in sorted(keep):
+        first, end, _ = units[i]
+        parts.extend({'text': segments.segment_text(j), 'start': segments.starts[j], 'duration': segments.durations[j]}
+                     for j in range(first, end))
+    return TranscriptSegments.from_parts(parts)
+
+
+def preprocess_transcript(segments, language_code, token_budget=None, cleanup=TRANSCRIPT_CLEANUP):
+    """Clean (and optionally reduce) a transcript before summarizing; return (segments, stats).
+
+    stats reports the estimated tokens of the raw, cleaned and final
+    transcript, so the savings can be shown per video.
+    """
+    if token_budget is None:
+        token_budget = TRANSCRIPT_TOKEN_BUDGET
+    raw_tokens = estimate_tokens(segments.text, language_code)
+    removed = 0
+    if cleanup:
+        segments, removed = clean_segments(segments)
+    clean_tokens = estimate_tokens(segments.text, language_code)
+    if token_budget and clean_tokens > token_budget:
+        segments = reduce_segments(segments, language_code, token_budget)
+    final_tokens = estimate_tokens(segments.text, language_code)
+    return segments, {
+        'raw_tokens': raw_tokens,
+        'clean_tokens': clean_tokens,
+        'final_tokens': final_tokens,
+        'removed_segments': removed,
+        'reduced': final_tokens < clean_tokens,
+        'saved_tokens': raw_tokens - final_tokens,
+        'saved_percent': round(100 * (raw_tokens - final_tokens) / raw_tokens, 1) if raw_tokens else 0.0,
+    }
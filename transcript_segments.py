@@ -0,0 +1,108 @@
+from array import array
+from bisect import bisect_left, bisect_right
+
+
+class TranscriptSegments:
+    """Timed transcript kept as one text buffer plus parallel arrays.
+
+    Segment i covers text[offsets[i]:offsets[i + 1]] (including the separator)
+    and is spoken from starts[i] for durations[i] seconds. Storing plain
+    arrays instead of one dict per caption keeps even 10-hour transcripts at a
+    few hundred kilobytes, and both time and character lookups are a bisect.
+    generated is True for YouTube's auto-generated captions, whose lines
+    roll over and repeat part of the previous line.
+    """
+
+    __slots__ = ('text', 'starts', 'durations', 'offsets', 'generated')
+
+    def __init__(self, text, starts, durations, offsets, generated=False):
+        self.text = text
+        self.starts = starts
+        self.durations = durations
+        self.offsets = offsets
+        self.generated = generated
+
+    @classmethod
+    def from_parts(cls, parts, separator=' ', generated=False):
+        """Build from transcript parts with text, start and duration fields."""
+        starts = array('d')
+        durations = array('d')
+        offsets = array('q')
+        texts = []
+        position = 0
+        for part in parts:
+            if texts:
+                position += len(separator)
+            offsets.append(position)
+            starts.append(float(part['start']))
+            durations.append(float(part['duration']))
+            texts.append(part['text'])
+            position += len(part['text'])
+        return cls(separator.join(texts), starts, durations, offsets, generated)
+
+    def __len__(self):
+        return len(self.starts)
+
+    @property
+    def duration(self):
+        """End time of the last segment in seconds."""
+        if not self.starts:
+            return 0.0
+        return self.starts[-1] + self.durations[-1]
+
+    def segment_text(self, index):
+        """Return the text of one segment."""
+        end = self.offsets[index + 1] if index + 1 < len(self.offsets) else len(self.text)
+        return self.text[self.offsets[index]:end].strip()
+
+    def index_at_time(self, seconds):
+        """Return the index of the segment playing at the given time."""
+        return max(bisect_right(self.starts, seconds) - 1, 0)
+
+    def index_at_offset(self, offset):
+        """Return the index of the segment containing the given character offset."""
+        return max(bisect_right(self.offsets, offset) - 1, 0)
+
+    def time_at_offset(self, offset):
+        """Return the time a character offset is spoken, interpolated within its segment."""
+        if not self.starts:
+            return 0.0
+        index = self.index_at_offset(offset)
+        end = self.offsets[index + 1] if index + 1 < len(self.offsets) else len(self.text)
+        length = max(end - self.offsets[index], 1)
+        fraction = min(max(offset - self.offsets[index], 0) / length, 1.0)
+        return self.starts[index] + self.durations[index] * fraction
+
+    def offset_at_time(self, seconds):
+        """Return the character offset of the segment playing at the given time."""
+        if not self.starts:
+            return 0
+        return self.offsets[self.index_at_time(seconds)]
+
+    def text_between(self, start_time, end_time):
+        """Return the text of all segments overlapping [start_time, end_time)."""
+        if not self.starts:
+            return ''
+        first = self.index_at_time(start_time)
+        last = max(bisect_left(self.starts, end_time, lo=first), first + 1)
+        end = self.offsets[last] if last < len(self.offsets) else len(self.text)
+        return self.text[self.offsets[first]:end].strip()
+
+    def span_times(self, start_offset, end_offset):
+        """Return the (start, end) time in seconds of a span of the text buffer."""
+        return self.time_at_offset(start_offset), self.time_at_offset(end_offset)
+
+    def chunk_times(self, chunks):
+        """Return the (start, end) time of each chunk split from the text buffer.
+
+        Chunks must be in order, as produced by the text splitter; overlapping
+        chunks are found by searching forward from the previous chunk start.
+        """
+        times = []
+        position = 0
+        for chunk in chunks:
+            found = self.text.find(chunk, position)
+            if found != -1:
+                position = found
+            times.append(self.span_times(position, position + len(chunk)))
+        return times
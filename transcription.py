@@ -0,0 +1,163 @@
+import os
+import re
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from metrics import record_rate_limit
+from rate_limiter import get_rate_limit_scheduler
+
+# Any OpenAI-compatible /audio/transcriptions endpoint works; Groq by default
+TRANSCRIPTION_MODEL = os.getenv('TRANSCRIPTION_MODEL', 'whisper-large-v3-turbo')
+TRANSCRIPTION_CONCURRENCY = int(os.getenv('TRANSCRIPTION_CONCURRENCY', 4))
+
+# Segments stay well under the 25 MB upload limit at 16 kHz mono 32 kbit/s
+MAX_SEGMENT_SECONDS = 600
+MIN_SEGMENT_SECONDS = 60
+
+_SILENCE_START_PATTERN = re.compile(r"silence_start: (-?\d+(?:\.\d+)?)")
+_SILENCE_END_PATTERN = re.compile(r"silence_end: (\d+(?:\.\d+)?)")
+_DURATION_PATTERN = re.compile(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)")
+_TIME_PATTERN = re.compile(r"time=(\d+):(\d+):(\d+(?:\.\d+)?)")
+
+# Whisper reports the detected language by name
+WHISPER_LANGUAGE_CODES = {
+    'english': 'en', 'hindi': 'hi', 'german': 'de', 'italian': 'it', 'spanish': 'es', 'french': 'fr',
+    'dutch': 'nl', 'polish': 'pl', 'japanese': 'ja', 'chinese': 'zh', 'russian': 'ru', 'korean': 'ko',
+    'portuguese': 'pt', 'arabic': 'ar', 'turkish': 'tr', 'bengali': 'bn', 'marathi': 'mr', 'tamil': 'ta',
+    'telugu': 'te', 'kannada': 'kn', 'malayalam': 'ml',
+}
+
+
+class TranscriptionError(Exception):
+    """The audio could not be measured or transcribed."""
+
+
+@lru_cache(maxsize=None)
+def get_transcription_client():
+    """Return the client for the audio transcription endpoint."""
+    from openai import OpenAI
+    return OpenAI(
+        api_key=os.getenv('TRANSCRIPTION_API_KEY', os.getenv('GROQ_API_KEY')),
+        base_url=os.getenv('TRANSCRIPTION_BASE_URL', 'https://api.groq.com/openai/v1')
+    )
+
+
+def _seconds(match):
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def detect_silences(audio_path, noise='-30dB', min_silence=0.5):
+    """Return the audio duration and the midpoints of its silent stretches."""
+    # Progress stats stay on: streamed or fragmented audio often reports "Duration: N/A"
+    output = subprocess.run([
+        'ffmpeg', '-hide_banner', '-i', audio_path,
+        '-af', f'silencedetect=noise={noise}:d={min_silence}', '-f', 'null', '-'
+    ], capture_output=True, text=True, check=True).stderr
+    match = _DURATION_PATTERN.search(output)
+    if match:
+        duration = _seconds(match)
+    else:
+        # The last progress line gives the position reached after decoding the whole file
+        times = list(_TIME_PATTERN.finditer(output))
+        if not times:
+            raise TranscriptionError(f"Could not determine the duration of {os.path.basename(audio_path)}")
+        duration = _seconds(times[-1])
+    starts = [float(value) for value in _SILENCE_START_PATTERN.findall(output)]
+    ends = [float(value) for value in _SILENCE_END_PATTERN.findall(output)]
+    return duration, [(max(start, 0) + end) / 2 for start, end in zip(starts, ends)]
+
+
+def plan_audio_segments(duration, silences, max_seconds=MAX_SEGMENT_SECONDS, min_seconds=MIN_SEGMENT_SECONDS):
+    """Split [0, duration] at silences into segments no longer than max_seconds."""
+    segments = []
+    start = 0.0
+    while duration - start > max_seconds:
+        # Cut at the last silence that keeps the segment within bounds, or hard-cut
+        candidates = [point for point in silences if start + min_seconds <= point <= start + max_seconds]
+        end = candidates[-1] if candidates else start + max_seconds
+        segments.append((start, end))
+        start = end
+    segments.append((start, duration))
+    return segments
+
+
+def extract_audio_segment(audio_path, start, end, output_path):
+    """Re-encode one segment as small 16 kHz mono MP3 for upload."""
+    subprocess.run([
+        'ffmpeg', '-y', '-v', 'error', '-ss', f'{start:.3f}', '-t', f'{end - start:.3f}', '-i', audio_path,
+        '-vn', '-ac', '1', '-ar', '16000', '-c:a', 'libmp3lame', '-b:a', '32k', output_path
+    ], check=True)
+    return output_path
+
+
+def _field(item, name):
+    return item[name] if isinstance(item, dict) else getattr(item, name)
+
+
+def transcribe_segment(path, offset, language=None, retries=3):
+    """Transcribe one audio file and return its timed parts shifted by offset."""
+    scheduler = get_rate_limit_scheduler()
+    for attempt in range(retries):
+        # Audio requests are paced by requests per minute only
+        scheduler.acquire(TRANSCRIPTION_MODEL, 0)
+        try:
+            options = {'language': language} if language else {}
+            with open(path, 'rb') as audio_file:
+                response = get_transcription_client().audio.transcriptions.create(
+                    file=audio_file,
+                    model=TRANSCRIPTION_MODEL,
+                    response_format='verbose_json',
+                    **options
+                )
+            parts = [{
+                'text': _field(segment, 'text').strip(),
+                'start': offset + _field(segment, 'start'),
+                'duration': _field(segment, 'end') - _field(segment, 'start'),
+            } for segment in (_field(response, 'segments') or [])]
+            return parts, _field(response, 'language')
+        except Exception as e:
+            wait_time = scheduler.handle_error(TRANSCRIPTION_MODEL, e, attempt)
+            if wait_time is not None:
+                record_rate_limit(TRANSCRIPTION_MODEL, wait_time)
+            else:
+                print(f"Error transcribing audio: {str(e)}")
+                return None, None
+    return None, None
+
+
+def transcribe_audio(audio_path, language=None, max_workers=TRANSCRIPTION_CONCURRENCY):
+    """Transcribe a local audio file in parallel silence-split segments.
+
+    Returns the stitched transcript parts (text, start, duration in video
+    time) and the detected language code, or (None, None) if any segment
+    failed.
+    """
+    duration, silences = detect_silences(audio_path)
+    plan = plan_audio_segments(duration, silences)
+    with tempfile.TemporaryDirectory() as work_dir:
+        def transcribe(indexed_segment):
+            index, (start, end) = indexed_segment
+            segment_path = extract_audio_segment(audio_path, start, end, os.path.join(work_dir, f'{index}.mp3'))
+            return transcribe_segment(segment_path, start, language)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(transcribe, enumerate(plan)))
+
+    if any(parts is None for parts, _ in results):
+        return None, None
+    parts = [part for segment_parts, _ in results for part in segment_parts if part['text']]
+    detected = next((language for _, language in results if language), None)
+    language_code = language or WHISPER_LANGUAGE_CODES.get(str(detected).lower(), detected)
+    return parts, language_code
+
+
+def transcribe_video(url, video_id, cookies_path=None, language=None):
+    """Download only the audio of a video and transcribe it."""
+    from media import download_audio
+    audio_path = download_audio(url, video_id, cookies_path)
+    if not audio_path:
+        return None, None
+    return transcribe_audio(audio_path, language)
@@ -1,4 +1,6 @@
+import argparse
 import os
+import shutil
 import time
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -9,6 +11,7 @@ from datetime import datetime
 from dotenv import load_dotenv
 import sys
 from selenium.webdriver.common.keys import Keys
+from cookie_manager import get_cookie_path, refresh_cookies
 
 def wait_and_find_element(driver, selectors, timeout=20):
     """Versucht mehrere Selektoren nacheinander"""
@@ -127,13 +130,11 @@ def get_youtube_cookies():
             
             print(f"Gefundene Cookies: {len(cookies)}")
             
-            cookies_path = os.path.join(os.path.dirname(__file__), 'cookies.txt')
+            cookies_path = get_cookie_path()
             backup_path = cookies_path + '.backup'
+            temp_path = cookies_path + '.tmp'
             
-            if os.path.exists(cookies_path):
-                os.replace(cookies_path, backup_path)
-            
-            with open(cookies_path, 'w') as f:
+            with open(temp_path, 'w') as f:
                 f.write("# Netscape HTTP Cookie File\n")
                 f.write("# https://curl.haxx.se/rfc/cookie_spec.html\n")
                 f.write("# This is a generated file!  Do not edit.\n\n")
@@ -150,6 +151,11 @@ def get_youtube_cookies():
                     
                     f.write(f"{domain}\tTRUE\t{path}\t{secure}\t{expires}\t{name}\t{value}\n")
             
+            # Alte Datei sichern, dann atomar ersetzen, damit die App nie eine halbe Datei liest
+            if os.path.exists(cookies_path):
+                shutil.copy2(cookies_path, backup_path)
+            os.replace(temp_path, cookies_path)
+            
             print(f"Cookies erfolgreich gespeichert: {datetime.now()}")
             return True
             
@@ -163,10 +169,17 @@ def get_youtube_cookies():
         import traceback
         traceback.print_exc()
         
-        if 'backup_path' in locals() and os.path.exists(backup_path):
-            os.replace(backup_path, cookies_path)
-            print("Backup wiederhergestellt")
+        if 'temp_path' in locals() and os.path.exists(temp_path):
+            os.remove(temp_path)
+            print("Unvollständige Cookie-Datei verworfen, bisherige Cookies bleiben erhalten")
         return False
 
 if __name__ == "__main__":
-    get_youtube_cookies()
+    parser = argparse.ArgumentParser(description='Refresh YouTube cookies with a headless Chrome login.')
+    parser.add_argument('--if-needed', action='store_true',
+                        help='only log in if the login cookies are missing or about to expire')
+    parser.add_argument('--stale', type=int, metavar='MTIME_NS',
+                        help='only log in if cookies.txt is still the version a failed request used')
+    args = parser.parse_args()
+    success = refresh_cookies(get_cookie_path(), get_youtube_cookies, if_needed=args.if_needed, stale_mtime=args.stale)
+    sys.exit(0 if success else 1)
@@ -0,0 +1,48 @@
+"""Run summary job workers outside the Streamlit process.
+
+Usage:
+    python worker.py [--workers 4] [--api-port 8600]
+
+Workers claim jobs from the queue in the shared cache directory (CACHE_DIR),
+so any number of worker processes can serve any number of Streamlit
+replicas on the same host or volume. Start the app with JOB_WORKERS=0 to
+leave all work to these processes. With --api-port (or JOB_API_PORT) the
+process also serves the job HTTP API.
+"""
+import argparse
+import sys
+import time
+
+from app import JOB_HANDLERS, get_groq_client, prepare_summary_job
+from jobs import JOB_API_PORT, JOB_WORKERS, WorkerPool, get_job_queue, start_job_api
+from metrics import start_metrics_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run summary job workers.')
+    parser.add_argument('--workers', type=int, default=JOB_WORKERS or 2, help='jobs processed concurrently')
+    parser.add_argument('--api-port', type=int, default=JOB_API_PORT, help='serve the job HTTP API on this port')
+    args = parser.parse_args()
+    try:
+        get_groq_client()
+    except ValueError as e:
+        sys.exit(f"Cannot start workers: {str(e)}")
+
+    job_queue = get_job_queue()
+    pool = WorkerPool(job_queue, JOB_HANDLERS, workers=args.workers).start()
+    if args.api_port:
+        start_job_api(prepare_summary_job, args.api_port)
+    start_metrics_server()
+    print(f"{args.workers} workers waiting for jobs in {job_queue.path}")
+
+    try:
+        while True:
+            time.sleep(60 * 60)
+            job_queue.purge()
+    except KeyboardInterrupt:
+        print("Stopping workers after their current jobs...")
+        pool.stop()
+
+
+if __name__ == '__main__':
+    main()